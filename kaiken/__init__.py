@@ -0,0 +1 @@
+"""Módulos de soporte de la aplicación de Gestión de Licitaciones Kaiken."""
@@ -0,0 +1,141 @@
+"""
+Panel de administración y exportación de métricas.
+
+Con `[metrics] panel = true` se muestra en la barra lateral un resumen de
+tiempos por consulta y por página, aciertos del cache, conexiones descartadas
+del pool y memoria de los DataFrames, con descargas en formato Prometheus y
+JSON Lines.
+Con `prometheus_file` y/o `jsonl_file` las métricas se escriben además a disco
+cada `export_interval` segundos (el primero sirve al textfile collector de
+node_exporter; el segundo acumula una línea por serie y exportación).
+"""
+import datetime as dt
+import json
+import math
+import os
+import threading
+import time
+from pathlib import Path
+
+import pandas as pd
+import streamlit as st
+
+from kaiken.db import init_query_cache, secrets_section, started_pool
+from kaiken.metrics import METRICS, prometheus_text
+
+EXPORT_INTERVAL = 60
+
+_export_lock = threading.Lock()
+_last_export = 0.0
+
+
+def collect():
+    """
+    Series del registro más los contadores del pool y del cache, como
+    `(series, gauges)`. Los del pool se omiten si nunca se creó (p. ej. con el
+    backend analítico sin base de datos): consultarlos no debe abrir conexiones.
+    """
+    pool, cache = started_pool(), init_query_cache()
+    gauges = []
+    if pool is not None:
+        usage = pool.usage()
+        gauges += [
+            ("kaiken_pool_connections_created_total", {}, pool.stats["created"]),
+            ("kaiken_pool_connections_discarded_total", {}, pool.stats["discarded"]),
+            ("kaiken_pool_checkouts_total", {}, pool.stats["checkouts"]),
+            ("kaiken_pool_connections", {"state": "open"}, usage["size"]),
+            ("kaiken_pool_connections", {"state": "idle"}, usage["idle"]),
+        ]
+    gauges += [
+        ("kaiken_cache_evictions_total", {}, cache.stats["evictions"]),
+        ("kaiken_cache_invalidations_total", {}, cache.stats["invalidations"]),
+        ("kaiken_cache_entries", {}, cache.usage()["entries"]),
+        ("kaiken_cache_bytes", {}, cache.usage()["bytes"]),
+    ]
+    return METRICS.snapshot(), gauges
+
+
+def json_lines(series, gauges):
+    stamp = dt.datetime.now(dt.timezone.utc).isoformat(timespec="seconds")
+    rows = [{"ts": stamp, **s} for s in series]
+    rows += [{"ts": stamp, "name": name, "labels": labels, "value": value} for name, labels, value in gauges]
+    # NaN no es JSON válido
+    return "".join(json.dumps({k: (None if isinstance(v, float) and math.isnan(v) else v) for k, v in row.items()},
+                              ensure_ascii=False) + "\n" for row in rows)
+
+
+def export(force=False):
+    """Escribe las métricas a los archivos configurados, como máximo cada `export_interval` s."""
+    global _last_export
+    cfg = secrets_section("metrics")
+    prom_file, jsonl_file = cfg.get("prometheus_file"), cfg.get("jsonl_file")
+    if not (prom_file or jsonl_file):
+        return
+    with _export_lock:
+        if not force and time.monotonic() - _last_export < float(cfg.get("export_interval", EXPORT_INTERVAL)):
+            return
+        _last_export = time.monotonic()
+        series, gauges = collect()
+        if prom_file:
+            path = Path(prom_file)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(".tmp")
+            tmp.write_text(prometheus_text(series, gauges))
+            os.replace(tmp, path)
+        if jsonl_file:
+            path = Path(jsonl_file)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with path.open("a") as f:
+                f.write(json_lines(series, gauges))
+
+
+def _summary(series, name, label):
+    rows = [
+        {label: s["labels"].get(label, ""), "n": s["count"], "p50 ms": s["p50"] * 1000,
+         "p95 ms": s["p95"] * 1000, "total s": s["sum"]}
+        for s in series if s["name"] == name
+    ]
+    return pd.DataFrame(rows).sort_values("total s", ascending=False) if rows else pd.DataFrame()
+
+
+def admin_panel():
+    """Panel de métricas en la barra lateral (sólo con `[metrics] panel = true`)."""
+    if not secrets_section("metrics").get("panel", False):
+        return
+    series, gauges = collect()
+    by_name = {}
+    for s in series:
+        by_name.setdefault(s["name"], []).append(s)
+
+    with st.sidebar.expander("📈 Métricas"):
+        requests = by_name.get("kaiken_cache_requests_total", [])
+        hits = sum(s["sum"] for s in requests if s["labels"].get("result") == "hit")
+        total = sum(s["sum"] for s in requests)
+        c1, c2 = st.columns(2)
+        c1.metric("Aciertos de cache", f"{hits / total:.0%}" if total else "—")
+        c2.metric("Conexiones descartadas", dict((n, v) for n, _, v in gauges).get("kaiken_pool_connections_discarded_total", "—"))
+
+        queries = _summary(series, "kaiken_query_seconds", "query")
+        if not queries.empty:
+            sizes = {s["labels"]["query"]: s["sum"] / max(s["count"], 1) / 2**20 for s in by_name.get("kaiken_query_bytes", [])}
+            queries["MB prom."] = queries["query"].map(sizes)
+            st.caption("Consultas (sólo las que llegan a la base)")
+            st.dataframe(queries, hide_index=True, use_container_width=True)
+        pages = _summary(series, "kaiken_page_seconds", "page")
+        if not pages.empty:
+            st.caption("Páginas")
+            st.dataframe(pages, hide_index=True, use_container_width=True)
+        imports = _summary(series, "kaiken_page_import_seconds", "page")
+        if not imports.empty:
+            st.caption("Carga de módulos de página (una vez por proceso)")
+            st.dataframe(imports, hide_index=True, use_container_width=True)
+        sections = _summary(series, "kaiken_section_seconds", "section")
+        if not sections.empty:
+            st.caption("Tramos de pandas / Plotly")
+            st.dataframe(sections, hide_index=True, use_container_width=True)
+
+        st.download_button("Prometheus", prometheus_text(series, gauges), "kaiken.prom", "text/plain")
+        st.download_button("JSON Lines", json_lines(series, gauges), "kaiken-metrics.jsonl", "application/x-ndjson")
+        if st.button("Reiniciar métricas"):
+            METRICS.reset()
+            st.rerun()
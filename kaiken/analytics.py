@@ -0,0 +1,411 @@
+"""
+Backend analítico embebido (DuckDB) para el dashboard y "Ver Licitaciones".
+
+Las lecturas analíticas dejan de competir con las escrituras en el Postgres
+transaccional: las cuatro tablas se exportan a Parquet (`python -m
+kaiken.analytics export`) y cada proceso las carga en una base DuckDB en
+memoria, o se leen directamente los CSV limpios de `scripts/data`, lo que
+permite correr el dashboard sin base de datos.
+
+Precios y costos se guardan como centavos enteros (`numeric(12,2)` * 100), así
+que las sumas son exactas como las de `numeric` en Postgres y los resultados
+coinciden con la vista `order_details_with_margin`; `python -m kaiken.analytics
+check` lo verifica contra la base.
+
+    [analytics]
+    enabled = true
+    source = ".cache/analytics"     # carpeta con los Parquet exportados
+    # source = "scripts/data"       # o los CSV de muestra (*_clean.csv, clientes_sample.csv)
+
+Uso:
+    python -m kaiken.analytics export [--dir .cache/analytics]
+    python -m kaiken.analytics check [--source scripts/data]
+"""
+import argparse
+import datetime as dt
+import logging
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pandas as pd
+import streamlit as st
+
+from kaiken.db import cached_query, secrets_section
+
+ANALYTICS_DIR = Path(".cache") / "analytics"
+CHECK_TOLERANCE = 0.005     # medio centavo
+CHECK_TENDERS = 500         # licitaciones cuyas líneas se comparan
+STALE_HOURS = 24            # antigüedad de la exportación sobre la que se avisa en la interfaz
+
+# Columnas que se exportan de cada tabla, con los tipos de kaiken/bulk.py
+EXPORTS = {
+    "clientes": ("SELECT id_cli, nom_cli, rut_cli FROM public.clientes",
+                 {"id_cli": "int64", "nom_cli": "string", "rut_cli": "string"}),
+    "products": ("SELECT sku_pro, nom_pro, cost_prp AS cost_cents FROM public.products",
+                 {"sku_pro": "string", "nom_pro": "string", "cost_cents": "cents"}),
+    "tenders": ("SELECT id, id_cli, creation_date, delivery_date FROM public.tenders",
+                {"id": "string", "id_cli": "int64", "creation_date": "date", "delivery_date": "date"}),
+    "orders": ("SELECT tender_id, product_id, quantity, price AS price_cents FROM public.orders",
+               {"tender_id": "string", "product_id": "string", "quantity": "int64", "price_cents": "cents"}),
+}
+
+# CSV limpios (mismas columnas que el DDL) y cómo llevarlos a las columnas exportadas.
+# Los montos pasan por DECIMAL y se redondean a 2 decimales, como al insertarlos en numeric(12,2).
+_CENTS = "CAST(ROUND(CAST(NULLIF({0}, '') AS DECIMAL(38, 12)), 2) * 100 AS BIGINT)"
+CSV_SOURCES = {
+    "clientes": ("clientes_sample.csv",
+                 "CAST(id_cli AS BIGINT) AS id_cli, nom_cli, rut_cli"),
+    "products": ("product_sample_clean.csv",
+                 "sku_pro, nom_pro, " + _CENTS.format("cost_prp") + " AS cost_cents"),
+    "tenders": ("tender_sample_clean.csv",
+                "id, CAST(NULLIF(id_cli, '') AS BIGINT) AS id_cli, CAST(creation_date AS DATE) AS creation_date, "
+                "CAST(NULLIF(delivery_date, '') AS DATE) AS delivery_date"),
+    "orders": ("order_sample_clean.csv",
+               "tender_id, product_id, CAST(quantity AS BIGINT) AS quantity, " + _CENTS.format("price") + " AS price_cents"),
+}
+
+_VIEW = """
+    CREATE OR REPLACE VIEW order_details_with_margin AS
+    SELECT o.tender_id, o.product_id, p.nom_pro AS product_name, o.quantity,
+           p.cost_cents, o.price_cents,
+           (o.price_cents - p.cost_cents) * o.quantity AS margin_cents
+    FROM orders o
+    JOIN products p ON o.product_id = p.sku_pro
+"""
+
+# Mismas consultas (y columnas) que las del registro de kaiken/queries.py
+QUERIES = {
+    "dashboard_bounds": """
+        SELECT MIN(t.creation_date) AS min_date, MAX(t.creation_date) AS max_date
+        FROM tenders t
+        WHERE t.id_cli IS NOT NULL
+          AND EXISTS (SELECT 1 FROM orders o WHERE o.tender_id = t.id)
+    """,
+    "dashboard_clients": """
+        SELECT
+            c.nom_cli,
+            SUM(ovm.margin_cents)::DOUBLE / 100 AS total_margin,
+            SUM(ovm.price_cents * ovm.quantity)::DOUBLE / 100 AS revenue,
+            COUNT(DISTINCT ovm.tender_id) AS num_tenders
+        FROM order_details_with_margin ovm
+        JOIN tenders t ON ovm.tender_id = t.id
+        JOIN clientes c ON t.id_cli = c.id_cli
+        WHERE t.creation_date BETWEEN $1::DATE AND $2::DATE
+        GROUP BY c.nom_cli
+    """,
+    # Postgres ordena los NULL primero en DESC
+    "dashboard_top_products": """
+        SELECT ovm.product_name, SUM(ovm.margin_cents)::DOUBLE / 100 AS total_margin
+        FROM order_details_with_margin ovm
+        JOIN tenders t ON ovm.tender_id = t.id
+        JOIN clientes c ON t.id_cli = c.id_cli
+        WHERE t.creation_date BETWEEN $1::DATE AND $2::DATE
+        GROUP BY ovm.product_name
+        ORDER BY total_margin DESC NULLS FIRST
+        LIMIT $3
+    """,
+    "dashboard_monthly": """
+        WITH meses AS (
+            SELECT CAST(generate_series AS DATE) AS creation_date
+            FROM generate_series(CAST(date_trunc('month', $1::DATE) AS TIMESTAMP),
+                                 CAST(date_trunc('month', $2::DATE) AS TIMESTAMP), INTERVAL 1 MONTH)
+        ),
+        ventas AS (
+            SELECT
+                CAST(date_trunc('month', t.creation_date) AS DATE) AS creation_date,
+                SUM(ovm.price_cents * ovm.quantity) AS revenue_cents,
+                SUM(ovm.margin_cents) AS margin_cents
+            FROM order_details_with_margin ovm
+            JOIN tenders t ON ovm.tender_id = t.id
+            JOIN clientes c ON t.id_cli = c.id_cli
+            WHERE t.creation_date BETWEEN $1::DATE AND $2::DATE
+            GROUP BY 1
+        )
+        SELECT
+            m.creation_date,
+            COALESCE(v.revenue_cents, 0)::DOUBLE / 100 AS monthly_revenue,
+            COALESCE(v.margin_cents, 0)::DOUBLE / 100 AS monthly_margin
+        FROM meses m
+        LEFT JOIN ventas v ON v.creation_date = m.creation_date
+        ORDER BY m.creation_date
+    """,
+    # Búsqueda paginada por keyset (ver kaiken/search.py). DuckDB no tiene
+    # escape por defecto en ILIKE: se declara el de Postgres
+    "licitaciones_buscar": r"""
+        SELECT t.id, c.nom_cli, t.creation_date
+        FROM tenders t
+        JOIN clientes c ON t.id_cli = c.id_cli
+        WHERE (t.id ILIKE $1 ESCAPE '\' OR c.nom_cli ILIKE $1 ESCAPE '\')
+        ORDER BY t.creation_date DESC, t.id DESC
+        LIMIT $2
+    """,
+    "licitaciones_buscar_desde": r"""
+        SELECT t.id, c.nom_cli, t.creation_date
+        FROM tenders t
+        JOIN clientes c ON t.id_cli = c.id_cli
+        WHERE (t.id ILIKE $1 ESCAPE '\' OR c.nom_cli ILIKE $1 ESCAPE '\')
+          AND (t.creation_date < $2::DATE OR (t.creation_date = $2::DATE AND t.id < $3))
+        ORDER BY t.creation_date DESC, t.id DESC
+        LIMIT $4
+    """,
+    "licitacion_cabecera": """
+        SELECT
+            t.id AS "ID Licitación", c.nom_cli AS "Cliente", c.rut_cli AS "RUT Cliente",
+            t.creation_date AS "Fecha Creación", t.delivery_date AS "Fecha Entrega"
+        FROM tenders t
+        JOIN clientes c ON t.id_cli = c.id_cli
+        WHERE list_contains($1::VARCHAR[], t.id)
+    """,
+    "licitacion_lineas": """
+        SELECT
+            ovm.tender_id AS "ID Licitación",
+            ovm.product_name AS "Producto", ovm.quantity AS "Cantidad",
+            ovm.price_cents::DOUBLE / 100 AS "Precio Venta", ovm.cost_cents::DOUBLE / 100 AS "Costo",
+            ovm.margin_cents::DOUBLE / 100 AS "Margen Producto"
+        FROM order_details_with_margin ovm
+        WHERE list_contains($1::VARCHAR[], ovm.tender_id)
+        ORDER BY ovm.tender_id, ovm.product_name
+    """,
+}
+
+# Columnas de fecha: Postgres las entrega como `datetime.date`
+_DATE_COLUMNS = {
+    "dashboard_bounds": ("min_date", "max_date"),
+    "dashboard_monthly": ("creation_date",),
+    "licitaciones_buscar": ("creation_date",),
+    "licitaciones_buscar_desde": ("creation_date",),
+    "licitacion_cabecera": ("Fecha Creación", "Fecha Entrega"),
+}
+
+
+def analytics_enabled():
+    return bool(secrets_section("analytics").get("enabled", False))
+
+
+# --- CARGA DE LAS FUENTES ---
+
+def _source_files(source):
+    """Archivos de la fuente por tabla: los Parquet exportados o, si no están, los CSV limpios."""
+    source = Path(source)
+    parquet = {table: source / f"{table}.parquet" for table in EXPORTS}
+    if all(path.exists() for path in parquet.values()):
+        return parquet
+    csv = {table: source / filename for table, (filename, _) in CSV_SOURCES.items()}
+    missing = [str(path) for path in csv.values() if not path.exists()]
+    if missing:
+        raise FileNotFoundError(f"No hay Parquet ni CSV para el backend analítico en {source}: {', '.join(missing)}")
+    return csv
+
+
+class AnalyticsStore:
+    """Base DuckDB en memoria, recargada cuando cambian los archivos de la fuente."""
+
+    def __init__(self, source=ANALYTICS_DIR):
+        import duckdb     # sólo se necesita con el backend analítico activo
+
+        self.source = Path(source)
+        self._conn = duckdb.connect(":memory:")
+        self._lock = threading.Lock()
+        self.version = None
+
+    def _load(self, files):
+        # Se carga en tablas nuevas y se reemplazan todas en una sola transacción:
+        # las consultas en curso ven la versión anterior completa o la nueva, nunca una mezcla
+        cursor = self._conn.cursor()
+        for table, path in files.items():
+            if path.suffix == ".parquet":
+                select = f"SELECT * FROM read_parquet('{path.as_posix()}')"
+            else:
+                select = (f"SELECT {CSV_SOURCES[table][1]} FROM "
+                          f"read_csv('{path.as_posix()}', delim = ';', header = true, all_varchar = true)")
+            cursor.execute(f"CREATE OR REPLACE TABLE {table}__nueva AS {select}")
+        cursor.execute("BEGIN TRANSACTION")
+        try:
+            for table in files:
+                cursor.execute(f"DROP TABLE IF EXISTS {table}")
+                cursor.execute(f"ALTER TABLE {table}__nueva RENAME TO {table}")
+            cursor.execute(_VIEW)
+            cursor.execute("COMMIT")
+        except BaseException:
+            cursor.execute("ROLLBACK")
+            raise
+
+    def refresh(self):
+        """Recarga las tablas si cambió algún archivo; devuelve la versión vigente."""
+        files = _source_files(self.source)
+        version = tuple((str(path), path.stat().st_mtime_ns) for path in files.values())
+        if version != self.version:
+            with self._lock:
+                if version != self.version:
+                    self._load(files)
+                    self.version = version
+        return self.version
+
+    def loaded_at(self):
+        """Fecha del archivo más antiguo de la versión cargada (None si aún no se carga)."""
+        if self.version is None:
+            return None
+        return dt.datetime.fromtimestamp(min(mtime for _, mtime in self.version) / 1e9)
+
+    def query(self, name, *args):
+        """Ejecuta la consulta `name` y devuelve `(df, versión de la fuente)`."""
+        version = self.refresh()
+        # Un cursor por llamada: DuckDB permite consultas concurrentes sobre cursores distintos
+        df = self._conn.cursor().execute(QUERIES[name], list(args)).df()
+        for column in _DATE_COLUMNS.get(name, ()):
+            df[column] = [None if pd.isna(value) else pd.Timestamp(value).date() for value in df[column]]
+        return df, version
+
+
+@st.cache_resource
+def init_analytics_store():
+    """Base analítica del proceso, compartida por todas las sesiones."""
+    return AnalyticsStore(secrets_section("analytics").get("source", ANALYTICS_DIR))
+
+
+def source_notice():
+    """
+    Indica en la página de qué exportación salen los datos. Las escrituras van a
+    Postgres: lo creado o editado después no aparece hasta volver a exportar.
+    """
+    store = init_analytics_store()
+    store.refresh()
+    loaded_at = store.loaded_at()
+    message = (f"Datos de la exportación analítica del {loaded_at:%d-%m-%Y %H:%M}: las licitaciones "
+               f"creadas o editadas después no aparecen hasta volver a exportar (`python -m kaiken.analytics export`).")
+    stale_hours = float(secrets_section("analytics").get("stale_hours", STALE_HOURS))
+    if dt.datetime.now() - loaded_at > dt.timedelta(hours=stale_hours):
+        st.warning(message)
+    else:
+        st.caption(message)
+
+
+def run_query(name, *args):
+    """Equivalente a `kaiken.queries.run_query` sobre DuckDB, cacheado por versión de la fuente."""
+    store = init_analytics_store()
+    version = store.refresh()
+    key = ("analytics", name, tuple(tuple(a) if isinstance(a, list) else a for a in args), version)
+    return cached_query(key, (), lambda: store.query(name, *args)[0], label=f"analytics:{name}")
+
+
+# --- EXPORTACIÓN DESDE POSTGRES ---
+
+def export(conn, directory=ANALYTICS_DIR, log=print):
+    """Exporta las tablas a Parquet por COPY, escribiendo cada archivo de forma atómica."""
+    import pyarrow.parquet as pq
+
+    from kaiken.bulk import arrow_schema, copy_batches
+
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    for table, (query, schema) in EXPORTS.items():
+        t0 = time.perf_counter()
+        path = directory / f"{table}.parquet"
+        tmp = path.with_suffix(".parquet.tmp")
+        rows = 0
+        with pq.ParquetWriter(str(tmp), arrow_schema(schema)) as writer:
+            for batch in copy_batches(conn, query, schema):
+                writer.write_batch(batch)
+                rows += batch.num_rows
+        conn.rollback()
+        os.replace(tmp, path)
+        log(f"{table}: {rows} filas en {time.perf_counter() - t0:.2f} s")
+
+
+# --- VERIFICACIÓN CONTRA POSTGRES ---
+
+def _compare(name, ours, theirs, keys):
+    """Filas que difieren entre ambos resultados (por `keys`), como lista de textos."""
+    merged = ours.merge(theirs, on=list(keys), how="outer", suffixes=("_duckdb", "_postgres"), indicator=True)
+    origin = {"left_only": "DuckDB", "right_only": "Postgres"}
+    problems = [f"{name}: {dict(row[list(keys)])} sólo en {origin[row['_merge']]}"
+                for _, row in merged[merged["_merge"] != "both"].iterrows()]
+    both = merged[merged["_merge"] == "both"]
+    for column in (c for c in ours.columns if c not in keys):
+        a, b = both[f"{column}_duckdb"], both[f"{column}_postgres"]
+        if pd.api.types.is_numeric_dtype(a) and pd.api.types.is_numeric_dtype(b):
+            differs = ~(((a - b).abs() <= CHECK_TOLERANCE) | (a.isna() & b.isna()))
+        else:
+            differs = ~((a == b) | (a.isna() & b.isna()))
+        problems += [f"{name}: {dict(row[list(keys)])} {column} {row[f'{column}_duckdb']} != {row[f'{column}_postgres']}"
+                     for _, row in both[differs].iterrows()]
+    return problems
+
+
+def check(store, start_date=None, end_date=None):
+    """Compara las consultas de DuckDB con las de Postgres; devuelve la lista de diferencias."""
+    from kaiken.queries import QUERIES as PG_QUERIES, fetch_by_keys, run_query as pg_run_query
+
+    bounds, _ = store.query("dashboard_bounds")
+    problems = _compare("dashboard_bounds", bounds, pg_run_query("dashboard_bounds"), ("min_date",))
+    start_date = start_date or bounds["min_date"].iloc[0]
+    end_date = end_date or bounds["max_date"].iloc[0]
+    if start_date is None:
+        return problems
+
+    problems += _compare("dashboard_clients", store.query("dashboard_clients", start_date, end_date)[0],
+                         pg_run_query("dashboard_clients", start_date, end_date), ("nom_cli",))
+    # Todos los productos, para no depender del orden de los empates en el LIMIT
+    limit = 2**31 - 1
+    problems += _compare("dashboard_top_products", store.query("dashboard_top_products", start_date, end_date, limit)[0],
+                         pg_run_query("dashboard_top_products", start_date, end_date, limit), ("product_name",))
+    problems += _compare("dashboard_monthly", store.query("dashboard_monthly", start_date, end_date)[0],
+                         pg_run_query("dashboard_monthly", start_date, end_date), ("creation_date",))
+
+    pattern, page = "%", 50
+    problems += _compare("licitaciones_buscar", store.query("licitaciones_buscar", pattern, page)[0],
+                         pg_run_query("licitaciones_buscar", pattern, page), ("id",))
+
+    tenders = store._conn.cursor().execute(
+        "SELECT DISTINCT tender_id FROM orders ORDER BY 1 LIMIT $1", [CHECK_TENDERS]).fetchall()
+    tender_ids = [tender_id for (tender_id,) in tenders]
+    if tender_ids and "licitacion_lineas" in PG_QUERIES:
+        keys = ("ID Licitación", "Producto")
+        problems += _compare("licitacion_lineas", store.query("licitacion_lineas", tender_ids)[0],
+                             fetch_by_keys("licitacion_lineas", tender_ids), keys)
+        problems += _compare("licitacion_cabecera", store.query("licitacion_cabecera", tender_ids)[0],
+                             fetch_by_keys("licitacion_cabecera", tender_ids), ("ID Licitación",))
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Backend analítico DuckDB: exportación y verificación.")
+    parser.add_argument("accion", choices=["export", "check"])
+    parser.add_argument("--dir", default=str(ANALYTICS_DIR), help="Carpeta de los Parquet exportados")
+    parser.add_argument("--source", help="Fuente a verificar (por defecto --dir); p. ej. scripts/data")
+    parser.add_argument("--desde", type=dt.date.fromisoformat, help="Inicio del rango a verificar")
+    parser.add_argument("--hasta", type=dt.date.fromisoformat, help="Fin del rango a verificar")
+    parser.add_argument("--dsn", help="Cadena de conexión (por defecto KAIKEN_DATABASE_URL o secrets.toml)")
+    args = parser.parse_args(argv)
+
+    if args.dsn:
+        os.environ["KAIKEN_DATABASE_URL"] = args.dsn
+
+    if args.accion == "export":
+        from kaiken.db import connect
+
+        conn = connect()
+        try:
+            export(conn, args.dir)
+        finally:
+            conn.close()
+        print(f"✅ Tablas exportadas a {args.dir}")
+        return 0
+
+    # Fuera de `streamlit run` cada llamada a st.cache_resource avisa que no hay sesión
+    logging.getLogger("streamlit.runtime.scriptrunner_utils.script_run_context").setLevel(logging.ERROR)
+    problems = check(AnalyticsStore(args.source or args.dir), args.desde, args.hasta)
+    for problem in problems:
+        print(f"❌ {problem}")
+    if problems:
+        print(f"{len(problems)} diferencias entre DuckDB y Postgres.")
+        return 1
+    print("✅ DuckDB coincide con order_details_with_margin en Postgres.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
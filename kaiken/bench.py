@@ -0,0 +1,255 @@
+"""
+Benchmark sin interfaz de las consultas y transformaciones de cada página.
+
+Para cada escala (opcionalmente generada con kaiken/synth.py) ejecuta los mismos
+pasos que hace cada página (las consultas del registro, la búsqueda por keyset,
+la carga concurrente y las transformaciones de pandas) con el cache vacío, y
+guarda mediana, mínimo y máximo de cada paso en un archivo JSON Lines. Cada
+resultado se compara con la corrida anterior de la misma escala y paso, y se
+marcan las regresiones.
+
+Uso:
+    python -m kaiken.bench --escalas xs,s,m --generar [--rapido] [--repeticiones 5]
+    python -m kaiken.bench --etiqueta produccion      # sobre los datos actuales
+"""
+import argparse
+import datetime as dt
+import json
+import logging
+import os
+import statistics
+import subprocess
+import sys
+import time
+from functools import partial
+from pathlib import Path
+
+import pandas as pd
+
+RESULTS_PATH = Path(".cache") / "bench" / "resultados.jsonl"
+REPETICIONES = 5
+# Un paso se marca como regresión si su mediana empeora más que esto
+REGRESSION_THRESHOLD = 0.20
+SEARCH_TEXT = "MUNI"
+
+
+class Medidor:
+    """Ejecuta cada paso `repeticiones` veces con el cache vacío y acumula los tiempos."""
+
+    def __init__(self, escala, repeticiones, limpiar_cache):
+        self.escala = escala
+        self.repeticiones = repeticiones
+        self.limpiar_cache = limpiar_cache
+        self.pagina = None
+        self.resultados = []
+
+    def __call__(self, paso, fn):
+        tiempos = []
+        for _ in range(self.repeticiones):
+            self.limpiar_cache()
+            t0 = time.perf_counter()
+            result = fn()
+            tiempos.append(time.perf_counter() - t0)
+        partes = result.values() if isinstance(result, dict) else result if isinstance(result, tuple) else (result,)
+        frames = [r for r in partes if isinstance(r, pd.DataFrame)]
+        self.resultados.append({
+            "escala": self.escala, "pagina": self.pagina, "paso": paso,
+            "mediana_s": statistics.median(tiempos), "min_s": min(tiempos), "max_s": max(tiempos),
+            "filas": sum(len(df) for df in frames),
+            "memoria_mb": round(sum(df.memory_usage(deep=True).sum() for df in frames) / 2**20, 3),
+        })
+        return result
+
+
+# --- PASOS DE CADA PÁGINA ---
+
+def bench_dashboard(medir, rollups):
+    from kaiken.queries import run_query
+
+    bounds = medir("limites", partial(run_query, "dashboard_bounds"))
+    start, end = bounds["min_date"].iloc[0], bounds["max_date"].iloc[0]
+    if pd.isna(start):
+        return
+    sufijos = ("", "_rollup") if rollups else ("",)
+    for sufijo in sufijos:
+        df_clients = medir(f"clientes{sufijo}", partial(run_query, f"dashboard_clients{sufijo}", start, end))
+        medir(f"top_productos{sufijo}", partial(run_query, f"dashboard_top_products{sufijo}", start, end, 5))
+        df_time = medir(f"mensual{sufijo}", partial(run_query, f"dashboard_monthly{sufijo}", start, end))
+
+    def figuras():
+        from kaiken.charts import CHART_MAX_SERIES_POINTS, CHART_TOP_N, clients_bubble, monthly_lines, top_bars
+
+        clientes = clients_bubble(df_clients, CHART_TOP_N)
+        top = top_bars(df_clients, "nom_cli", "total_margin", "Top 5 Clientes por Margen Generado")
+        serie = monthly_lines(df_time, CHART_MAX_SERIES_POINTS)
+        return clientes, top, serie
+
+    medir("figuras", figuras)
+
+
+def bench_ver_licitaciones(medir):
+    from kaiken.search import load_tender, search_tenders
+
+    df, next_cursor = medir("buscar_todas", partial(search_tenders, ""))
+    if next_cursor is not None:
+        medir("pagina_2", partial(search_tenders, "", next_cursor))
+    medir("buscar_texto", partial(search_tenders, SEARCH_TEXT))
+    if not df.empty:
+        medir("detalle", partial(load_tender, df["id"].iloc[0]))
+
+
+def bench_gestionar_licitacion(medir):
+    from kaiken.catalog import product_index
+    from kaiken.fanout import gather
+    from kaiken.queries import fetch_by_keys, run_query
+    from kaiken.search import SEARCH_PAGE_SIZE, keyset_page, like_pattern
+
+    data = medir("opciones", lambda: gather({
+        "clientes": partial(run_query, "clientes_opciones"),
+        "productos": product_index,
+    }))
+    medir("buscar_producto", lambda: data["productos"].search(SEARCH_TEXT))
+    tenders, _ = medir("buscar_licitacion", partial(keyset_page, "licitaciones_buscar", like_pattern(""), None,
+                                                     SEARCH_PAGE_SIZE, ("creation_date", "id")))
+    if tenders.empty:
+        return
+    tender_id = tenders["id"].iloc[0]
+    medir("editar", lambda: gather({
+        "licitacion": partial(fetch_by_keys, "licitaciones_por_id", [tender_id]),
+        "ordenes": partial(fetch_by_keys, "ordenes_por_licitacion", [tender_id]),
+    }))
+
+
+def bench_listado(medir, query, cursor_columns):
+    from kaiken.listing import LISTING_PAGE_SIZE
+    from kaiken.search import keyset_page, like_pattern
+
+    medir("pagina", partial(keyset_page, query, like_pattern(""), None, LISTING_PAGE_SIZE, cursor_columns))
+    medir("filtro", partial(keyset_page, query, like_pattern(SEARCH_TEXT), None, LISTING_PAGE_SIZE, cursor_columns))
+
+
+PAGES = {
+    "dashboard": bench_dashboard,
+    "ver_licitaciones": bench_ver_licitaciones,
+    "gestionar_licitacion": bench_gestionar_licitacion,
+    "gestionar_clientes": partial(bench_listado, query="clientes_pagina", cursor_columns=("nom_cli", "id_cli")),
+    "gestionar_productos": partial(bench_listado, query="productos_pagina", cursor_columns=("nom_pro", "sku_pro")),
+}
+
+
+# --- EJECUCIÓN Y RESULTADOS ---
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _conteos(conn):
+    with conn.cursor() as cursor:
+        cursor.execute("""
+            SELECT (SELECT count(*) FROM public.clientes), (SELECT count(*) FROM public.products),
+                   (SELECT count(*) FROM public.tenders), (SELECT count(*) FROM public.orders),
+                   to_regclass('public.rollup_client_month') IS NOT NULL;
+        """)
+        clientes, products, tenders, orders, rollups = cursor.fetchone()
+    conn.rollback()
+    return {"clientes": clientes, "products": products, "tenders": tenders, "orders": orders}, rollups
+
+
+def run_scale(escala, repeticiones, paginas=PAGES):
+    """Corre todas las páginas sobre los datos actuales y devuelve los resultados."""
+    from kaiken.db import connect, init_query_cache
+
+    conn = connect()
+    try:
+        conteos, rollups = _conteos(conn)
+    finally:
+        conn.close()
+
+    medir = Medidor(escala, repeticiones, init_query_cache().clear)
+    for pagina, bench in paginas.items():
+        medir.pagina = pagina
+        if pagina == "dashboard":
+            bench(medir, rollups)
+        else:
+            bench(medir)
+    meta = {"fecha": dt.datetime.now().isoformat(timespec="seconds"), "commit": _git_commit(), "conteos": conteos}
+    return [{**meta, **r} for r in medir.resultados]
+
+
+def previous_results(path=RESULTS_PATH):
+    """Último resultado guardado de cada `(escala, pagina, paso)`."""
+    previos = {}
+    if Path(path).exists():
+        for line in Path(path).read_text().splitlines():
+            r = json.loads(line)
+            previos[(r["escala"], r["pagina"], r["paso"])] = r
+    return previos
+
+
+def save_results(resultados, path=RESULTS_PATH):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("a") as f:
+        for r in resultados:
+            f.write(json.dumps(r, ensure_ascii=False, default=str) + "\n")
+
+
+def report(resultados, previos, threshold=REGRESSION_THRESHOLD):
+    """Imprime la tabla de resultados y devuelve la cantidad de regresiones."""
+    regresiones = 0
+    for r in resultados:
+        previo = previos.get((r["escala"], r["pagina"], r["paso"]))
+        cambio = ""
+        if previo and previo["mediana_s"] > 0:
+            delta = r["mediana_s"] / previo["mediana_s"] - 1
+            marca = "⚠️ " if delta > threshold else ""
+            regresiones += delta > threshold
+            cambio = f"{marca}{delta:+.0%} vs {previo['commit'] or '?'}"
+        print(f"{r['escala']:<8} {r['pagina']:<22} {r['paso']:<22} {r['mediana_s'] * 1000:>9.1f} ms "
+              f"{r['filas']:>8} filas {r['memoria_mb']:>8.2f} MB  {cambio}")
+    return regresiones
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark sin interfaz de las páginas de la aplicación.")
+    parser.add_argument("--escalas", help="Escalas de kaiken/synth.py separadas por coma (p. ej. xs,s,m)")
+    parser.add_argument("--generar", action="store_true", help="Genera y carga cada escala antes de medirla (vacía las tablas)")
+    parser.add_argument("--rapido", action="store_true", help="Carga sintética sin triggers (requiere superusuario)")
+    parser.add_argument("--etiqueta", default="actual", help="Nombre de la escala cuando no se genera")
+    parser.add_argument("--repeticiones", type=int, default=REPETICIONES)
+    parser.add_argument("--salida", default=str(RESULTS_PATH), help="Archivo JSON Lines de resultados")
+    parser.add_argument("--dsn", help="Cadena de conexión (por defecto KAIKEN_DATABASE_URL o secrets.toml)")
+    args = parser.parse_args(argv)
+
+    if args.dsn:
+        os.environ["KAIKEN_DATABASE_URL"] = args.dsn
+    # Fuera de `streamlit run` cada llamada a st.cache_resource avisa que no hay sesión
+    logging.getLogger("streamlit.runtime.scriptrunner_utils.script_run_context").setLevel(logging.ERROR)
+
+    from kaiken import synth
+    from kaiken.db import connect
+
+    escalas = args.escalas.split(",") if args.escalas else [args.etiqueta]
+    previos = previous_results(args.salida)
+    regresiones = 0
+    for escala in escalas:
+        if args.generar:
+            print(f"Generando escala {escala} {synth.SCALES[escala]}...")
+            conn = connect()
+            try:
+                synth.cargar(conn, synth.SCALES[escala], reset=True, rapido=args.rapido, log=lambda *_: None)
+            finally:
+                conn.close()
+        resultados = run_scale(escala, args.repeticiones)
+        save_results(resultados, args.salida)
+        regresiones += report(resultados, previos)
+    if regresiones:
+        print(f"⚠️ {regresiones} pasos más lentos que la corrida anterior (umbral {REGRESSION_THRESHOLD:.0%}).")
+    return 1 if regresiones else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,174 @@
+"""
+Cache de consultas invalidado por versión de tabla.
+
+Cada resultado se guarda junto a las tablas que lee y a la versión que tenía
+cada una al momento de la consulta. Las escrituras (o un NOTIFY desde Postgres)
+incrementan la versión de las tablas afectadas, de modo que sólo se descartan
+las consultas que dependen de ellas. La memoria está acotada por número de
+entradas y por tamaño, con desalojo LRU.
+"""
+import re
+import select
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import psycopg2
+import psycopg2.extensions
+
+TABLES = ("clientes", "products", "tenders", "orders")
+
+# Vistas y las tablas de las que dependen
+VIEW_DEPENDENCIES = {
+    "order_details_with_margin": ("orders", "products"),
+}
+
+NOTIFY_CHANNEL = "kaiken_table_changed"
+
+CACHE_MAX_ENTRIES = 256
+CACHE_MAX_BYTES = 256 * 1024 * 1024     # 256 MB
+CACHE_TTL = 3600                        # segundos; red de seguridad ante cambios externos
+
+_TABLE_RE = re.compile(r"\b(?:public\.)?(" + "|".join(TABLES + tuple(VIEW_DEPENDENCIES)) + r")\b", re.IGNORECASE)
+
+
+def tables_in_query(query):
+    """Detecta las tablas que lee una consulta (expandiendo las vistas conocidas)."""
+    found = set()
+    for name in _TABLE_RE.findall(query):
+        name = name.lower()
+        found.update(VIEW_DEPENDENCIES.get(name, (name,)))
+    return frozenset(found)
+
+
+def frame_size(value):
+    """
+    Memoria estimada de un valor cacheado: la del DataFrame (incluido el
+    contenido de las columnas de texto), `nbytes` si el objeto lo declara (por
+    ejemplo el índice de productos) o, si no, `sys.getsizeof`.
+    """
+    if hasattr(value, "memory_usage"):
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum() if hasattr(usage, "sum") else usage)
+    if hasattr(value, "nbytes"):
+        return int(value.nbytes)
+    return sys.getsizeof(value)
+
+
+class TableVersionedCache:
+    """Cache LRU thread-safe cuyas entradas dependen de versiones de tabla."""
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES, max_bytes=CACHE_MAX_BYTES, ttl=CACHE_TTL):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._versions = {table: 0 for table in TABLES}
+        self._entries = OrderedDict()    # key -> (value, tables, versions, size, stored_at)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+    def _snapshot(self, tables):
+        return tuple(self._versions.get(table, 0) for table in sorted(tables))
+
+    def get(self, key):
+        """Devuelve `(True, valor)` si hay una entrada vigente, o `(False, None)`."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, tables, versions, size, stored_at = entry
+                if versions == self._snapshot(tables) and time.monotonic() - stored_at < self.ttl:
+                    self._entries.move_to_end(key)
+                    self.stats["hits"] += 1
+                    return True, value
+                self._drop(key)
+            self.stats["misses"] += 1
+            return False, None
+
+    def versions_for(self, tables):
+        """Versión actual de las tablas, a tomar ANTES de ejecutar la consulta."""
+        with self._lock:
+            return self._snapshot(tables)
+
+    def put(self, key, value, tables, versions, size=None):
+        """
+        Guarda un resultado calculado con las versiones `versions` de `tables`.
+        `size` reemplaza la estimación de `frame_size` cuando quien llama la conoce.
+        """
+        if size is None:
+            size = frame_size(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if versions != self._snapshot(tables):
+                # Hubo una escritura mientras corría la consulta: el resultado ya es viejo
+                return
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (value, tables, versions, size, time.monotonic())
+            self._bytes += size
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                self._drop(next(iter(self._entries)))
+                self.stats["evictions"] += 1
+
+    def _drop(self, key):
+        entry = self._entries.pop(key)
+        self._bytes -= entry[3]
+
+    def bump(self, *tables):
+        """Incrementa la versión de las tablas y descarta las entradas que las leen."""
+        tables = {table.lower() for table in tables}
+        with self._lock:
+            for table in tables:
+                self._versions[table] = self._versions.get(table, 0) + 1
+            stale = [key for key, entry in self._entries.items() if entry[1] & tables]
+            for key in stale:
+                self._drop(key)
+            self.stats["invalidations"] += len(stale)
+
+    def usage(self):
+        """Entradas y bytes ocupados en este momento."""
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._bytes}
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+
+def start_notify_listener(cache, dsn, channel=NOTIFY_CHANNEL, timeout=5):
+    """
+    Escucha `channel` en una conexión dedicada y aplica `cache.bump(tabla)` por
+    cada notificación. El payload es el nombre de la tabla modificada
+    (ver sql/04.Invalidacion de Cache.sql). Devuelve el hilo de fondo.
+    """
+    def _listen():
+        while True:
+            conn = None
+            try:
+                conn = psycopg2.connect(**dsn)
+                conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+                with conn.cursor() as cursor:
+                    cursor.execute(f"LISTEN {channel};")
+                while True:
+                    if select.select([conn], [], [], timeout) == ([], [], []):
+                        continue
+                    conn.poll()
+                    tables = {notify.payload for notify in conn.notifies}
+                    conn.notifies.clear()
+                    if tables:
+                        cache.bump(*tables)
+            except psycopg2.Error:
+                # Mientras no hay notificaciones no sabemos qué cambió: se invalida
+                # todo subiendo las versiones (vaciar no alcanza: una consulta en
+                # curso guardaría su resultado con las versiones viejas)
+                cache.bump(*TABLES)
+                if conn is not None:
+                    conn.close()
+                time.sleep(timeout)
+
+    thread = threading.Thread(target=_listen, name="kaiken-cache-listen", daemon=True)
+    thread.start()
+    return thread
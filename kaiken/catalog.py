@@ -0,0 +1,116 @@
+"""
+Índice en memoria del catálogo de productos para el editor de licitaciones.
+
+El selector ya no recibe el catálogo completo: a medida que el usuario escribe
+se buscan en el servidor las primeras coincidencias por prefijo de palabra del
+nombre o del SKU, y el costo de cada línea se obtiene con un dict por SKU en
+lugar de filtrar el DataFrame fila por fila.
+
+El índice es una lista ordenada de `(token, fila)` con los tokens normalizados
+(minúsculas, sin tildes) de cada nombre y SKU; una búsqueda son dos bisecciones
+por palabra para elegir la más selectiva, y las demás se verifican sólo sobre
+las filas candidatas. Se construye una vez por versión de
+la tabla `products` y se comparte entre sesiones a través del cache de consultas.
+"""
+import re
+import sys
+import unicodedata
+from bisect import bisect_left
+
+import numpy as np
+
+from kaiken.db import cached_query
+from kaiken.queries import run_query
+
+PICKER_LIMIT = 50
+
+_TOKEN_RE = re.compile(r"[0-9a-z]+")
+
+
+def normalize(text):
+    """Minúsculas y sin tildes, para comparar nombres escritos de distintas formas."""
+    text = unicodedata.normalize("NFKD", str(text).casefold())
+    return "".join(char for char in text if not unicodedata.combining(char))
+
+
+def tokens(text):
+    return _TOKEN_RE.findall(normalize(text))
+
+
+class ProductIndex:
+    """Búsqueda por prefijo de palabra y acceso por SKU a nombre y costo."""
+
+    def __init__(self, products_df):
+        self.skus = products_df["sku_pro"].astype(str).tolist()
+        names = products_df["nom_pro"].astype(str).tolist()
+        costs = products_df["cost_prp"].astype(float).tolist()
+        self._by_sku = {sku: (name, cost) for sku, name, cost in zip(self.skus, names, costs)}
+
+        self._row_tokens = []
+        keys, rows = [], []
+        for row, (sku, name) in enumerate(zip(self.skus, names)):
+            row_tokens = {*tokens(name), *tokens(sku), normalize(sku)}
+            self._row_tokens.append(tuple(row_tokens))
+            keys.extend(row_tokens)
+            rows.extend([row] * len(row_tokens))
+        order = sorted(range(len(keys)), key=keys.__getitem__)
+        self._tokens = [keys[i] for i in order]
+        self._rows = np.asarray(rows, dtype=np.int64)[order]
+        self.nbytes = self._memory()
+
+    def _memory(self):
+        """Memoria aproximada del índice, para el límite en bytes del cache."""
+        size = self._rows.nbytes + sum(map(sys.getsizeof, (self.skus, self._by_sku, self._row_tokens, self._tokens)))
+        for sku, entry in self._by_sku.items():
+            size += sys.getsizeof(sku) + sys.getsizeof(entry) + sum(map(sys.getsizeof, entry))
+        size += sum(map(sys.getsizeof, self._row_tokens))
+        # Los tokens de cada fila son los mismos objetos de `_tokens`: se cuentan una vez
+        return size + sum(map(sys.getsizeof, self._tokens))
+
+    def __len__(self):
+        return len(self.skus)
+
+    def __contains__(self, sku):
+        return sku in self._by_sku
+
+    def name(self, sku):
+        return self._by_sku[sku][0]
+
+    def cost(self, sku):
+        return self._by_sku[sku][1]
+
+    def label(self, sku):
+        name = self._by_sku.get(sku, ("(eliminado)",))[0]
+        return f"{name} · {sku}"
+
+    def _prefix_range(self, prefix):
+        lo = bisect_left(self._tokens, prefix)
+        return lo, bisect_left(self._tokens, prefix + "\uffff", lo)
+
+    def search(self, text, limit=PICKER_LIMIT):
+        """
+        SKUs cuyos nombres o códigos tienen una palabra que empieza con cada
+        palabra de `text`, en el orden del catálogo (por nombre).
+        """
+        words = set(tokens(text))
+        if not words:
+            return []
+        # Se parte de la palabra más selectiva y el resto se verifica fila por fila
+        ranges = {word: self._prefix_range(word) for word in words}
+        first = min(words, key=lambda word: ranges[word][1] - ranges[word][0])
+        lo, hi = ranges[first]
+        rest = words - {first}
+        result = []
+        for row in np.unique(self._rows[lo:hi]):
+            row_tokens = self._row_tokens[row]
+            if all(any(token.startswith(word) for token in row_tokens) for word in rest):
+                result.append(self.skus[row])
+                if len(result) == limit:
+                    break
+        return result
+
+
+def product_index():
+    """Índice del catálogo vigente; se reconstruye cuando cambia `products`."""
+    return cached_query(("indice_productos",), ("products",),
+                        lambda: ProductIndex(run_query("productos_listado")), label="indice_productos")
@@ -0,0 +1,183 @@
+"""
+Gráficos del dashboard con tamaño acotado.
+
+`px.scatter(..., color="nom_cli")` crea una traza por cliente y embebe todo el
+`custom_data` en el JSON de la figura: con miles de clientes el navegador
+recibe megabytes y se cuelga. Aquí cada gráfico tiene un tamaño máximo
+independiente de la cantidad de filas:
+
+- los `top_n` clientes por margen se dibujan por separado y el resto se agrupa
+  en un solo punto "Otros";
+- las series de tiempo largas se reducen a `max_series_points` puntos con
+  Largest-Triangle-Three-Buckets, que conserva picos y valles;
+- sobre `WEBGL_THRESHOLD` puntos se usa `scattergl` en lugar de SVG.
+
+Las figuras construidas se cachean por gráfico, parámetros y contenido de los
+datos, así que volver a un filtro ya visto no reconstruye la figura.
+
+    [charts]
+    top_n = 15
+    max_series_points = 400
+"""
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import streamlit as st
+
+from kaiken.cache import TableVersionedCache
+from kaiken.db import secrets_section
+from kaiken.metrics import METRICS
+
+CHART_TOP_N = 15
+CHART_MAX_SERIES_POINTS = 400
+WEBGL_THRESHOLD = 1000
+FIGURE_CACHE_ENTRIES = 64
+OTHERS_LABEL = "Otros"
+
+
+def chart_settings():
+    cfg = secrets_section("charts")
+    return {
+        "top_n": int(cfg.get("top_n", CHART_TOP_N)),
+        "max_series_points": int(cfg.get("max_series_points", CHART_MAX_SERIES_POINTS)),
+    }
+
+
+def render_mode(points):
+    return "webgl" if points > WEBGL_THRESHOLD else "svg"
+
+
+# --- REDUCCIÓN DE DATOS ---
+
+def top_n_with_others(df, label, value, n, sums, counts=None):
+    """
+    Las `n` filas con mayor `value` más una fila `label = "Otros (k)"` que suma
+    las columnas `sums` del resto. `counts` es la columna donde se guarda `k`.
+    """
+    if len(df) <= n + 1:
+        return df.copy()
+    df = df.sort_values(value, ascending=False)
+    top, rest = df.iloc[:n], df.iloc[n:]
+    others = {column: rest[column].sum() for column in sums}
+    others[label] = f"{OTHERS_LABEL} ({len(rest):,})"
+    if counts:
+        others[counts] = len(rest)
+    return pd.concat([top, pd.DataFrame([others])], ignore_index=True)
+
+
+def lttb_indices(x, y, threshold):
+    """Índices que conserva Largest-Triangle-Three-Buckets al reducir a `threshold` puntos."""
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype="float64")
+    y = np.asarray(y, dtype="float64")
+    every = (n - 2) / (threshold - 2)
+    indices = np.empty(threshold, dtype="int64")
+    indices[0], indices[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start, end = int(i * every) + 1, int((i + 1) * every) + 1
+        next_start, next_end = end, min(int((i + 2) * every) + 1, n)
+        avg_x, avg_y = x[next_start:next_end].mean(), y[next_start:next_end].mean()
+        areas = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(areas))
+        indices[i + 1] = a
+    return indices
+
+
+def downsample(df, x, y, max_points):
+    """Reduce `df` (ordenado por `x`) a `max_points` filas según la columna `y`."""
+    if len(df) <= max_points:
+        return df
+    xs = pd.to_datetime(df[x]).astype("int64") if not pd.api.types.is_numeric_dtype(df[x]) else df[x]
+    return df.iloc[lttb_indices(xs.to_numpy(), df[y].fillna(0).to_numpy(), max_points)]
+
+
+# --- FIGURAS ---
+
+def clients_bubble(df_clients, top_n):
+    """Ingresos vs. margen: los `top_n` clientes por margen y el resto agrupado."""
+    df = top_n_with_others(
+        df_clients, "nom_cli", "total_margin", top_n,
+        sums=("revenue", "total_margin", "num_tenders"), counts="num_clients",
+    )
+    if "num_clients" not in df:
+        df["num_clients"] = 1
+    df["num_clients"] = df["num_clients"].fillna(1).astype("int64")
+    df["avg_margin_percentage"] = (df["total_margin"] / df["revenue"]) * 100
+
+    fig = px.scatter(
+        df, x="revenue", y="total_margin", size="num_tenders", color="nom_cli",
+        hover_name="nom_cli",
+        custom_data=['nom_cli', 'revenue', 'total_margin', 'num_tenders', 'avg_margin_percentage', 'num_clients'],
+        size_max=60, title=f"Ingresos vs. Margen por Cliente (top {top_n} por margen)",
+        labels={"revenue": "Ingresos Totales ($)", "total_margin": "Margen Total ($)", "nom_cli": "Cliente"},
+        template="plotly_white", render_mode=render_mode(len(df)),
+    )
+    fig.update_traces(
+        marker=dict(line=dict(width=1, color='DarkSlateGrey')),
+        hovertemplate="<br>".join([
+            "<b>%{customdata[0]}</b>",
+            "Ingresos: $%{customdata[1]:,.2f}",
+            "Margen: $%{customdata[2]:,.2f}",
+            "N° Licitaciones: %{customdata[3]}",
+            "Margen Promedio: %{customdata[4]:.2f}%",
+            "N° Clientes: %{customdata[5]}",
+        ])
+    )
+    return fig
+
+
+def top_bars(df, x, y, title, n=5):
+    top = df.nlargest(n, y)
+    return px.bar(top, x=x, y=y, title=title, color=x, text_auto='$,.2f')
+
+
+def monthly_lines(df_time, max_points):
+    """Ingresos y margen por mes, reducidos a `max_points` puntos si la serie es más larga."""
+    # Las consultas agrupan por inicio de mes; el gráfico usa, como siempre, el último día
+    # del mes (la etiqueta que daba resample('M') sobre el detalle de órdenes)
+    month_end = pd.to_datetime(df_time['creation_date']) + pd.offsets.MonthEnd(0)
+    df = df_time.assign(creation_date=month_end).sort_values('creation_date')
+    reduced = downsample(df, 'creation_date', 'monthly_revenue', max_points)
+    title = "Evolución de Ingresos y Márgenes por Mes"
+    if len(reduced) < len(df):
+        title += f" ({len(reduced)} de {len(df)} puntos)"
+    fig = px.line(
+        reduced, x='creation_date', y=['monthly_revenue', 'monthly_margin'], title=title,
+        labels={'creation_date': 'Mes', 'value': 'Monto ($)'},
+        markers=len(reduced) <= 120, render_mode=render_mode(2 * len(reduced)),
+    )
+    fig.update_traces(hovertemplate='Monto: $%{y:,.2f}<br>Mes: %{x|%Y-%m}')
+    return fig
+
+
+# --- CACHE DE FIGURAS ---
+
+@st.cache_resource
+def init_figure_cache():
+    """Figuras ya construidas, compartidas entre sesiones (sólo lectura)."""
+    return TableVersionedCache(max_entries=FIGURE_CACHE_ENTRIES)
+
+
+def _fingerprint(df):
+    return int(pd.util.hash_pandas_object(df, index=False).sum()), tuple(df.columns)
+
+
+def cached_figure(name, build, df, **params):
+    """
+    Devuelve la figura `build(df, **params)`, cacheada por `name`, `params` y el
+    contenido de `df`. El tamaño del JSON se registra en `kaiken_figure_bytes`.
+    """
+    cache = init_figure_cache()
+    key = (name, tuple(sorted(params.items())), _fingerprint(df))
+    hit, fig = cache.get(key)
+    METRICS.inc("kaiken_cache_requests_total", query=f"figura:{name}", result="hit" if hit else "miss")
+    if not hit:
+        fig = build(df, **params)
+        size = len(fig.to_json())
+        METRICS.observe("kaiken_figure_bytes", size, chart=name)
+        # El JSON aproxima la memoria de la figura (sus datos viven en listas y arreglos)
+        cache.put(key, fig, frozenset(), (), size=size)
+    return fig
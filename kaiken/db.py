@@ -0,0 +1,297 @@
+"""
+Pool de conexiones a PostgreSQL.
+
+Cada consulta o transacción toma prestada una conexión del pool y la devuelve
+al terminar, de modo que las sesiones de Streamlit no comparten un mismo socket
+ni interfieren con las transacciones de otros usuarios. La verificación de las
+conexiones ociosas se hace en un hilo de fondo y no en cada ejecución del script.
+"""
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import pandas as pd
+import psycopg2
+import psycopg2.extensions
+import streamlit as st
+
+from kaiken.cache import TableVersionedCache, frame_size, start_notify_listener
+from kaiken.metrics import METRICS
+
+POOL_MIN_CONN = 1
+POOL_MAX_CONN = 10
+POOL_CHECKOUT_TIMEOUT = 30      # segundos esperando una conexión libre
+POOL_HEALTH_INTERVAL = 60       # segundos entre verificaciones de fondo
+
+_pool = None                    # el último pool creado por `init_pool`
+
+
+class KaikenConnection(psycopg2.extensions.connection):
+    """Conexión que recuerda qué sentencias ya preparó (ver kaiken/queries.py)."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prepared = set()
+        self.prepare_statements = True
+
+
+class PoolTimeout(Exception):
+    """No se obtuvo una conexión libre dentro del tiempo de espera."""
+
+
+class ConnectionPool:
+    """Pool acotado y thread-safe de conexiones psycopg2."""
+
+    def __init__(self, minconn, maxconn, health_interval=POOL_HEALTH_INTERVAL, **dsn):
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.health_interval = health_interval
+        self._dsn = dsn
+        self._idle = deque()
+        self._size = 0              # conexiones abiertas (ociosas + prestadas)
+        self._cond = threading.Condition()
+        self._closed = False
+        self.stats = {"created": 0, "discarded": 0, "checkouts": 0}
+
+        # Ninguna conexión se abre aquí: la primera consulta conecta bajo demanda
+        # y el hilo de fondo completa `minconn` sin bloquear el arranque
+        self._health_thread = threading.Thread(target=self._health_loop, name="kaiken-db-health", daemon=True)
+        self._health_thread.start()
+
+    def _connect(self):
+        conn = psycopg2.connect(connection_factory=KaikenConnection, **self._dsn)
+        with self._cond:
+            self.stats["created"] += 1
+        return conn
+
+    def _discard(self, conn):
+        """Cierra una conexión y libera su cupo (llamar con el lock tomado)."""
+        self._size -= 1
+        self.stats["discarded"] += 1
+        try:
+            conn.close()
+        except psycopg2.Error:
+            pass
+
+    def getconn(self, timeout=POOL_CHECKOUT_TIMEOUT):
+        """Presta una conexión; espera si el pool está en su tamaño máximo."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise psycopg2.InterfaceError("El pool de conexiones está cerrado.")
+                while self._idle:
+                    conn = self._idle.pop()
+                    if conn.closed:
+                        self._discard(conn)
+                        continue
+                    self.stats["checkouts"] += 1
+                    return conn
+                if self._size < self.maxconn:
+                    # Reservamos el cupo y conectamos fuera del lock
+                    self._size += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolTimeout(f"No hay conexiones libres tras {timeout} s (máximo {self.maxconn}).")
+                self._cond.wait(remaining)
+        try:
+            conn = self._connect()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self.stats["checkouts"] += 1
+        return conn
+
+    def putconn(self, conn, discard=False):
+        """Devuelve una conexión al pool, dejando su sesión limpia."""
+        if not discard and not conn.closed:
+            try:
+                if conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            except psycopg2.Error:
+                discard = True
+        with self._cond:
+            if discard or conn.closed or self._closed:
+                self._discard(conn)
+            else:
+                self._idle.append(conn)
+            self._cond.notify()
+
+    def usage(self):
+        """Conexiones abiertas y ociosas en este momento."""
+        with self._cond:
+            return {"size": self._size, "idle": len(self._idle)}
+
+    def _health_loop(self):
+        while not self._closed:
+            self.check_idle()
+            time.sleep(self.health_interval)
+
+    def check_idle(self):
+        """Verifica las conexiones ociosas con un ping y repone hasta `minconn`."""
+        with self._cond:
+            to_check = list(self._idle)
+            self._idle.clear()
+        healthy = []
+        for conn in to_check:
+            try:
+                with conn.cursor() as cursor:
+                    cursor.execute("SELECT 1")
+                conn.rollback()
+                healthy.append(conn)
+            except psycopg2.Error:
+                with self._cond:
+                    self._discard(conn)
+        with self._cond:
+            self._idle.extend(healthy)
+            missing = 0 if self._closed else max(self.minconn - self._size, 0)
+            self._size += missing
+        for _ in range(missing):
+            try:
+                conn = self._connect()
+            except psycopg2.OperationalError:
+                with self._cond:
+                    self._size -= 1
+                continue
+            with self._cond:
+                self._idle.append(conn)
+        with self._cond:
+            self._cond.notify_all()
+
+    def closeall(self):
+        with self._cond:
+            self._closed = True
+            while self._idle:
+                self._discard(self._idle.pop())
+            self._cond.notify_all()
+
+
+def secrets_section(name):
+    """Sección `[name]` de secrets.toml; vacía si no hay archivo de secretos (scripts, benchmarks)."""
+    try:
+        return dict(st.secrets.get(name, {}))
+    except FileNotFoundError:
+        return {}
+
+
+def database_config(dsn=None):
+    """
+    Parámetros de conexión: `dsn` explícito, variable de entorno
+    KAIKEN_DATABASE_URL o la sección [database] de .streamlit/secrets.toml.
+    """
+    dsn = dsn or os.environ.get("KAIKEN_DATABASE_URL")
+    if dsn:
+        return {"dsn": dsn}
+    return dict(st.secrets["database"])
+
+
+def connect(dsn=None):
+    """Conexión directa (sin pool) para scripts y comandos de línea."""
+    return psycopg2.connect(connection_factory=KaikenConnection, **database_config(dsn))
+
+
+@st.cache_resource
+def init_pool():
+    """Inicializa y cachea el pool de conexiones (compartido por todas las sesiones)."""
+    global _pool
+    pool_cfg = secrets_section("pool")
+    _pool = ConnectionPool(
+        int(pool_cfg.get("min_conn", POOL_MIN_CONN)),
+        int(pool_cfg.get("max_conn", POOL_MAX_CONN)),
+        health_interval=int(pool_cfg.get("health_interval", POOL_HEALTH_INTERVAL)),
+        **database_config(),
+    )
+    return _pool
+
+
+def started_pool():
+    """El pool si alguna consulta ya lo creó, sin crearlo (None al correr sin base de datos)."""
+    return _pool
+
+
+@contextmanager
+def connection():
+    """Presta una conexión del pool durante el bloque `with`."""
+    pool = init_pool()
+    with METRICS.timer("kaiken_pool_wait_seconds"):
+        conn = pool.getconn()
+    broken = False
+    try:
+        yield conn
+    except (psycopg2.InterfaceError, psycopg2.OperationalError):
+        broken = True
+        raise
+    finally:
+        pool.putconn(conn, discard=broken or conn.closed)
+
+
+@st.cache_resource
+def init_query_cache():
+    """Cache de consultas del proceso, compartido por todas las sesiones."""
+    cache_cfg = secrets_section("cache")
+    cache = TableVersionedCache(**{k: int(v) for k, v in cache_cfg.items() if k in ("max_entries", "max_bytes", "ttl")})
+    if cache_cfg.get("listen", False):
+        start_notify_listener(cache, database_config())
+    return cache
+
+
+def invalidate(*tables):
+    """Invalida las consultas cacheadas que leen alguna de `tables`."""
+    init_query_cache().bump(*tables)
+
+
+@contextmanager
+def transaction(invalidates=()):
+    """
+    Conexión con transacción propia: COMMIT al salir, ROLLBACK si hay error.
+    Tras un COMMIT exitoso se invalidan las tablas indicadas en `invalidates`.
+    """
+    with connection() as conn:
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            if not conn.closed:
+                conn.rollback()
+            raise
+    if invalidates:
+        invalidate(*invalidates)
+
+
+def prepare_enabled():
+    """Indica si las consultas registradas se preparan con PREPARE/EXECUTE."""
+    return bool(secrets_section("pool").get("prepare_statements", True))
+
+
+def cached_query(key, tables, fetch, label="sql"):
+    """
+    Devuelve el resultado cacheado bajo `key` o lo calcula con `fetch()`.
+    La entrada depende de `tables` y se invalida cuando alguna cambia.
+    `label` identifica la consulta en las métricas (kaiken/metrics.py).
+    """
+    cache = init_query_cache()
+    tables = frozenset(tables)
+    hit, df = cache.get(key)
+    METRICS.inc("kaiken_cache_requests_total", query=label, result="hit" if hit else "miss")
+    if not hit:
+        versions = cache.versions_for(tables)
+        df = timed_fetch(label, fetch)
+        cache.put(key, df, tables, versions)
+    # Copia para que los cambios de una página no alteren el valor cacheado
+    # (los demás valores, como el índice de kaiken/catalog.py, son de sólo lectura)
+    return df.copy() if isinstance(df, pd.DataFrame) else df
+
+
+def timed_fetch(label, fetch):
+    """Ejecuta `fetch()` registrando tiempo, filas y memoria del resultado."""
+    with METRICS.timer("kaiken_query_seconds", query=label):
+        df = fetch()
+    METRICS.observe("kaiken_query_rows", len(df), query=label)
+    METRICS.observe("kaiken_query_bytes", frame_size(df), query=label)
+    return df
@@ -0,0 +1,213 @@
+"""
+Exportación de licitaciones con sus líneas y márgenes a CSV, Parquet o XLSX.
+
+Nada se materializa completo en memoria, así que el consumo no depende del
+tamaño del rango exportado:
+
+  * CSV: Postgres escribe el archivo con `COPY (...) TO STDOUT WITH (HEADER)`
+    directo al disco, sin pasar por Python fila a fila.
+  * Parquet: el mismo COPY se parsea con Arrow por bloques (kaiken/bulk.py) y
+    cada bloque se escribe como un row group.
+  * XLSX: los bloques de Arrow se escriben fila a fila con XlsxWriter en modo
+    `constant_memory`; al pasar el límite de filas de Excel se abre otra hoja.
+
+El dinero se exporta como decimal exacto. Los archivos se escriben en
+`.cache/exports/` (o en la ruta indicada) y se renombran al terminar.
+
+Uso:
+    python -m kaiken.export --formato csv --desde 2024-01-01 --hasta 2024-12-31
+    python -m kaiken.export --formato xlsx --salida licitaciones.xlsx
+"""
+import argparse
+import os
+import sys
+import time
+import uuid
+from datetime import date
+from pathlib import Path
+
+from kaiken.db import secrets_section
+from kaiken.metrics import METRICS
+
+EXPORT_DIR = Path(".cache") / "exports"
+EXPORT_TTL = 24 * 3600              # segundos que se conservan las exportaciones de la interfaz
+EXPORT_MAX_DOWNLOAD_MB = 200        # sobre esto la interfaz indica usar la línea de comandos
+XLSX_MAX_ROWS = 1_048_576           # límite de filas por hoja de Excel (incluida la cabecera)
+
+FORMATS = {
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+# Todas las licitaciones del rango, con sus líneas (las que no tienen órdenes
+# aparecen una vez con las columnas de línea vacías)
+EXPORT_QUERY = """
+    SELECT t.id AS "ID Licitación", c.nom_cli AS "Cliente", c.rut_cli AS "RUT Cliente",
+           t.creation_date AS "Fecha Creación", t.delivery_date AS "Fecha Entrega",
+           ovm.product_id AS "SKU", ovm.product_name AS "Producto", ovm.quantity AS "Cantidad",
+           ovm.sale_price AS "Precio Venta", ovm.cost_price AS "Costo",
+           ovm.sale_price * ovm.quantity AS "Ingreso", ovm.total_margin AS "Margen Producto"
+    FROM public.tenders t
+    JOIN public.clientes c ON c.id_cli = t.id_cli
+    LEFT JOIN public.order_details_with_margin ovm ON ovm.tender_id = t.id
+    WHERE (%(desde)s::date IS NULL OR t.creation_date >= %(desde)s::date)
+      AND (%(hasta)s::date IS NULL OR t.creation_date <= %(hasta)s::date)
+    ORDER BY t.creation_date, t.id, ovm.product_name
+"""
+
+EXPORT_SCHEMA = {
+    "ID Licitación": "string",
+    "Cliente": "string",
+    "RUT Cliente": "string",
+    "Fecha Creación": "date",
+    "Fecha Entrega": "date",
+    "SKU": "string",
+    "Producto": "string",
+    "Cantidad": "int64",
+    "Precio Venta": "decimal",
+    "Costo": "decimal",
+    "Ingreso": "decimal",
+    "Margen Producto": "decimal",
+}
+
+
+def export_settings():
+    cfg = secrets_section("export")
+    return {
+        "dir": Path(cfg.get("dir", EXPORT_DIR)),
+        "max_download_mb": float(cfg.get("max_download_mb", EXPORT_MAX_DOWNLOAD_MB)),
+    }
+
+
+# --- ESCRITORES ---
+
+def write_csv(conn, path, params, progress=None):
+    from kaiken.bulk import copy_sql
+
+    sql = copy_sql(conn, EXPORT_QUERY, EXPORT_SCHEMA, params, header=True)
+    with open(path, "wb") as sink, conn.cursor() as cursor:
+        cursor.copy_expert(sql, sink)
+        rows = cursor.rowcount
+    if progress:
+        progress(rows)
+    return rows
+
+
+def write_parquet(conn, path, params, progress=None):
+    import pyarrow.parquet as pq
+    from kaiken.bulk import arrow_schema, copy_batches
+
+    rows = 0
+    with pq.ParquetWriter(path, arrow_schema(EXPORT_SCHEMA), compression="zstd") as writer:
+        for batch in copy_batches(conn, EXPORT_QUERY, EXPORT_SCHEMA, params):
+            writer.write_batch(batch)
+            rows += batch.num_rows
+            if progress:
+                progress(rows)
+    return rows
+
+
+def write_xlsx(conn, path, params, progress=None):
+    import xlsxwriter
+    from kaiken.bulk import copy_batches
+
+    header = list(EXPORT_SCHEMA)
+    rows = 0
+    workbook = xlsxwriter.Workbook(path, {"constant_memory": True, "default_date_format": "yyyy-mm-dd"})
+    try:
+        money = workbook.add_format({"num_format": "#,##0.00"})
+
+        def new_sheet(number):
+            sheet = workbook.add_worksheet("Licitaciones" if number == 1 else f"Licitaciones {number}")
+            sheet.write_row(0, 0, header)
+            for col, kind in enumerate(EXPORT_SCHEMA.values()):
+                if kind == "decimal":
+                    sheet.set_column(col, col, 14, money)
+            sheet.freeze_panes(1, 0)
+            return sheet
+
+        sheets, line = 1, 1
+        sheet = new_sheet(sheets)
+        for batch in copy_batches(conn, EXPORT_QUERY, EXPORT_SCHEMA, params):
+            columns = [column.to_pylist() for column in batch.columns]
+            for values in zip(*columns):
+                if line == XLSX_MAX_ROWS:
+                    sheets, line = sheets + 1, 1
+                    sheet = new_sheet(sheets)
+                sheet.write_row(line, 0, values)
+                line += 1
+            rows += batch.num_rows
+            if progress:
+                progress(rows)
+    finally:
+        workbook.close()
+    return rows
+
+
+WRITERS = {"csv": write_csv, "parquet": write_parquet, "xlsx": write_xlsx}
+
+
+def export_tenders(conn, path, fmt, desde=None, hasta=None, progress=None):
+    """
+    Escribe en `path` las licitaciones creadas entre `desde` y `hasta` (ambos
+    opcionales e inclusivos) con sus líneas. `progress(filas)` se llama después
+    de cada bloque. Devuelve `{"filas", "bytes", "segundos"}`.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.tmp")
+    params = {"desde": desde, "hasta": hasta}
+    t0 = time.perf_counter()
+    try:
+        with METRICS.timer("kaiken_export_seconds", format=fmt):
+            rows = WRITERS[fmt](conn, tmp, params, progress)
+        os.replace(tmp, path)
+    finally:
+        if not conn.closed:     # un COPY cortado cierra la conexión (kaiken/bulk.py)
+            conn.rollback()
+        tmp.unlink(missing_ok=True)
+    METRICS.observe("kaiken_export_rows", rows, format=fmt)
+    return {"filas": rows, "bytes": path.stat().st_size, "segundos": time.perf_counter() - t0}
+
+
+def export_path(fmt, desde=None, hasta=None, directory=EXPORT_DIR):
+    """Ruta única para una exportación de la interfaz (varias sesiones pueden exportar a la vez)."""
+    rango = f"{desde or 'inicio'}_{hasta or 'fin'}"
+    return Path(directory) / f"licitaciones_{rango}_{uuid.uuid4().hex[:8]}.{fmt}"
+
+
+def purge_exports(directory=EXPORT_DIR, max_age=EXPORT_TTL):
+    """Borra las exportaciones de la interfaz con más de `max_age` segundos."""
+    limit = time.time() - max_age
+    for path in Path(directory).glob("licitaciones_*"):
+        if path.stat().st_mtime < limit:
+            path.unlink(missing_ok=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Exporta licitaciones con sus líneas y márgenes.")
+    parser.add_argument("--formato", choices=list(FORMATS), default="csv")
+    parser.add_argument("--desde", type=date.fromisoformat, help="Fecha de creación mínima (AAAA-MM-DD)")
+    parser.add_argument("--hasta", type=date.fromisoformat, help="Fecha de creación máxima (AAAA-MM-DD)")
+    parser.add_argument("--salida", help="Archivo de salida (por defecto en .cache/exports/)")
+    parser.add_argument("--dsn", help="Cadena de conexión (por defecto KAIKEN_DATABASE_URL o secrets.toml)")
+    args = parser.parse_args(argv)
+
+    from kaiken.db import connect
+
+    path = Path(args.salida) if args.salida else export_path(args.formato, args.desde, args.hasta)
+    conn = connect(args.dsn)
+    try:
+        result = export_tenders(
+            conn, path, args.formato, args.desde, args.hasta,
+            progress=lambda rows: print(f"\r{rows:,} filas", end="", file=sys.stderr),
+        )
+    finally:
+        conn.close()
+    print(f"\r✅ {result['filas']:,} filas en {path} ({result['bytes'] / 2**20:.1f} MB, {result['segundos']:.1f} s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
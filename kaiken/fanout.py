@@ -0,0 +1,90 @@
+"""
+Carga concurrente de las consultas independientes de una página.
+
+La página declara de una vez sus dependencias de datos como `{nombre: callable}`
+y `gather` las ejecuta en paralelo sobre un pool de hilos, cada una con su propia
+conexión prestada del pool de kaiken/db.py. La latencia de la página pasa a ser
+la de la consulta más lenta y no la suma de todas.
+
+    data = gather({
+        "clientes": partial(run_query, "clientes_opciones"),
+        "productos": partial(run_query, "productos_listado"),
+    })
+
+El pool de hilos es uno por proceso y lo comparten todas las sesiones. Tiene
+`max_conn - FANOUT_RESERVED_CONN` hilos (ver `[pool] max_conn`): las tareas de
+todas las sesiones usan a la vez como máximo esas conexiones, y las consultas
+que las páginas hacen directamente en su propio hilo siempre encuentran una
+libre. Con más sesiones cargando a la vez que hilos, las tareas esperan su turno
+en la cola del pool; para atender más sesiones en paralelo hay que subir
+`max_conn` (y el límite de conexiones de la base), no sólo los hilos.
+
+Una tarea que vuelva a llamar a `gather` ejecuta sus callables en su propio
+hilo, uno tras otro: si esperara hilos del mismo pool, con suficientes sesiones
+todos los hilos quedarían ocupados esperándose entre sí.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+from streamlit.runtime.scriptrunner_utils.script_run_context import SCRIPT_RUN_CONTEXT_ATTR_NAME
+
+from kaiken.db import POOL_MAX_CONN, secrets_section
+
+# Conexiones del pool que no usan las tareas, para las consultas hechas fuera de `gather`
+FANOUT_RESERVED_CONN = 1
+
+# Marca los hilos del pool mientras ejecutan una tarea
+_local = threading.local()
+
+
+@st.cache_resource
+def init_executor():
+    """Pool de hilos del proceso, compartido por todas las sesiones."""
+    # Se lee la configuración en lugar de crear el pool: en modo sin base no hay pool
+    max_conn = int(secrets_section("pool").get("max_conn", POOL_MAX_CONN))
+    workers = max(1, max_conn - FANOUT_RESERVED_CONN)
+    return ThreadPoolExecutor(max_workers=workers, thread_name_prefix="kaiken-fanout")
+
+
+def _attach(ctx):
+    """Asocia `ctx` al hilo actual; con None lo desasocia (`add_script_run_ctx` ignora None)."""
+    if ctx is not None:
+        add_script_run_ctx(ctx=ctx)
+    else:
+        setattr(threading.current_thread(), SCRIPT_RUN_CONTEXT_ATTR_NAME, None)
+
+
+def gather(calls):
+    """
+    Ejecuta en paralelo los callables de `calls` y devuelve `{nombre: resultado}`.
+    Espera a que terminen todos; si alguno falla, relanza el primer error.
+    Llamado desde una tarea de otro `gather`, los ejecuta en el mismo hilo.
+    """
+    if len(calls) <= 1 or getattr(_local, "in_task", False):
+        return {name: call() for name, call in calls.items()}
+
+    executor = init_executor()
+    # Los hilos heredan el contexto de la sesión para poder usar st.secrets y los caches
+    ctx = get_script_run_ctx(suppress_warning=True)
+
+    def run(call):
+        # Los hilos son compartidos: se restaura el contexto anterior para que
+        # una tarea sin sesión (bench, CLI) no corra con el de otra sesión
+        thread = threading.current_thread()
+        previous = getattr(thread, SCRIPT_RUN_CONTEXT_ATTR_NAME, None)
+        _attach(ctx)
+        _local.in_task = True
+        try:
+            return call()
+        finally:
+            _local.in_task = False
+            setattr(thread, SCRIPT_RUN_CONTEXT_ATTR_NAME, previous)
+
+    futures = {name: executor.submit(run, call) for name, call in calls.items()}
+    errors = [future.exception() for future in futures.values()]
+    for error in errors:
+        if error is not None:
+            raise error
+    return {name: future.result() for name, future in futures.items()}
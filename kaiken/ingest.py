@@ -0,0 +1,319 @@
+"""
+Ingesta de archivos fuente (CSV / JSON Lines) hacia PostgreSQL.
+
+Aplica las mismas reglas de limpieza del notebook `scripts/01.Datos de Muestra.ipynb`,
+pero en forma vectorizada y por bloques (chunks), de modo que la memoria queda
+acotada por el tamaño del bloque y no por el del archivo:
+
+  * products: título en mayúsculas, costo a número, stock inicial 0, renombre de columnas.
+  * tenders:  nombre de cliente -> id_cli.
+  * orders:   tender_id re-hifenado (referencia o heurístico "-LE") e id = tender_id + '-' + product_id.
+
+Las claves foráneas se resuelven con índices hash en memoria (cliente -> id_cli,
+tender_id sin guiones -> tenders.id, SKU -> costo) y cada bloque se carga con
+COPY a una tabla temporal y luego se hace upsert sobre la tabla final.
+
+Uso:
+    python -m kaiken.ingest --products scripts/data/product_sample.csv \\
+                            --tenders scripts/data/tender_sample.csv \\
+                            --orders scripts/data/order_sample.csv
+"""
+import argparse
+import io
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+from kaiken.db import connect
+from kaiken.rut import validar_ruts
+
+CHUNK_SIZE = 100_000
+
+# Columnas de destino (mismo orden que el DDL de sql/01.Crea tablas.sql)
+COLUMNS = {
+    "clientes": ["id_cli", "rut_cli", "nom_cli", "dir_cli", "tel_cli", "cor_cli", "con_cli"],
+    "products": ["sku_pro", "row_number", "nom_pro", "desc_pro", "cost_prp", "stock", "cre_pro", "upd_pro"],
+    "tenders":  ["id", "row_number", "id_cli", "creation_date", "delivery_date", "margin"],
+    "orders":   ["id", "row_number", "tender_id", "product_id", "quantity", "price", "observation"],
+}
+PRIMARY_KEYS = {"clientes": "id_cli", "products": "sku_pro", "tenders": "id", "orders": "id"}
+# Columnas que NO se sobrescriben al actualizar un registro existente
+KEEP_ON_UPDATE = {"products": {"stock"}}
+
+PRODUCT_RENAME = {
+    "sku": "sku_pro",
+    "title": "nom_pro",
+    "description": "desc_pro",
+    "cost": "cost_prp",
+    "created_at": "cre_pro",
+    "updated_at": "upd_pro",
+}
+
+
+# --- REGLAS DE LIMPIEZA (VECTORIZADAS) ---
+
+def parse_float(values):
+    """Versión vectorizada de `parse_float` del notebook (comas/puntos, símbolos)."""
+    s = values.astype("string").str.strip().str.replace(r"[^0-9,.\-]", "", regex=True)
+    has_comma = s.str.contains(",", regex=False, na=False)
+    has_dot = s.str.contains(".", regex=False, na=False)
+    # "." como miles y "," como decimal -> quitar puntos
+    s = s.mask(has_comma & has_dot, s.str.replace(".", "", regex=False))
+    # la coma (si queda) es el separador decimal
+    s = s.mask(has_comma, s.str.replace(",", ".", regex=False))
+    return pd.to_numeric(s, errors="coerce").astype("Float64")
+
+
+def client_key(names):
+    """Clave de unión de clientes: sin espacios extremos y en mayúsculas."""
+    return names.astype("string").str.strip().str.upper()
+
+
+def strip_hyphens(ids):
+    return ids.astype("string").str.strip().str.replace("-", "", regex=False)
+
+
+def heuristico_hifenar(ids):
+    """Inserta '-' antes de 'LE' en los ID que no tienen guiones (vectorizado)."""
+    ids = ids.astype("string").str.strip()
+    hyphenated = ids.str.replace(r"^(.*?)(LE)(\d{2})(.*)$", r"\1-\2\3\4", regex=True)
+    return ids.where(ids.str.contains("-", regex=False, na=False), hyphenated)
+
+
+def clean_products(df):
+    df = df.rename(columns=PRODUCT_RENAME)
+    df["sku_pro"] = df["sku_pro"].astype("string").str.strip()
+    df["nom_pro"] = df["nom_pro"].astype("string").str.upper()
+    df["cost_prp"] = parse_float(df["cost_prp"])
+    if "stock" not in df.columns:
+        df["stock"] = 0
+    df["stock"] = pd.to_numeric(df["stock"], errors="coerce").astype("Int64")
+    return df.reindex(columns=COLUMNS["products"])
+
+
+def clean_orders(df, tender_index):
+    """Normaliza tender_id con el índice `{id sin guiones: id}` y reconstruye el id."""
+    tender_id = df["tender_id"].astype("string").str.strip()
+    ref = strip_hyphens(tender_id).map(tender_index).astype("string")
+    df["tender_id"] = ref.fillna(heuristico_hifenar(tender_id))
+    df["product_id"] = df["product_id"].astype("string").str.strip()
+    df["id"] = df["tender_id"] + "-" + df["product_id"]
+    df["quantity"] = pd.to_numeric(df["quantity"], errors="coerce").astype("Int64")
+    df["price"] = parse_float(df["price"])
+    return df.reindex(columns=COLUMNS["orders"])
+
+
+# --- ÍNDICES EN MEMORIA PARA CLAVES FORÁNEAS ---
+
+class ForeignKeyIndex:
+    """Índices hash para resolver claves foráneas sin hacer merges de DataFrames completos."""
+
+    def __init__(self, conn):
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT id_cli, nom_cli FROM public.clientes;")
+            self.clients = {}
+            for id_cli, nom_cli in cursor:
+                if nom_cli is not None:
+                    self.clients.setdefault(nom_cli.strip().upper(), id_cli)
+            cursor.execute("SELECT COALESCE(MAX(id_cli), 0) FROM public.clientes;")
+            self.next_client_id = cursor.fetchone()[0] + 1
+            cursor.execute("SELECT id FROM public.tenders;")
+            self.tenders = {tid.replace("-", ""): tid for (tid,) in cursor}
+            cursor.execute("SELECT sku_pro, cost_prp FROM public.products;")
+            self.products = {sku: float(cost) if cost is not None else None for sku, cost in cursor}
+
+    def add_products(self, df):
+        self.products.update(zip(df["sku_pro"], df["cost_prp"].astype(object).where(df["cost_prp"].notna(), None)))
+
+    def add_tenders(self, df):
+        self.tenders.update(zip(strip_hyphens(df["id"]), df["id"]))
+
+    def new_clients(self, df):
+        """
+        Asigna id_cli a los clientes de `df` que no existen y los devuelve como
+        DataFrame. Los que no traen un RUT válido no se crean (la restricción
+        chk_rut_valido rechazaría el bloque completo): sus licitaciones quedan
+        sin id_cli y se cuentan como rechazadas.
+        """
+        keys = client_key(df["client"])
+        unknown = ~keys.isin(self.clients.keys()) & keys.notna()
+        nuevos = df.loc[unknown].assign(_key=keys[unknown]).drop_duplicates("_key")
+        ruts = nuevos.get("rut_cli", pd.Series(pd.NA, index=nuevos.index, dtype=object))
+        nuevos = nuevos[validar_ruts(ruts.astype(object))]
+        if nuevos.empty:
+            return pd.DataFrame(columns=COLUMNS["clientes"])
+        ids = range(self.next_client_id, self.next_client_id + len(nuevos))
+        self.next_client_id += len(nuevos)
+        self.clients.update(zip(nuevos["_key"], ids))
+        return pd.DataFrame({
+            "id_cli": list(ids),
+            "rut_cli": nuevos["rut_cli"].values,
+            "nom_cli": nuevos["client"].astype("string").str.strip().values,
+            "dir_cli": nuevos.get("delivery_address", pd.Series(pd.NA, index=nuevos.index)).values,
+            "tel_cli": nuevos.get("contact_phone", pd.Series(pd.NA, index=nuevos.index)).values,
+            "cor_cli": nuevos.get("contact_email", pd.Series(pd.NA, index=nuevos.index)).values,
+            "con_cli": pd.NA,
+        })
+
+
+# --- CARGA: COPY A STAGING + UPSERT ---
+
+def copy_upsert(conn, table, df):
+    """Carga `df` con COPY en una tabla temporal y hace upsert sobre `public.<table>`."""
+    if df.empty:
+        return 0
+    columns = COLUMNS[table]
+    pk = PRIMARY_KEYS[table]
+    staging = f"stg_{table}"
+    # Dentro del bloque puede venir la misma PK repetida: gana la última
+    df = df.drop_duplicates(subset=[pk], keep="last")
+
+    buf = io.StringIO()
+    df[columns].to_csv(buf, index=False, header=False, na_rep="")
+    buf.seek(0)
+
+    updates = [c for c in columns if c != pk and c not in KEEP_ON_UPDATE.get(table, set())]
+    with conn.cursor() as cursor:
+        cursor.execute(f"CREATE TEMP TABLE IF NOT EXISTS {staging} (LIKE public.{table} INCLUDING DEFAULTS) ON COMMIT DELETE ROWS;")
+        cursor.copy_expert(f"COPY {staging} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buf)
+        cursor.execute(f"""
+            INSERT INTO public.{table} ({', '.join(columns)})
+            SELECT {', '.join(columns)} FROM {staging}
+            ON CONFLICT ({pk}) DO UPDATE
+            SET {', '.join(f'{c} = EXCLUDED.{c}' for c in updates)};
+        """)
+    conn.commit()
+    return len(df)
+
+
+# --- LECTURA POR BLOQUES ---
+
+def read_chunks(path, chunk_size=CHUNK_SIZE):
+    """Itera el archivo fuente por bloques: CSV separado por ';' o JSON Lines."""
+    path = Path(path)
+    if path.suffix.lower() in (".jsonl", ".ndjson"):
+        for chunk in pd.read_json(path, lines=True, chunksize=chunk_size, dtype=False):
+            yield chunk.astype("string")
+    elif path.suffix.lower() == ".json":
+        # Un arreglo JSON no se puede leer por bloques con pandas: se normaliza completo
+        data = pd.read_json(path, dtype=False).astype("string")
+        for start in range(0, len(data), chunk_size):
+            yield data.iloc[start:start + chunk_size]
+    else:
+        yield from pd.read_csv(path, sep=";", dtype="string", keep_default_na=True, chunksize=chunk_size)
+
+
+# --- PIPELINE ---
+
+def ingest_clientes(conn, path, chunk_size=CHUNK_SIZE, index=None):
+    total = rejected = 0
+    for chunk in read_chunks(path, chunk_size):
+        chunk = chunk.reindex(columns=COLUMNS["clientes"])
+        chunk["id_cli"] = pd.to_numeric(chunk["id_cli"], errors="coerce").astype("Int64")
+        # Se descartan antes los RUT que rechazaría la restricción chk_rut_valido
+        valid = chunk["id_cli"].notna().to_numpy() & validar_ruts(chunk["rut_cli"].astype(object))
+        rejected += int((~valid).sum())
+        chunk = chunk[valid]
+        total += copy_upsert(conn, "clientes", chunk)
+        if index is not None:
+            index.clients.update(zip(client_key(chunk["nom_cli"]), chunk["id_cli"]))
+            max_id = chunk["id_cli"].max()
+            if not pd.isna(max_id):
+                index.next_client_id = max(index.next_client_id, int(max_id) + 1)
+    return {"tabla": "clientes", "cargadas": total, "rechazadas": rejected}
+
+
+def ingest_products(conn, path, index, chunk_size=CHUNK_SIZE):
+    total = rejected = 0
+    for chunk in read_chunks(path, chunk_size):
+        chunk = clean_products(chunk)
+        valid = chunk["sku_pro"].notna() & (chunk["sku_pro"] != "")
+        rejected += int((~valid).sum())
+        chunk = chunk[valid]
+        total += copy_upsert(conn, "products", chunk)
+        index.add_products(chunk)
+    return {"tabla": "products", "cargadas": total, "rechazadas": rejected}
+
+
+def ingest_tenders(conn, path, index, chunk_size=CHUNK_SIZE, crear_clientes=False):
+    total = rejected = 0
+    for chunk in read_chunks(path, chunk_size):
+        if "id_cli" not in chunk.columns:
+            if crear_clientes:
+                copy_upsert(conn, "clientes", index.new_clients(chunk))
+            chunk["id_cli"] = client_key(chunk["client"]).map(index.clients)
+        chunk["id"] = chunk["id"].astype("string").str.strip()
+        chunk["id_cli"] = pd.to_numeric(chunk["id_cli"], errors="coerce").astype("Int64")
+        chunk = chunk.reindex(columns=COLUMNS["tenders"])
+        valid = chunk["id"].notna() & chunk["id_cli"].notna()
+        rejected += int((~valid).sum())
+        chunk = chunk[valid]
+        total += copy_upsert(conn, "tenders", chunk)
+        index.add_tenders(chunk)
+    return {"tabla": "tenders", "cargadas": total, "rechazadas": rejected}
+
+
+def ingest_orders(conn, path, index, chunk_size=CHUNK_SIZE):
+    total = rejected = 0
+    known_tenders = set(index.tenders.values())
+    for chunk in read_chunks(path, chunk_size):
+        chunk = clean_orders(chunk, index.tenders)
+        cost = chunk["product_id"].map(index.products).astype("Float64")
+        # Integridad referencial y regla de negocio (precio > costo) antes de llegar a la base
+        valid = (
+            chunk["tender_id"].isin(known_tenders)
+            & chunk["product_id"].isin(index.products.keys())
+            & ((chunk["price"] > cost) | cost.isna()).fillna(False)
+        )
+        rejected += int((~valid).sum())
+        total += copy_upsert(conn, "orders", chunk[valid])
+    return {"tabla": "orders", "cargadas": total, "rechazadas": rejected}
+
+
+def run(clientes=None, products=None, tenders=None, orders=None, dsn=None,
+        chunk_size=CHUNK_SIZE, crear_clientes=False):
+    """Ingesta en orden referencial (clientes, products, tenders, orders)."""
+    resumen = []
+    conn = connect(dsn)
+    try:
+        index = ForeignKeyIndex(conn)
+        conn.commit()
+        if clientes:
+            resumen.append(ingest_clientes(conn, clientes, chunk_size, index))
+        if products:
+            resumen.append(ingest_products(conn, products, index, chunk_size))
+        if tenders:
+            resumen.append(ingest_tenders(conn, tenders, index, chunk_size, crear_clientes))
+        if orders:
+            resumen.append(ingest_orders(conn, orders, index, chunk_size))
+    finally:
+        conn.close()
+    return resumen
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ingesta por bloques de archivos fuente hacia PostgreSQL.")
+    parser.add_argument("--clientes", help="CSV/JSONL de clientes (columnas del DDL)")
+    parser.add_argument("--products", help="CSV/JSONL de productos (crudo o limpio)")
+    parser.add_argument("--tenders", help="CSV/JSONL de licitaciones (con 'client' o 'id_cli')")
+    parser.add_argument("--orders", help="CSV/JSONL de órdenes")
+    parser.add_argument("--dsn", help="Cadena de conexión (por defecto KAIKEN_DATABASE_URL o secrets.toml)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--crear-clientes", action="store_true",
+                        help="Crea los clientes de las licitaciones que no existan en la base "
+                             "(sólo si el archivo trae una columna rut_cli con un RUT válido)")
+    args = parser.parse_args(argv)
+
+    if not any([args.clientes, args.products, args.tenders, args.orders]):
+        parser.error("Indica al menos un archivo a cargar.")
+
+    resumen = run(args.clientes, args.products, args.tenders, args.orders, dsn=args.dsn,
+                  chunk_size=args.chunk_size, crear_clientes=args.crear_clientes)
+    for r in resumen:
+        print(f"✅ {r['tabla']}: {r['cargadas']} filas cargadas, {r['rechazadas']} rechazadas")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
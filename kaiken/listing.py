@@ -0,0 +1,92 @@
+"""
+Listados paginados y editables para las páginas de gestión.
+
+Cada página se pide al servidor con LIMIT y paginación por keyset, y se muestra
+en un único `st.data_editor`; al guardar sólo viajan las filas modificadas.
+El costo de dibujar la página depende del tamaño de página, no de la tabla.
+
+Después de guardar, la página llama a `saved(key, mensaje)`: el mensaje se
+muestra en la ejecución siguiente y el editor se crea con una clave nueva, de
+modo que no arrastra las ediciones ya guardadas.
+"""
+from typing import NamedTuple
+
+import streamlit as st
+
+from kaiken.search import keyset_page, like_pattern
+
+LISTING_PAGE_SIZE = 50
+
+
+class Listing(NamedTuple):
+    query: str              # consulta registrada (y su variante `<query>_desde`)
+    cursor_columns: tuple   # columnas del ORDER BY, en orden
+    pk: str
+
+
+def cursor_stack(key, text):
+    """Pila de cursores de keyset de `key`; se reinicia cuando cambia el filtro."""
+    if st.session_state.get(f"{key}_filtro") != text:
+        st.session_state[f"{key}_filtro"] = text
+        st.session_state[f"{key}_cursores"] = [None]
+    return st.session_state[f"{key}_cursores"]
+
+
+def pager(key, cursors, next_cursor, n_rows, unidad="registros", locked=False):
+    """Botones Anterior / Siguiente sobre la pila de cursores; `locked` los deshabilita."""
+    nav_prev, nav_info, nav_next = st.columns([1, 2, 1])
+    if nav_prev.button("← Anterior", key=f"{key}_anterior", disabled=locked or len(cursors) == 1):
+        cursors.pop()
+        st.rerun()
+    nav_info.caption(f"Página {len(cursors)} · {n_rows} {unidad}")
+    if nav_next.button("Siguiente →", key=f"{key}_siguiente", disabled=locked or next_cursor is None):
+        cursors.append(next_cursor)
+        st.rerun()
+
+
+def saved(key, message):
+    """Registra un guardado del listado `key`: muestra `message` y reinicia el editor."""
+    st.session_state[f"{key}_guardado"] = message
+    st.session_state[f"{key}_version"] = st.session_state.get(f"{key}_version", 0) + 1
+    st.rerun()
+
+
+def paged_editor(key, listing, column_config=None, disabled=(), page_size=LISTING_PAGE_SIZE, search_label="Buscar:"):
+    """
+    Dibuja el buscador, la página actual en un `st.data_editor` y la navegación.
+    Devuelve `(df_pagina, cambios)`, donde `cambios` contiene sólo las filas
+    editadas (con su clave primaria y los valores nuevos).
+
+    Con ediciones sin guardar la navegación queda bloqueada: el editor de otra
+    página no las conservaría.
+    """
+    message = st.session_state.pop(f"{key}_guardado", None)
+    if message:
+        st.success(message)
+
+    text = st.text_input(search_label, "", key=f"{key}_buscar")
+    cursors = cursor_stack(key, text)
+    df, next_cursor = keyset_page(listing.query, like_pattern(text), cursors[-1], page_size, listing.cursor_columns)
+
+    if df.empty:
+        st.info("No hay registros que coincidan con la búsqueda.")
+        return df, df
+
+    version = st.session_state.get(f"{key}_version", 0)
+    editor_key = f"{key}_editor_{version}_{len(cursors)}_{text}"
+    edited = st.data_editor(
+        df, key=editor_key, hide_index=True, use_container_width=True,
+        disabled=[listing.pk, *disabled], column_config=column_config,
+        num_rows="fixed",
+    )
+    edited_rows = st.session_state.get(editor_key, {}).get("edited_rows", {})
+    if edited_rows:
+        warn, discard = st.columns([3, 1])
+        warn.warning("Hay cambios sin guardar en esta página: guárdalos o descártalos antes de cambiar de página.")
+        if discard.button("Descartar cambios", key=f"{key}_descartar"):
+            st.session_state[f"{key}_version"] = version + 1
+            st.rerun()
+    pager(key, cursors, next_cursor, len(df), locked=bool(edited_rows))
+
+    changed = edited.iloc[sorted(int(i) for i in edited_rows)] if edited_rows else edited.iloc[0:0]
+    return df, changed
@@ -0,0 +1,146 @@
+"""
+Métricas de la ruta caliente: consultas, cache, pool de conexiones y páginas.
+
+Los puntos de medición (kaiken/db.py, kaiken/queries.py y el ruteo de app.py)
+registran observaciones en `METRICS`; cada serie guarda conteo, suma y una
+ventana de las últimas observaciones para calcular percentiles. El contenido se
+exporta en formato de texto de Prometheus y como JSON Lines (ver kaiken/admin.py).
+
+Nombres de métricas:
+    kaiken_query_seconds{query}        tiempo de las consultas que llegan a la base
+    kaiken_query_rows{query}           filas devueltas
+    kaiken_query_bytes{query}          memoria del DataFrame resultante
+    kaiken_cache_requests_total{query,result="hit"|"miss"}
+    kaiken_pool_wait_seconds           espera para obtener una conexión del pool
+    kaiken_page_seconds{page}          render completo de cada página
+    kaiken_page_import_seconds{page}   primera importación del módulo de la página (kaiken/pages)
+    kaiken_section_seconds{page,section}  tramos de pandas/Plotly dentro de una página
+    kaiken_figure_bytes{chart}         tamaño del JSON de cada figura construida (kaiken/charts.py)
+    kaiken_export_seconds{format}      duración de cada exportación (kaiken/export.py)
+    kaiken_export_rows{format}         filas escritas por exportación
+"""
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+METRICS_WINDOW = 500            # observaciones recientes por serie, para percentiles
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class Serie:
+    __slots__ = ("count", "sum", "window")
+
+    def __init__(self, window):
+        self.count = 0
+        self.sum = 0.0
+        self.window = deque(maxlen=window)
+
+    def quantile(self, q):
+        if not self.window:
+            return math.nan
+        values = sorted(self.window)
+        return values[min(len(values) - 1, int(q * len(values)))]
+
+
+class Metrics:
+    """Registro thread-safe de contadores y resúmenes con etiquetas."""
+
+    def __init__(self, window=METRICS_WINDOW):
+        self.window = window
+        self._series = {}           # (nombre, etiquetas ordenadas) -> Serie
+        self._lock = threading.Lock()
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            serie = self._series.get(key)
+            if serie is None:
+                serie = self._series[key] = Serie(self.window)
+            serie.count += 1
+            serie.sum += value
+            serie.window.append(value)
+
+    def inc(self, name, amount=1, **labels):
+        """Contador: sólo importan `count` y `sum`."""
+        self.observe(name, amount, **labels)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - t0, **labels)
+
+    def snapshot(self):
+        """Lista de dicts `{name, labels, count, sum, p50, p95, p99}`, una por serie."""
+        with self._lock:
+            items = [(name, dict(labels), serie.count, serie.sum, [serie.quantile(q) for q in QUANTILES])
+                     for (name, labels), serie in self._series.items()]
+        return [
+            {"name": name, "labels": labels, "count": count, "sum": total,
+             **{f"p{int(q * 100)}": value for q, value in zip(QUANTILES, quantiles)}}
+            for name, labels, count, total, quantiles in sorted(items, key=lambda item: (item[0], sorted(item[1].items())))
+        ]
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+
+# Un solo registro por proceso: se consulta en cada consulta y cada página, así
+# que se evita el costo de `st.cache_resource` en la ruta caliente.
+METRICS = Metrics()
+
+
+# --- EXPORTACIÓN ---
+
+def _labels_text(labels):
+    if not labels:
+        return ""
+    def escape(value):
+        return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return "{" + ",".join(f'{k}="{escape(v)}"' for k, v in sorted(labels.items())) + "}"
+
+
+def _value_text(value):
+    """Valor de una muestra sin perder precisión (`:g` deja sólo 6 cifras)."""
+    value = float(value)
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return str(int(value)) if value.is_integer() and abs(value) < 1e15 else repr(value)
+
+
+def prometheus_text(series, gauges=()):
+    """
+    Formato de exposición de texto de Prometheus. Las series terminadas en
+    `_total` se exportan como counter y el resto como summary; `gauges` es una
+    lista de `(nombre, etiquetas, valor)`.
+    """
+    lines = []
+    declared = set()
+    for s in series:
+        name, labels = s["name"], s["labels"]
+        kind = "counter" if name.endswith("_total") else "summary"
+        if name not in declared:
+            lines.append(f"# TYPE {name} {kind}")
+            declared.add(name)
+        if kind == "counter":
+            lines.append(f"{name}{_labels_text(labels)} {_value_text(s['sum'])}")
+            continue
+        for q in QUANTILES:
+            value = s[f"p{int(q * 100)}"]
+            lines.append(f"{name}{_labels_text({**labels, 'quantile': q})} {_value_text(value)}")
+        lines.append(f"{name}_sum{_labels_text(labels)} {_value_text(s['sum'])}")
+        lines.append(f"{name}_count{_labels_text(labels)} {s['count']}")
+    for name, labels, value in gauges:
+        if name not in declared:
+            kind = "counter" if name.endswith("_total") else "gauge"
+            lines.append(f"# TYPE {name} {kind}")
+            declared.add(name)
+        lines.append(f"{name}{_labels_text(labels)} {_value_text(value)}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,71 @@
+"""
+Escritura de las líneas (órdenes) de una licitación.
+
+En lugar de borrar todas las órdenes y reinsertarlas una a una, se comparan las
+líneas editadas con las guardadas y sólo se aplican las diferencias: un único
+INSERT ... ON CONFLICT con todas las altas y modificaciones, y un único DELETE
+con las bajas. La validación de precio contra costo la hace un trigger a nivel
+de sentencia (sql/06.Validacion de Precios por Lote.sql).
+"""
+from psycopg2.extras import execute_values
+
+UPSERT_PAGE_SIZE = 1000
+
+
+def order_id(tender_id, sku):
+    """ID de la orden: tender_id + '-' + product_id."""
+    return f"{tender_id}-{sku}"
+
+
+def diff_order_lines(existing, edited):
+    """
+    Compara las líneas guardadas con las editadas.
+
+    `existing` es `{sku: (quantity, price)}` y `edited` una lista de dicts con
+    `sku`, `quantity` y `price`. Devuelve `(upserts, deletes)`: las líneas nuevas
+    o modificadas y los SKU que ya no forman parte de la licitación. Si un SKU
+    viene repetido en `edited` vale su última línea: el INSERT ... ON CONFLICT no
+    puede tocar dos veces la misma orden.
+    """
+    lines = {}
+    for line in edited:
+        lines[line['sku']] = int(line['quantity']), round(float(line['price']), 2)
+    upserts = []
+    for sku, (quantity, price) in lines.items():
+        current = existing.get(sku)
+        if current is None or int(current[0]) != quantity or round(float(current[1]), 2) != price:
+            upserts.append((sku, quantity, price))
+    deletes = [sku for sku in existing if sku not in lines]
+    return upserts, deletes
+
+
+def save_tender_orders(cursor, tender_id, edited):
+    """
+    Sincroniza las órdenes de `tender_id` con las líneas `edited` dentro de la
+    transacción del cursor. Devuelve `(n_upserts, n_deletes)`.
+    """
+    cursor.execute(
+        "SELECT product_id, quantity, price FROM public.orders WHERE tender_id = %s FOR UPDATE;",
+        (tender_id,),
+    )
+    existing = {sku: (quantity, price) for sku, quantity, price in cursor.fetchall()}
+    upserts, deletes = diff_order_lines(existing, edited)
+
+    if upserts:
+        execute_values(
+            cursor,
+            """
+            INSERT INTO public.orders (id, tender_id, product_id, quantity, price)
+            VALUES %s
+            ON CONFLICT (id) DO UPDATE
+            SET quantity = EXCLUDED.quantity, price = EXCLUDED.price;
+            """,
+            [(order_id(tender_id, sku), tender_id, sku, quantity, price) for sku, quantity, price in upserts],
+            page_size=UPSERT_PAGE_SIZE,
+        )
+    if deletes:
+        cursor.execute(
+            "DELETE FROM public.orders WHERE tender_id = %s AND product_id = ANY(%s);",
+            (tender_id, deletes),
+        )
+    return len(upserts), len(deletes)
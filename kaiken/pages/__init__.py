@@ -0,0 +1,36 @@
+"""
+Páginas de la aplicación, cargadas bajo demanda.
+
+Cada página es un módulo con una función `render()`. app.py sólo importa este
+registro: el módulo de la página (y con él Plotly, Arrow, etc.) se importa la
+primera vez que se visita, de modo que el arranque en frío y las páginas
+livianas no pagan por las dependencias de las demás.
+"""
+import importlib
+import sys
+import time
+
+from kaiken.metrics import METRICS
+
+PAGES = {
+    "Dashboard": "kaiken.pages.dashboard",
+    "Ver Licitaciones": "kaiken.pages.ver_licitaciones",
+    "Gestionar Licitaciones": "kaiken.pages.gestionar_licitacion",
+    "Gestionar Clientes": "kaiken.pages.gestionar_clientes",
+    "Gestionar Productos": "kaiken.pages.gestionar_productos",
+}
+
+
+def load(page):
+    """Importa el módulo de `page`; la primera importación queda en `kaiken_page_import_seconds`."""
+    name = PAGES[page]
+    module = sys.modules.get(name)
+    if module is None:
+        t0 = time.perf_counter()
+        module = importlib.import_module(name)
+        METRICS.observe("kaiken_page_import_seconds", time.perf_counter() - t0, page=page)
+    return module
+
+
+def render(page):
+    load(page).render()
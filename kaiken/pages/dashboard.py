@@ -0,0 +1,136 @@
+"""Dashboard de inteligencia de negocios: rentabilidad por cliente, Pareto y tendencias."""
+from functools import partial
+
+import pandas as pd
+import streamlit as st
+
+from kaiken import analytics, snapshot
+from kaiken.charts import cached_figure, chart_settings, clients_bubble, monthly_lines, top_bars
+from kaiken.analytics import analytics_enabled
+from kaiken.fanout import gather
+from kaiken.metrics import METRICS
+from kaiken.queries import run_query
+from kaiken.rollups import rollups_enabled
+from kaiken.snapshot import snapshot_enabled
+
+
+# --- CAPA DE DATOS DEL DASHBOARD (AGREGACIONES EN SQL) ---
+# Las agregaciones se resuelven en Postgres: el rango de fechas viaja como
+# parámetro y sólo vuelven los resultados ya agregados, no el detalle de órdenes.
+# El SQL de cada consulta está en el registro de kaiken/queries.py.
+
+# Con [analytics] enabled = true se calculan en DuckDB sobre los Parquet o CSV
+# exportados (kaiken/analytics.py), sin tocar Postgres; con [snapshot] enabled = true
+# sobre el snapshot Arrow compartido (kaiken/snapshot.py); con [rollups] enabled = true
+# los meses completos se leen de las tablas de rollup (kaiken/rollups.py).
+
+def load_dashboard_bounds():
+    """Devuelve la fecha mínima y máxima de creación de licitaciones con órdenes."""
+    if analytics_enabled():
+        return analytics.run_query("dashboard_bounds")
+    if snapshot_enabled():
+        return snapshot.dashboard_bounds()
+    return run_query("dashboard_bounds")
+
+def load_dashboard_clients(start_date, end_date):
+    """Margen, ingresos y N° de licitaciones por cliente dentro del rango."""
+    if analytics_enabled():
+        return analytics.run_query("dashboard_clients", start_date, end_date)
+    if snapshot_enabled():
+        return snapshot.dashboard_clients(start_date, end_date)
+    if rollups_enabled():
+        return run_query("dashboard_clients_rollup", start_date, end_date)
+    return run_query("dashboard_clients", start_date, end_date)
+
+def load_dashboard_top_products(start_date, end_date, limit=5):
+    """Top N productos por margen generado dentro del rango."""
+    if analytics_enabled():
+        return analytics.run_query("dashboard_top_products", start_date, end_date, limit)
+    if snapshot_enabled():
+        return snapshot.dashboard_top_products(start_date, end_date, limit)
+    if rollups_enabled():
+        return run_query("dashboard_top_products_rollup", start_date, end_date, limit)
+    return run_query("dashboard_top_products", start_date, end_date, limit)
+
+def load_dashboard_monthly(start_date, end_date):
+    """Serie mensual de ingresos y margen (los meses sin ventas quedan en 0)."""
+    if analytics_enabled():
+        return analytics.run_query("dashboard_monthly", start_date, end_date)
+    if snapshot_enabled():
+        return snapshot.dashboard_monthly(start_date, end_date)
+    if rollups_enabled():
+        return run_query("dashboard_monthly_rollup", start_date, end_date)
+    return run_query("dashboard_monthly", start_date, end_date)
+
+
+# --- PÁGINA ---
+
+def render():
+    st.title("📊 Dashboard de Inteligencia de Negocios")
+    
+    bounds = load_dashboard_bounds()
+    if bounds.empty or pd.isna(bounds.loc[0, 'min_date']):
+        st.warning("No hay datos suficientes para mostrar en el dashboard.")
+        return
+
+    min_date = pd.to_datetime(bounds.loc[0, 'min_date']).date()
+    max_date = pd.to_datetime(bounds.loc[0, 'max_date']).date()
+
+    st.header("Filtros Globales")
+    date_range = st.date_input(
+        "Selecciona un rango de fechas:",
+        value=(min_date, max_date),
+        min_value=min_date,
+        max_value=max_date
+    )
+    
+    start_date, end_date = min_date, max_date
+    if len(date_range) == 2:
+        start_date, end_date = date_range
+
+    data = gather({
+        "clientes": partial(load_dashboard_clients, start_date, end_date),
+        "productos": partial(load_dashboard_top_products, start_date, end_date, limit=5),
+        "mensual": partial(load_dashboard_monthly, start_date, end_date),
+    })
+    df_clients = data["clientes"]
+    chart_cfg = chart_settings()
+    if snapshot_enabled() and not analytics_enabled():
+        snapshot.stale_warning()
+    
+    if df_clients.empty:
+        st.warning("No hay datos en el rango de fechas seleccionado.")
+        return
+
+    st.markdown("---")
+    st.header("1. Análisis de Rentabilidad por Cliente")
+    st.info("**Decisión a tomar:** ¿Qué clientes nos generan más ganancias (margen) en relación a lo que compran (ingresos)?")
+
+    with METRICS.timer("kaiken_section_seconds", page="Dashboard", section="clientes"):
+        fig_bubble = cached_figure("clientes", clients_bubble, df_clients, top_n=chart_cfg["top_n"])
+        st.plotly_chart(fig_bubble, use_container_width=True)
+    
+    st.markdown("---")
+    st.header("2. Top 5 Clientes y Productos (Análisis Pareto)")
+    st.info("**Decisión a tomar:** ¿Dónde debemos enfocar nuestros esfuerzos comerciales (regla del 80/20)?")
+
+    col1, col2 = st.columns(2)
+    
+    with METRICS.timer("kaiken_section_seconds", page="Dashboard", section="pareto"):
+        fig_top_clients = cached_figure(
+            "top_clientes", top_bars, df_clients, x='nom_cli', y='total_margin', title="Top 5 Clientes por Margen Generado"
+        )
+        col1.plotly_chart(fig_top_clients, use_container_width=True)
+
+        fig_top_products = cached_figure(
+            "top_productos", top_bars, data["productos"], x='product_name', y='total_margin', title="Top 5 Productos por Margen Generado"
+        )
+        col2.plotly_chart(fig_top_products, use_container_width=True)
+
+    st.markdown("---")
+    st.header("3. Análisis de Tendencias")
+    st.info("**Decisión a tomar:** ¿Nuestros ingresos están creciendo o disminuyendo? ¿Hay meses de temporada alta?")
+
+    with METRICS.timer("kaiken_section_seconds", page="Dashboard", section="tendencias"):
+        fig_time = cached_figure("mensual", monthly_lines, data["mensual"], max_points=chart_cfg["max_series_points"])
+        st.plotly_chart(fig_time, use_container_width=True)
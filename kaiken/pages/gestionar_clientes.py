@@ -0,0 +1,71 @@
+"""Alta de clientes y listado paginado editable."""
+import streamlit as st
+from psycopg2.extras import execute_values
+
+from kaiken.db import transaction
+from kaiken.listing import Listing, paged_editor, saved
+from kaiken.rut import validar_rut
+
+
+def render():
+    st.title("👤 Gestionar Clientes")
+
+    with st.form("gestion_cliente_form"):
+        st.subheader("Agregar Nuevo Cliente")
+        nom_cli = st.text_input("Nombre del Cliente")
+        rut_cli = st.text_input("RUT del Cliente")
+        
+        submitted = st.form_submit_button("Previsualizar Cambios")
+        if submitted:
+            st.warning("**Estás a punto de CREAR el siguiente cliente:**")
+            st.write(f"**Nombre:** {nom_cli}")
+            st.write(f"**RUT:** {rut_cli}")
+            
+            st.session_state['confirm_client_data'] = {"nom_cli": nom_cli, "rut_cli": rut_cli}
+
+    if 'confirm_client_data' in st.session_state and st.session_state['confirm_client_data']:
+        if st.button("Confirmar y Guardar Cliente", type="primary"):
+            data = st.session_state['confirm_client_data']
+            if not data['nom_cli'] or not data['rut_cli']:
+                st.error("Error: El nombre y el RUT son obligatorios.")
+            elif not validar_rut(data['rut_cli']):
+                st.error(f"El RUT '{data['rut_cli']}' no es válido.")
+            else:
+                try:
+                    with transaction(invalidates=("clientes",)) as conn, conn.cursor() as cursor:
+                        cursor.execute("INSERT INTO public.clientes (id_cli, nom_cli, rut_cli) VALUES ((SELECT COALESCE(MAX(id_cli), 0) + 1 FROM public.clientes), %s, %s);", (data['nom_cli'], data['rut_cli']))
+                    st.success(f"Cliente '{data['nom_cli']}' guardado con éxito.")
+                except Exception as e:
+                    st.error(f"Error al guardar cliente: {e}")
+                finally:
+                    st.session_state['confirm_client_data'] = None
+                    st.rerun()
+
+    st.markdown("---")
+    st.subheader("Listado de Clientes Existentes")
+    st.caption("Edita los nombres directamente en la tabla y guarda los cambios de la página.")
+
+    _, cambios = paged_editor(
+        "clientes", Listing("clientes_pagina", ("nom_cli", "id_cli"), "id_cli"),
+        column_config={
+            "id_cli": st.column_config.NumberColumn("ID"),
+            "nom_cli": st.column_config.TextColumn("Nombre", required=True),
+            "rut_cli": st.column_config.TextColumn("RUT"),
+        },
+        disabled=("rut_cli",), search_label="Buscar por nombre o RUT:",
+    )
+
+    if st.button("Guardar Cambios del Listado", type="primary", disabled=cambios.empty, key="guardar_clientes"):
+        if (cambios['nom_cli'].fillna("").str.strip() == "").any():
+            st.error("Error: El nombre es obligatorio.")
+        else:
+            try:
+                with transaction(invalidates=("clientes",)) as conn, conn.cursor() as cursor:
+                    execute_values(
+                        cursor,
+                        "UPDATE public.clientes AS c SET nom_cli = v.nom_cli FROM (VALUES %s) AS v(id_cli, nom_cli) WHERE c.id_cli = v.id_cli;",
+                        [(int(row.id_cli), row.nom_cli) for row in cambios.itertuples(index=False)],
+                    )
+                saved("clientes", f"{len(cambios)} cliente(s) actualizado(s) con éxito.")
+            except Exception as e:
+                st.error(f"Error al guardar clientes: {e}")
@@ -0,0 +1,151 @@
+"""Creación y edición de licitaciones con sus productos adjudicados."""
+from datetime import datetime, timedelta
+from functools import partial
+
+import pandas as pd
+import streamlit as st
+
+from kaiken.catalog import product_index
+from kaiken.db import transaction
+from kaiken.fanout import gather
+from kaiken.listing import cursor_stack, pager
+from kaiken.orders import save_tender_orders
+from kaiken.queries import fetch_by_keys, run_query
+from kaiken.search import SEARCH_PAGE_SIZE, keyset_page, like_pattern
+
+
+def render():
+    st.title("✍️ Gestionar Licitaciones")
+
+    modo = st.selectbox("¿Qué deseas hacer?", ["Crear Nueva Licitación", "Editar Licitación Existente"], key="modo_licitacion")
+
+    data = gather({
+        "clientes": partial(run_query, "clientes_opciones"),
+        "productos": product_index,
+    })
+    clients_df, products = data["clientes"], data["productos"]
+
+    tender_id_default, client_id_default, selected_skus_default = "", None, []
+    creation_date_default = datetime.today()
+    delivery_date_default = creation_date_default + timedelta(days=1)
+
+    if modo == "Editar Licitación Existente":
+        st.subheader("Selecciona la Licitación a Editar")
+        # Se busca por páginas en Postgres (no en el backend analítico: se edita lo vigente)
+        busqueda_licitacion = st.text_input("Buscar Licitación por ID o cliente:", key="buscar_licitacion_editar")
+        cursors = cursor_stack("editar_licitacion", busqueda_licitacion)
+        pagina, next_cursor = keyset_page("licitaciones_buscar", like_pattern(busqueda_licitacion), cursors[-1],
+                                          SEARCH_PAGE_SIZE, ("creation_date", "id"))
+        clientes_pagina = dict(zip(pagina["id"], pagina["nom_cli"]))
+        if pagina.empty:
+            st.caption("No se encontraron licitaciones para la búsqueda.")
+        else:
+            pager("editar_licitacion", cursors, next_cursor, len(pagina), unidad="licitaciones")
+        # La licitación elegida sigue entre las opciones aunque se cambie de página o de búsqueda
+        actual = st.session_state.get("licitacion_a_editar")
+        opciones = list(dict.fromkeys(([actual] if actual else []) + list(clientes_pagina)))
+        tender_a_editar = st.selectbox(
+            "Licitación:", options=opciones, index=None, key="licitacion_a_editar",
+            format_func=lambda x: f"{x} - {clientes_pagina[x]}" if x in clientes_pagina else x,
+            placeholder="Selecciona una licitación de la búsqueda...",
+        )
+        if tender_a_editar:
+            tender_id_default = tender_a_editar
+            edit_data = gather({
+                "licitacion": partial(fetch_by_keys, "licitaciones_por_id", [tender_a_editar]),
+                "ordenes": partial(fetch_by_keys, "ordenes_por_licitacion", [tender_a_editar]),
+            })
+            tender_data = edit_data["licitacion"].iloc[0]
+            client_id_default, creation_date_default, delivery_date_default = tender_data['id_cli'], tender_data['creation_date'], tender_data['delivery_date']
+            order_data = edit_data["ordenes"][['product_id', 'quantity', 'price']]
+            selected_skus_default = order_data['product_id'].tolist()
+            st.session_state['productos_a_editar'] = order_data.set_index('product_id').to_dict('index')
+
+    # La selección vive en session_state: se precarga sólo al cambiar de modo o de licitación
+    origen = (modo, tender_id_default)
+    if st.session_state.get('productos_origen') != origen:
+        st.session_state['productos_origen'] = origen
+        st.session_state['productos_licitacion'] = selected_skus_default
+
+    st.markdown("---")
+    st.subheader("Datos de la Licitación")
+
+    creation_date = st.date_input("Fecha Creación", value=creation_date_default)
+    min_delivery_date = creation_date + timedelta(days=1)
+    delivery_date = st.date_input("Fecha Entrega", value=delivery_date_default, min_value=min_delivery_date)
+
+    st.subheader("Productos Adjudicados")
+    # Sólo viajan al navegador los productos ya elegidos y las primeras coincidencias de la búsqueda
+    busqueda = st.text_input("Buscar producto por nombre o SKU:", key="buscar_producto")
+    # El multiselect falla si su valor trae opciones que ya no existen (SKUs borrados
+    # del catálogo desde que se cargó la selección): se depuran antes de dibujarlo
+    selected_skus = [sku for sku in st.session_state['productos_licitacion'] if sku in products]
+    if len(selected_skus) < len(st.session_state['productos_licitacion']):
+        st.caption("Se quitaron de la selección productos que ya no están en el catálogo.")
+    st.session_state['productos_licitacion'] = selected_skus
+    coincidencias = [sku for sku in products.search(busqueda) if sku not in set(selected_skus)]
+    if busqueda and not coincidencias:
+        st.caption("No hay productos que coincidan con la búsqueda.")
+    selected_skus = st.multiselect(
+        "Selecciona productos:", options=selected_skus + coincidencias, format_func=products.label,
+        key="productos_licitacion", placeholder="Escribe arriba para buscar en el catálogo...",
+    )
+
+    with st.form("gestion_licitacion_form"):
+        client_names, client_index = clients_df['nom_cli'].tolist(), None
+        if client_id_default:
+            client_name_default = clients_df[clients_df['id_cli'] == client_id_default]['nom_cli'].iloc[0]
+            if client_name_default in client_names:
+                client_index = client_names.index(client_name_default)
+
+        tender_id = st.text_input("ID Licitación", value=tender_id_default, disabled=(modo == "Editar Licitación Existente"))
+        selected_client_name = st.selectbox("Cliente", options=client_names, index=client_index)
+        
+        st.markdown("---")
+        
+        products_to_add = []
+        if selected_skus:
+            for sku in selected_skus:
+                product_name, cost = products.name(sku), products.cost(sku)
+                qty_default, price_default = 1, cost + 0.01
+                if modo == "Editar Licitación Existente" and sku in st.session_state.get('productos_a_editar', {}):
+                    qty_default = st.session_state['productos_a_editar'][sku]['quantity']
+                    price_default = float(st.session_state['productos_a_editar'][sku]['price'])
+
+                st.write(f"**{product_name}** (Costo: ${cost:,.2f})")
+                cols = st.columns([1, 1])
+                quantity = cols[0].number_input(f"Cantidad para {sku}", min_value=1, step=1, value=qty_default, key=f"qty_{sku}")
+                price = cols[1].number_input(f"Precio Venta para {sku}", min_value=float(cost) + 0.01, format="%.2f", value=price_default, key=f"price_{sku}")
+                products_to_add.append({"sku": sku, "quantity": quantity, "price": float(price)})
+
+        submitted = st.form_submit_button("Previsualizar Cambios")
+
+        if submitted:
+            st.warning(f"**Estás a punto de {'ACTUALIZAR' if modo == 'Editar Licitación Existente' else 'CREAR'} la siguiente licitación:**")
+            resumen_col1, resumen_col2 = st.columns(2)
+            resumen_col1.write(f"**ID:** {tender_id}")
+            resumen_col1.write(f"**Cliente:** {selected_client_name}")
+            resumen_col2.write(f"**Fecha Creación:** {creation_date.strftime('%Y-%m-%d')}")
+            resumen_col2.write(f"**Fecha Entrega:** {delivery_date.strftime('%Y-%m-%d')}")
+            st.write("**Productos:**")
+            preview_df = pd.DataFrame([{"Producto": p_name, "Cantidad": p_data['quantity'], "Precio": p_data['price']} for p_name, p_data in zip(map(products.name, selected_skus), products_to_add)])
+            st.dataframe(preview_df, hide_index=True)
+            st.session_state['confirm_data'] = {"modo": modo, "tender_id": tender_id, "client_name": selected_client_name, "creation_date": creation_date, "delivery_date": delivery_date, "products": products_to_add}
+
+    if 'confirm_data' in st.session_state and st.session_state['confirm_data']:
+        if st.button("Confirmar y Guardar en Base de Datos", type="primary"):
+            data = st.session_state['confirm_data']
+            try:
+                client_id = clients_df[clients_df['nom_cli'] == data['client_name']]['id_cli'].iloc[0]
+                with transaction(invalidates=("tenders", "orders")) as conn, conn.cursor() as cursor:
+                    if data['modo'] == "Crear Nueva Licitación":
+                        cursor.execute("INSERT INTO public.tenders (id, id_cli, creation_date, delivery_date) VALUES (%s, %s, %s, %s);", (data['tender_id'], int(client_id), data['creation_date'], data['delivery_date']))
+                    else:
+                        cursor.execute("UPDATE public.tenders SET id_cli=%s, creation_date=%s, delivery_date=%s WHERE id=%s;", (int(client_id), data['creation_date'], data['delivery_date'], data['tender_id']))
+                    save_tender_orders(cursor, data['tender_id'], data['products'])
+                st.success(f"¡Licitación '{data['tender_id']}' guardada con éxito!")
+                st.balloons()
+            except Exception as e:
+                st.error(f"Error al guardar: {e}")
+            finally:
+                st.session_state['confirm_data'] = None
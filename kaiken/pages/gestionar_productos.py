@@ -0,0 +1,70 @@
+"""Alta de productos y listado paginado editable."""
+import streamlit as st
+from psycopg2.extras import execute_values
+
+from kaiken.db import transaction
+from kaiken.listing import Listing, paged_editor, saved
+
+
+def render():
+    st.title("📦 Gestionar Productos")
+
+    with st.form("gestion_producto_form"):
+        st.subheader("Agregar Nuevo Producto")
+        sku_pro = st.text_input("SKU del Producto (ID único)")
+        nom_pro = st.text_input("Nombre del Producto")
+        cost_prp = st.number_input("Costo del Producto ($)", min_value=0.01, value=0.01, format="%.2f")
+        
+        submitted = st.form_submit_button("Previsualizar Cambios")
+        if submitted:
+            st.warning("**Estás a punto de CREAR el siguiente producto:**")
+            st.write(f"**SKU:** {sku_pro}")
+            st.write(f"**Nombre:** {nom_pro}")
+            st.write(f"**Costo:** ${cost_prp:,.2f}")
+
+            st.session_state['confirm_product_data'] = {"sku_pro": sku_pro, "nom_pro": nom_pro, "cost_prp": cost_prp}
+
+    if 'confirm_product_data' in st.session_state and st.session_state['confirm_product_data']:
+        if st.button("Confirmar y Guardar Producto", type="primary"):
+            data = st.session_state['confirm_product_data']
+            if not data['sku_pro'] or not data['nom_pro']:
+                st.error("Error: El SKU y el nombre son obligatorios.")
+            else:
+                try:
+                    with transaction(invalidates=("products",)) as conn, conn.cursor() as cursor:
+                        cursor.execute("INSERT INTO public.products (sku_pro, nom_pro, cost_prp) VALUES (%s, %s, %s);", (data['sku_pro'], data['nom_pro'], data['cost_prp']))
+                    st.success(f"Producto '{data['nom_pro']}' guardado con éxito.")
+                except Exception as e:
+                    st.error(f"Error al guardar producto: {e}")
+                finally:
+                    st.session_state['confirm_product_data'] = None
+                    st.rerun()
+
+    st.markdown("---")
+    st.subheader("Listado de Productos Existentes")
+    st.caption("Edita nombre y costo directamente en la tabla y guarda los cambios de la página.")
+
+    _, cambios = paged_editor(
+        "productos", Listing("productos_pagina", ("nom_pro", "sku_pro"), "sku_pro"),
+        column_config={
+            "sku_pro": st.column_config.TextColumn("SKU"),
+            "nom_pro": st.column_config.TextColumn("Nombre", required=True),
+            "cost_prp": st.column_config.NumberColumn("Costo", min_value=0.01, format="$ %.2f", required=True),
+        },
+        search_label="Buscar por nombre o SKU:",
+    )
+
+    if st.button("Guardar Cambios del Listado", type="primary", disabled=cambios.empty, key="guardar_productos"):
+        if (cambios['nom_pro'].fillna("").str.strip() == "").any():
+            st.error("Error: El nombre es obligatorio.")
+        else:
+            try:
+                with transaction(invalidates=("products",)) as conn, conn.cursor() as cursor:
+                    execute_values(
+                        cursor,
+                        "UPDATE public.products AS p SET nom_pro = v.nom_pro, cost_prp = v.cost_prp FROM (VALUES %s) AS v(sku_pro, nom_pro, cost_prp) WHERE p.sku_pro = v.sku_pro;",
+                        [(row.sku_pro, row.nom_pro, float(row.cost_prp)) for row in cambios.itertuples(index=False)],
+                    )
+                saved("productos", f"{len(cambios)} producto(s) actualizado(s) con éxito.")
+            except Exception as e:
+                st.error(f"Error al guardar productos: {e}")
@@ -0,0 +1,113 @@
+"""Búsqueda de licitaciones, análisis de rentabilidad de la seleccionada y exportación."""
+from datetime import date
+from pathlib import Path
+
+import streamlit as st
+
+from kaiken.db import connection
+from kaiken.export import FORMATS, export_path, export_settings, export_tenders, purge_exports
+from kaiken.listing import cursor_stack, pager
+from kaiken.search import load_tender, search_tenders, stale_warning
+
+
+def export_section():
+    """Exportación por rango de fechas: se escribe a disco por bloques y se descarga al hacer clic."""
+    with st.expander("📥 Exportar licitaciones con sus líneas y márgenes"):
+        today = date.today()
+        rango = st.date_input("Fecha de creación:", value=(today.replace(month=1, day=1), today), key="export_rango")
+        formato = st.radio("Formato:", list(FORMATS), horizontal=True, key="export_formato")
+        cfg = export_settings()
+
+        if st.button("Generar exportación", key="export_generar"):
+            if len(rango) != 2:
+                st.warning("Selecciona la fecha inicial y la final.")
+                return
+            purge_exports(cfg["dir"])
+            path = export_path(formato, *rango, directory=cfg["dir"])
+            status = st.empty()
+            with st.spinner("Exportando..."), connection() as conn:
+                result = export_tenders(conn, path, formato, *rango,
+                                        progress=lambda rows: status.caption(f"{rows:,} filas escritas"))
+            status.empty()
+            st.session_state["export_archivo"] = (str(path), formato, result)
+
+        archivo = st.session_state.get("export_archivo")
+        if not archivo or not Path(archivo[0]).exists():
+            return
+        path, formato, result = Path(archivo[0]), archivo[1], archivo[2]
+        size_mb = result["bytes"] / 2**20
+        st.caption(f"{result['filas']:,} filas · {size_mb:.1f} MB · {result['segundos']:.1f} s")
+        if size_mb > cfg["max_download_mb"]:
+            st.info(f"La exportación pesa {size_mb:,.0f} MB. Está en el servidor en `{path}`; "
+                    "para rangos así de grandes usa `python -m kaiken.export`.")
+            return
+        # El archivo se lee recién al hacer clic, no en cada rerun de la página
+        st.download_button(
+            "Descargar", data=path.read_bytes, mime=FORMATS[formato], on_click="ignore",
+            file_name=f"{path.stem.rsplit('_', 1)[0]}{path.suffix}",
+        )
+
+
+def render():
+    st.title("📑 Búsqueda y Análisis de Licitaciones")
+
+    export_section()
+
+    st.header("Herramienta de Búsqueda")
+    search_query = st.text_input("Buscar por ID de Licitación o Nombre de Cliente:", "")
+
+    # Pila de cursores de keyset: una entrada por página visitada
+    cursors = cursor_stack("licitaciones", search_query)
+    lista_licitaciones, next_cursor = search_tenders(search_query, cursor=cursors[-1])
+    stale_warning()
+
+    if lista_licitaciones.empty:
+        if search_query:
+            st.warning("No se encontraron licitaciones para la búsqueda.")
+        else:
+            st.warning("No hay licitaciones registradas para mostrar.")
+        return
+
+    lista_licitaciones = lista_licitaciones.set_index("id")
+    pager("licitaciones", cursors, next_cursor, len(lista_licitaciones), unidad="licitaciones")
+
+    selected_tender_id = st.selectbox(
+        "Selecciona una Licitación:", options=lista_licitaciones.index,
+        format_func=lambda x: f"{x} - {lista_licitaciones.loc[x, 'nom_cli']}"
+    )
+
+    if selected_tender_id:
+        st.markdown("---")
+        st.header(f"Análisis Completo de la Licitación: {selected_tender_id}")
+        df_header, df_selected = load_tender(selected_tender_id)
+        
+        st.subheader("Datos Generales")
+        info_general = df_header.iloc[0]
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Cliente", info_general["Cliente"])
+        col2.metric("Fecha Creación", f"{info_general['Fecha Creación']:%Y-%m-%d}")
+        col3.metric("Fecha Entrega", f"{info_general['Fecha Entrega']:%Y-%m-%d}")
+
+        st.subheader("Métricas de Rentabilidad")
+        total_revenue = (df_selected["Precio Venta"] * df_selected["Cantidad"]).sum()
+        total_cost = (df_selected["Costo"] * df_selected["Cantidad"]).sum()
+        total_margin = df_selected["Margen Producto"].sum()
+        margin_percentage = (total_margin / total_revenue) * 100 if total_revenue > 0 else 0
+
+        m1, m2, m3, m4 = st.columns(4)
+        m1.metric("Ingresos Totales", f"${total_revenue:,.2f}")
+        m2.metric("Costos Totales", f"${total_cost:,.2f}")
+        m3.metric("Margen Total", f"${total_margin:,.2f}", delta=f"{margin_percentage:.2f}%")
+        m4.metric("N° de Productos", f"{len(df_selected)}")
+        
+        st.subheader("Detalle de Productos Adjudicados")
+        df_display = df_selected[["Producto", "Cantidad", "Precio Venta", "Costo", "Margen Producto"]]
+        
+        st.dataframe(
+            df_display, use_container_width=True, hide_index=True,
+            column_config={
+                "Precio Venta": st.column_config.NumberColumn(format="$ %(,.2f"),
+                "Costo": st.column_config.NumberColumn(format="$ %(,.2f"),
+                "Margen Producto": st.column_config.NumberColumn(format="$ %(,.2f"),
+            }
+        )
@@ -0,0 +1,348 @@
+"""
+Registro de consultas con nombre.
+
+Cada consulta es una sentencia parametrizada (`$1`, `$2`, ...) que se prepara
+una sola vez por conexión del pool (`PREPARE`) y luego se ejecuta con
+`EXECUTE`, evitando que Postgres vuelva a parsear y planificar el SQL. El cache
+usa como clave `(nombre, parámetros)` en lugar del texto literal de la consulta.
+"""
+import re
+from typing import NamedTuple
+
+import pandas as pd
+import psycopg2
+import psycopg2.errors
+
+from kaiken.db import cached_query, connection, init_query_cache, prepare_enabled, timed_fetch
+from kaiken.metrics import METRICS
+
+
+class Statement(NamedTuple):
+    sql: str
+    tables: tuple
+    key_column: str = None      # columna de la PK para `fetch_by_keys`
+    # Con esquema se lee por COPY + Arrow (ver kaiken/bulk.py) y se salta el
+    # PREPARE/EXECUTE: sólo vale la pena en resultados grandes (catálogos
+    # completos, rangos amplios). Las búsquedas por clave y las consultas de
+    # pocas filas van más rápido con la sentencia preparada.
+    schema: dict = None
+
+
+# Rango del dashboard partido en meses completos (leídos de los rollups de
+# sql/10.Rollups de Margen.sql) y días sueltos en los extremos (leídos de las
+# tablas base). `full_ini`/`full_fin` acotan los meses completos: [full_ini, full_fin).
+_RANGO_ROLLUP = """
+    rango AS (
+        SELECT $1::date AS ini, $2::date AS fin,
+               CASE WHEN $1::date = date_trunc('month', $1::date)::date THEN $1::date
+                    ELSE (date_trunc('month', $1::date) + interval '1 month')::date END AS full_ini,
+               date_trunc('month', $2::date + 1)::date AS full_fin
+    ),
+    bordes AS (
+        SELECT t.id AS tender_id, t.id_cli, t.creation_date, o.product_id,
+               o.price * o.quantity AS revenue,
+               (o.price - p.cost_prp) * o.quantity AS margin
+        FROM rango
+        JOIN public.tenders t  ON t.creation_date BETWEEN rango.ini AND rango.fin
+                              AND (t.creation_date < rango.full_ini OR t.creation_date >= rango.full_fin)
+        JOIN public.orders o   ON o.tender_id = t.id
+        JOIN public.products p ON p.sku_pro = o.product_id
+        WHERE t.id_cli IS NOT NULL
+    )"""
+
+
+QUERIES = {
+    # --- Dashboard ---
+    "dashboard_bounds": Statement("""
+        SELECT MIN(t.creation_date) AS min_date, MAX(t.creation_date) AS max_date
+        FROM public.tenders t
+        WHERE t.id_cli IS NOT NULL
+          AND EXISTS (SELECT 1 FROM public.orders o WHERE o.tender_id = t.id)
+    """, ("tenders", "orders")),
+    "dashboard_clients": Statement("""
+        SELECT
+            c.nom_cli,
+            SUM(ovm.total_margin) AS total_margin,
+            SUM(ovm.sale_price * ovm.quantity) AS revenue,
+            COUNT(DISTINCT ovm.tender_id) AS num_tenders
+        FROM public.order_details_with_margin ovm
+        JOIN public.tenders t ON ovm.tender_id = t.id
+        JOIN public.clientes c ON t.id_cli = c.id_cli
+        WHERE t.creation_date BETWEEN $1::date AND $2::date
+        GROUP BY c.nom_cli
+    """, ("clientes", "tenders", "orders", "products")),
+    "dashboard_top_products": Statement("""
+        SELECT ovm.product_name, SUM(ovm.total_margin) AS total_margin
+        FROM public.order_details_with_margin ovm
+        JOIN public.tenders t ON ovm.tender_id = t.id
+        JOIN public.clientes c ON t.id_cli = c.id_cli
+        WHERE t.creation_date BETWEEN $1::date AND $2::date
+        GROUP BY ovm.product_name
+        ORDER BY total_margin DESC
+        LIMIT $3::integer
+    """, ("clientes", "tenders", "orders", "products")),
+    "dashboard_monthly": Statement("""
+        WITH meses AS (
+            SELECT generate_series(
+                date_trunc('month', $1::date),
+                date_trunc('month', $2::date),
+                interval '1 month'
+            )::date AS creation_date
+        ),
+        ventas AS (
+            SELECT
+                date_trunc('month', t.creation_date)::date AS creation_date,
+                SUM(ovm.sale_price * ovm.quantity) AS monthly_revenue,
+                SUM(ovm.total_margin) AS monthly_margin
+            FROM public.order_details_with_margin ovm
+            JOIN public.tenders t ON ovm.tender_id = t.id
+            JOIN public.clientes c ON t.id_cli = c.id_cli
+            WHERE t.creation_date BETWEEN $1::date AND $2::date
+            GROUP BY 1
+        )
+        SELECT
+            m.creation_date,
+            COALESCE(v.monthly_revenue, 0) AS monthly_revenue,
+            COALESCE(v.monthly_margin, 0) AS monthly_margin
+        FROM meses m
+        LEFT JOIN ventas v ON v.creation_date = m.creation_date
+        ORDER BY m.creation_date
+    """, ("clientes", "tenders", "orders", "products")),
+    # Mismos resultados que las tres anteriores, leyendo los rollups
+    "dashboard_clients_rollup": Statement("WITH" + _RANGO_ROLLUP + """,
+        por_cliente AS (
+            SELECT r.id_cli, r.margin, r.revenue, r.num_tenders
+            FROM public.rollup_client_month r, rango
+            WHERE r.month >= rango.full_ini AND r.month < rango.full_fin
+            UNION ALL
+            SELECT id_cli, SUM(margin), SUM(revenue), COUNT(DISTINCT tender_id)
+            FROM bordes
+            GROUP BY id_cli
+        )
+        SELECT
+            c.nom_cli,
+            SUM(x.margin) AS total_margin,
+            SUM(x.revenue) AS revenue,
+            SUM(x.num_tenders) AS num_tenders
+        FROM por_cliente x
+        JOIN public.clientes c ON x.id_cli = c.id_cli
+        GROUP BY c.nom_cli
+    """, ("clientes", "tenders", "orders", "products")),
+    "dashboard_top_products_rollup": Statement("WITH" + _RANGO_ROLLUP + """,
+        por_producto AS (
+            SELECT r.product_id, r.margin
+            FROM public.rollup_product_month r, rango
+            WHERE r.month >= rango.full_ini AND r.month < rango.full_fin
+            UNION ALL
+            SELECT product_id, SUM(margin)
+            FROM bordes
+            GROUP BY product_id
+        )
+        SELECT p.nom_pro AS product_name, SUM(x.margin) AS total_margin
+        FROM por_producto x
+        JOIN public.products p ON x.product_id = p.sku_pro
+        GROUP BY p.nom_pro
+        ORDER BY total_margin DESC
+        LIMIT $3::integer
+    """, ("clientes", "tenders", "orders", "products")),
+    "dashboard_monthly_rollup": Statement("WITH" + _RANGO_ROLLUP + """,
+        meses AS (
+            SELECT generate_series(
+                date_trunc('month', $1::date),
+                date_trunc('month', $2::date),
+                interval '1 month'
+            )::date AS creation_date
+        ),
+        ventas AS (
+            SELECT r.month AS creation_date, r.revenue, r.margin
+            FROM public.rollup_client_month r, rango
+            WHERE r.month >= rango.full_ini AND r.month < rango.full_fin
+            UNION ALL
+            SELECT date_trunc('month', creation_date)::date, revenue, margin
+            FROM bordes
+        )
+        SELECT
+            m.creation_date,
+            COALESCE(SUM(v.revenue), 0) AS monthly_revenue,
+            COALESCE(SUM(v.margin), 0) AS monthly_margin
+        FROM meses m
+        LEFT JOIN ventas v ON v.creation_date = m.creation_date
+        GROUP BY m.creation_date
+        ORDER BY m.creation_date
+    """, ("clientes", "tenders", "orders", "products")),
+
+    # --- Ver Licitaciones (búsqueda paginada por keyset, ver kaiken/search.py) ---
+    "licitaciones_buscar": Statement("""
+        SELECT t.id, c.nom_cli, t.creation_date
+        FROM public.tenders t
+        JOIN public.clientes c ON t.id_cli = c.id_cli
+        WHERE (t.id ILIKE $1 OR c.nom_cli ILIKE $1)
+        ORDER BY t.creation_date DESC, t.id DESC
+        LIMIT $2::integer
+    """, ("clientes", "tenders")),
+    "licitaciones_buscar_desde": Statement("""
+        SELECT t.id, c.nom_cli, t.creation_date
+        FROM public.tenders t
+        JOIN public.clientes c ON t.id_cli = c.id_cli
+        WHERE (t.id ILIKE $1 OR c.nom_cli ILIKE $1)
+          AND (t.creation_date, t.id) < ($2::date, $3::text)
+        ORDER BY t.creation_date DESC, t.id DESC
+        LIMIT $4::integer
+    """, ("clientes", "tenders")),
+    "licitacion_cabecera": Statement("""
+        SELECT
+            t.id as "ID Licitación", c.nom_cli as "Cliente", c.rut_cli as "RUT Cliente",
+            t.creation_date as "Fecha Creación", t.delivery_date as "Fecha Entrega"
+        FROM public.tenders t
+        JOIN public.clientes c ON t.id_cli = c.id_cli
+        WHERE t.id = ANY($1::text[])
+    """, ("clientes", "tenders"), "ID Licitación"),
+    "licitacion_lineas": Statement("""
+        SELECT
+            ovm.tender_id as "ID Licitación",
+            ovm.product_name as "Producto", ovm.quantity as "Cantidad",
+            ovm.sale_price as "Precio Venta", ovm.cost_price as "Costo",
+            ovm.total_margin as "Margen Producto"
+        FROM public.order_details_with_margin ovm
+        WHERE ovm.tender_id = ANY($1::text[])
+        ORDER BY ovm.tender_id, ovm.product_name
+    """, ("orders", "products"), "ID Licitación"),
+
+    # --- Gestión: listados ---
+    "clientes_opciones": Statement(
+        "SELECT id_cli, nom_cli FROM public.clientes ORDER BY nom_cli", ("clientes",)),
+    # Catálogo completo: por COPY. `nom_pro` queda como texto y no como
+    # categoría porque cada nombre aparece una sola vez (el diccionario no ahorra nada)
+    "productos_listado": Statement(
+        "SELECT sku_pro, nom_pro, cost_prp FROM public.products ORDER BY nom_pro", ("products",),
+        schema={"sku_pro": "string", "nom_pro": "string", "cost_prp": "float64"}),
+
+    # --- Gestión: listados paginados por keyset (ver kaiken/listing.py) ---
+    "clientes_pagina": Statement("""
+        SELECT id_cli, nom_cli, rut_cli FROM public.clientes
+        WHERE (nom_cli ILIKE $1 OR rut_cli ILIKE $1)
+        ORDER BY nom_cli, id_cli
+        LIMIT $2::integer
+    """, ("clientes",)),
+    "clientes_pagina_desde": Statement("""
+        SELECT id_cli, nom_cli, rut_cli FROM public.clientes
+        WHERE (nom_cli ILIKE $1 OR rut_cli ILIKE $1)
+          AND (nom_cli, id_cli) > ($2::text, $3::integer)
+        ORDER BY nom_cli, id_cli
+        LIMIT $4::integer
+    """, ("clientes",)),
+    "productos_pagina": Statement("""
+        SELECT sku_pro, nom_pro, cost_prp FROM public.products
+        WHERE (nom_pro ILIKE $1 OR sku_pro ILIKE $1)
+        ORDER BY nom_pro, sku_pro
+        LIMIT $2::integer
+    """, ("products",)),
+    "productos_pagina_desde": Statement("""
+        SELECT sku_pro, nom_pro, cost_prp FROM public.products
+        WHERE (nom_pro ILIKE $1 OR sku_pro ILIKE $1)
+          AND (nom_pro, sku_pro) > ($2::text, $3::text)
+        ORDER BY nom_pro, sku_pro
+        LIMIT $4::integer
+    """, ("products",)),
+
+    # --- Gestión: búsqueda por clave primaria (en lote) ---
+    "clientes_por_id": Statement(
+        "SELECT * FROM public.clientes WHERE id_cli = ANY($1::integer[])", ("clientes",), "id_cli"),
+    "productos_por_sku": Statement(
+        "SELECT * FROM public.products WHERE sku_pro = ANY($1::text[])", ("products",), "sku_pro"),
+    "licitaciones_por_id": Statement(
+        "SELECT * FROM public.tenders WHERE id = ANY($1::text[])", ("tenders",), "id"),
+    "ordenes_por_licitacion": Statement(
+        "SELECT tender_id, product_id, quantity, price FROM public.orders WHERE tender_id = ANY($1::text[])", ("orders",), "tender_id"),
+}
+
+_PLACEHOLDER_RE = re.compile(r"\$(\d+)")
+
+
+def _prepared_name(name):
+    return f"kq_{name}"
+
+
+def _pyformat(sql):
+    """Traduce `$n` a `%(pn)s` para ejecutar la sentencia sin preparar."""
+    return _PLACEHOLDER_RE.sub(r"%(p\1)s", sql.replace("%", "%%"))
+
+
+def _execute(conn, name, args):
+    statement = QUERIES[name]
+    params = {f"p{i}": arg for i, arg in enumerate(args, start=1)}
+    if statement.schema:
+        from kaiken.bulk import read_frame     # Arrow se importa sólo cuando se usa
+        return read_frame(conn, _pyformat(statement.sql), statement.schema, params)
+    if prepare_enabled() and conn.prepare_statements:
+        try:
+            if name not in conn.prepared:
+                with conn.cursor() as cursor:
+                    cursor.execute(f"PREPARE {_prepared_name(name)} AS {statement.sql}")
+                conn.prepared.add(name)
+            placeholders = ", ".join(["%s"] * len(args))
+            call = f"EXECUTE {_prepared_name(name)}({placeholders})" if args else f"EXECUTE {_prepared_name(name)}"
+            return pd.read_sql_query(call, conn, params=list(args))
+        except (psycopg2.errors.InvalidSqlStatementName, psycopg2.errors.DuplicatePreparedStatement):
+            # Un pooler en modo transacción reparte la sesión entre backends:
+            # en esta conexión ejecutamos siempre sin preparar
+            conn.rollback()
+            conn.prepare_statements = False
+    return pd.read_sql_query(_pyformat(statement.sql), conn, params=params)
+
+
+def _plain(value):
+    """Convierte escalares de NumPy a tipos nativos que psycopg2 sabe adaptar."""
+    return value.item() if hasattr(value, "item") else value
+
+
+def run_query(name, *args):
+    """Ejecuta la consulta registrada `name` con los parámetros posicionales `args`."""
+    statement = QUERIES[name]
+    args = tuple(_plain(arg) for arg in args)
+
+    def fetch():
+        with connection() as conn:
+            return _execute(conn, name, args)
+
+    return cached_query(("stmt", name, args), statement.tables, fetch, label=name)
+
+
+def fetch_by_keys(name, keys):
+    """
+    Busca varias filas por clave primaria con una sola consulta `= ANY(...)`.
+    Cada clave se cachea por separado, así que sólo viajan a la base las que no
+    están en cache. Devuelve las filas encontradas en el orden de `keys`.
+    """
+    statement = QUERIES[name]
+    tables = frozenset(statement.tables)
+    cache = init_query_cache()
+    keys = list(dict.fromkeys(_plain(key) for key in keys))
+
+    frames, missing = {}, []
+    for key in keys:
+        hit, df = cache.get(("stmt", name, key))
+        METRICS.inc("kaiken_cache_requests_total", query=name, result="hit" if hit else "miss")
+        if hit:
+            frames[key] = df
+        else:
+            missing.append(key)
+
+    if missing:
+        versions = cache.versions_for(tables)
+
+        def fetch():
+            with connection() as conn:
+                return _execute(conn, name, (missing,))
+
+        result = timed_fetch(name, fetch)
+        groups = {_plain(key): group for key, group in result.groupby(statement.key_column, sort=False)}
+        for key in missing:
+            df = groups.get(key, result.iloc[0:0]).reset_index(drop=True)
+            cache.put(("stmt", name, key), df, tables, versions)
+            frames[key] = df
+
+    found = [frames[key] for key in keys if not frames[key].empty]
+    if not found:
+        return frames[keys[0]].copy() if keys else pd.DataFrame()
+    return pd.concat(found, ignore_index=True)
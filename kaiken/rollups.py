@@ -0,0 +1,119 @@
+"""
+Rollups de ingresos y margen por mes x cliente y mes x producto.
+
+Las tablas `rollup_client_month` y `rollup_product_month` las mantienen los
+triggers de sql/10.Rollups de Margen.sql; el dashboard lee de ellas los meses
+completos del rango y de las tablas base sólo los días sueltos de los extremos.
+
+Uso:
+    python -m kaiken.rollups check      # compara los rollups con la vista
+    python -m kaiken.rollups rebuild    # los reconstruye desde la vista y verifica
+"""
+import argparse
+import sys
+import time
+
+from kaiken.db import connect, secrets_section
+
+# Diferencias por debajo de esto se consideran redondeo (las sumas son numeric)
+CHECK_TOLERANCE = 1e-6
+
+_VIEW_BY_CLIENT = """
+    SELECT date_trunc('month', t.creation_date)::date AS month, t.id_cli,
+           SUM(ovm.sale_price * ovm.quantity) AS revenue,
+           SUM(ovm.total_margin) AS margin,
+           COUNT(DISTINCT ovm.tender_id) AS num_tenders
+    FROM public.order_details_with_margin ovm
+    JOIN public.tenders t ON t.id = ovm.tender_id
+    WHERE t.id_cli IS NOT NULL AND t.creation_date IS NOT NULL
+    GROUP BY 1, 2
+"""
+
+_VIEW_BY_PRODUCT = """
+    SELECT date_trunc('month', t.creation_date)::date AS month, ovm.product_id,
+           SUM(ovm.sale_price * ovm.quantity) AS revenue,
+           SUM(ovm.total_margin) AS margin
+    FROM public.order_details_with_margin ovm
+    JOIN public.tenders t ON t.id = ovm.tender_id
+    WHERE t.id_cli IS NOT NULL AND t.creation_date IS NOT NULL
+    GROUP BY 1, 2
+"""
+
+CHECKS = {
+    "rollup_client_month": f"""
+        SELECT COALESCE(r.month, v.month), COALESCE(r.id_cli, v.id_cli),
+               r.revenue, v.revenue, r.margin, v.margin, r.num_tenders, v.num_tenders
+        FROM public.rollup_client_month r
+        FULL JOIN ({_VIEW_BY_CLIENT}) v ON v.month = r.month AND v.id_cli = r.id_cli
+        WHERE r.month IS NULL OR v.month IS NULL
+           OR abs(r.revenue - v.revenue) > %(tol)s
+           OR abs(r.margin - v.margin) > %(tol)s
+           OR r.num_tenders <> v.num_tenders
+        ORDER BY 1, 2
+    """,
+    "rollup_product_month": f"""
+        SELECT COALESCE(r.month, v.month), COALESCE(r.product_id, v.product_id),
+               r.revenue, v.revenue, r.margin, v.margin
+        FROM public.rollup_product_month r
+        FULL JOIN ({_VIEW_BY_PRODUCT}) v ON v.month = r.month AND v.product_id = r.product_id
+        WHERE r.month IS NULL OR v.month IS NULL
+           OR abs(r.revenue - v.revenue) > %(tol)s
+           OR abs(r.margin - v.margin) > %(tol)s
+        ORDER BY 1, 2
+    """,
+}
+
+
+def rollups_enabled():
+    return bool(secrets_section("rollups").get("enabled", False))
+
+
+def rebuild(conn):
+    """Reconstruye ambos rollups desde la vista en una sola transacción."""
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT public.rollups_rebuild();")
+    conn.commit()
+
+
+def check(conn):
+    """Devuelve `{tabla: [filas distintas]}` comparando cada rollup con la vista."""
+    diferencias = {}
+    with conn.cursor() as cursor:
+        for table, sql in CHECKS.items():
+            cursor.execute(sql, {"tol": CHECK_TOLERANCE})
+            diferencias[table] = cursor.fetchall()
+    conn.rollback()
+    return diferencias
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rollups de margen: reconstrucción y verificación.")
+    parser.add_argument("accion", choices=["check", "rebuild"])
+    parser.add_argument("--dsn", help="Cadena de conexión (por defecto KAIKEN_DATABASE_URL o secrets.toml)")
+    parser.add_argument("--max-filas", type=int, default=20, help="Diferencias a mostrar por tabla")
+    args = parser.parse_args(argv)
+
+    conn = connect(args.dsn)
+    try:
+        if args.accion == "rebuild":
+            t0 = time.perf_counter()
+            rebuild(conn)
+            print(f"✅ Rollups reconstruidos en {time.perf_counter() - t0:.2f} s")
+        diferencias = check(conn)
+    finally:
+        conn.close()
+
+    total = 0
+    for table, filas in diferencias.items():
+        total += len(filas)
+        if not filas:
+            print(f"✅ {table}: coincide con order_details_with_margin")
+            continue
+        print(f"❌ {table}: {len(filas)} grupos distintos (rollup vs. vista)")
+        for fila in filas[:args.max_filas]:
+            print("   ", fila)
+    return 1 if total else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
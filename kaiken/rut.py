@@ -0,0 +1,190 @@
+"""
+Validación de RUT chileno, individual y por lotes.
+
+`validar_rut` valida un RUT a la vez (la usa el formulario de clientes) y
+`validar_ruts` valida columnas completas con NumPy: normaliza los textos, arma
+una matriz de dígitos alineada a la derecha y calcula todos los dígitos
+verificadores con un solo producto matricial. Ambas dan exactamente el mismo
+resultado; la contraparte en SQL está en sql/07.RUT Chileno por Lote.sql.
+
+Benchmark (Python y, opcionalmente, SQL):
+    python -m kaiken.rut --bench 1000000 [--sql] [--dsn postgresql://...]
+"""
+import argparse
+import io
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+# Cuerpos más largos que esto se validan con la función escalar
+MAX_VECTOR_WIDTH = 32
+
+# dígito verificador según (suma % 11): 11 - resto, con 11 -> '0' y 10 -> 'K'
+_DV_POR_RESTO = np.array(list("0K987654321"))
+
+
+def validar_rut(rut):
+    """Valida un RUT chileno (formato XX.XXX.XXX-Y)."""
+    try:
+        rut = rut.upper().replace(".", "").replace("-", "")
+        if not rut[:-1].isdigit() or len(rut) < 8:
+            return False
+
+        cuerpo = rut[:-1]
+        dv_ingresado = rut[-1]
+
+        suma = 0
+        multiplo = 2
+        for d in reversed(cuerpo):
+            suma += int(d) * multiplo
+            multiplo = multiplo + 1 if multiplo < 7 else 2
+
+        dv_calculado = 11 - (suma % 11)
+
+        if dv_calculado == 11:
+            dv_esperado = '0'
+        elif dv_calculado == 10:
+            dv_esperado = 'K'
+        else:
+            dv_esperado = str(dv_calculado)
+
+        return dv_ingresado == dv_esperado
+    except:
+        return False
+
+
+def validar_ruts(ruts):
+    """
+    Valida un arreglo (lista, Series o ndarray) de RUT y devuelve un ndarray de
+    bool con el mismo resultado que aplicar `validar_rut` a cada elemento.
+    """
+    values = np.asarray(ruts, dtype=object)
+    result = np.zeros(len(values), dtype=bool)
+    if not len(values):
+        return result
+
+    # Lo que no sea texto (None, números) es inválido, igual que en `validar_rut`
+    if pd.api.types.infer_dtype(values, skipna=False) == "string":
+        str_idx = np.arange(len(values))
+    else:
+        str_idx = np.flatnonzero(np.fromiter((isinstance(v, str) for v in values), dtype=bool, count=len(values)))
+    original = pd.Series(values[str_idx], dtype="string")
+    # Lo no ASCII (dígitos Unicode, mayúsculas que cambian el largo) va por la ruta escalar
+    no_ascii = original.str.contains(r"[^\x00-\x7F]", regex=True).to_numpy(dtype=bool)
+    s = original.str.upper().str.replace(".", "", regex=False).str.replace("-", "", regex=False)
+
+    lengths = s.str.len().to_numpy(dtype=np.int64)
+    cuerpo = s.str[:-1]
+    formato = ~no_ascii & (lengths >= 8) & cuerpo.str.fullmatch(r"[0-9]+").to_numpy(dtype=bool)
+    vector = formato & (lengths - 1 <= MAX_VECTOR_WIDTH)
+
+    for i in str_idx[no_ascii | (formato & ~vector)]:
+        result[i] = validar_rut(values[i])
+
+    if vector.any():
+        cuerpos = cuerpo[vector]
+        width = int(cuerpos.str.len().max())
+        padded = cuerpos.str.pad(width, side="left", fillchar="0").to_numpy(dtype=object).astype(f"S{width}")
+        digits = padded.view(np.uint8).reshape(-1, width) - ord("0")
+        # El factor va 2, 3, ..., 7, 2, ... desde el dígito de más a la derecha
+        weights = 2 + (np.arange(width)[::-1] % 6)
+        suma = digits.astype(np.int64) @ weights
+        esperado = _DV_POR_RESTO[suma % 11]
+        ingresado = s[vector].str[-1].to_numpy(dtype=object)
+        result[str_idx[vector]] = ingresado == esperado
+    return result
+
+
+def digitos_verificadores(cuerpos):
+    """Dígito verificador ('0'-'9' o 'K') de cada cuerpo numérico de hasta 8 dígitos."""
+    cuerpos = np.asarray(cuerpos, dtype=np.int64)
+    suma = sum(((cuerpos // 10 ** k) % 10) * (2 + k % 6) for k in range(8))
+    return _DV_POR_RESTO[suma % 11]
+
+
+# --- BENCHMARK ---
+
+def generar_ruts(n, seed=0):
+    """RUT sintéticos: ~70% válidos (incluye DV 'K' y '0'), formatos mixtos y casos inválidos."""
+    rng = np.random.default_rng(seed)
+    cuerpos = rng.integers(1_000_000, 100_000_000, size=n)
+    dv = digitos_verificadores(cuerpos)
+    # 30% con DV alterado
+    alterar = rng.random(n) < 0.3
+    dv = np.where(alterar, rng.choice(list("0123456789K"), size=n), dv)
+
+    texto = pd.Series(cuerpos).astype(str)
+    dv = pd.Series(dv)
+    ruts = texto + "-" + dv
+    # Un tercio con puntos de miles, la mitad de las 'K' en minúscula y 1% basura
+    con_puntos = rng.random(n) < 0.33
+    ruts[con_puntos] = texto.str[:-6] + "." + texto.str[-6:-3] + "." + texto.str[-3:] + "-" + dv
+    minuscula = rng.random(n) < 0.5
+    ruts[minuscula] = ruts[minuscula].str.replace("K", "k", regex=False)
+    ruts[rng.random(n) < 0.01] = "12.3A5.678-9"
+    return ruts.tolist()
+
+
+def bench_python(ruts):
+    t0 = time.perf_counter()
+    escalar = np.array([validar_rut(r) for r in ruts])
+    t1 = time.perf_counter()
+    vectorial = validar_ruts(ruts)
+    t2 = time.perf_counter()
+    if not np.array_equal(escalar, vectorial):
+        raise AssertionError(f"validar_ruts difiere de validar_rut en {int((escalar != vectorial).sum())} RUT")
+    return {"escalar_s": t1 - t0, "vectorial_s": t2 - t1, "validos": int(escalar.sum())}
+
+
+def bench_sql(ruts, dsn=None):
+    from kaiken.db import connect
+
+    conn = connect(dsn)
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("CREATE TEMP TABLE bench_ruts (rut text);")
+            cursor.copy_expert("COPY bench_ruts (rut) FROM STDIN", io.StringIO("\n".join(ruts) + "\n"))
+            # Un solo proceso: validar_rut_chileno no es PARALLEL SAFE y la comparación sería desigual
+            cursor.execute("SET LOCAL max_parallel_workers_per_gather = 0;")
+            timings = {}
+            for fn in ("validar_rut_chileno", "validar_rut_chileno_sql"):
+                t0 = time.perf_counter()
+                cursor.execute(f"SELECT count(*) FILTER (WHERE public.{fn}(rut)) FROM bench_ruts;")
+                cursor.fetchone()
+                timings[f"{fn}_s"] = time.perf_counter() - t0
+            cursor.execute("""
+                SELECT count(*) FROM bench_ruts
+                WHERE public.validar_rut_chileno(rut) IS DISTINCT FROM public.validar_rut_chileno_sql(rut);
+            """)
+            diferencias = cursor.fetchone()[0]
+        if diferencias:
+            raise AssertionError(f"validar_rut_chileno_sql difiere de validar_rut_chileno en {diferencias} RUT")
+        return timings
+    finally:
+        conn.rollback()
+        conn.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de validación de RUT (escalar vs. por lotes).")
+    parser.add_argument("--bench", type=int, default=1_000_000, metavar="N", help="Cantidad de RUT a generar")
+    parser.add_argument("--sql", action="store_true", help="Compara también las funciones de Postgres")
+    parser.add_argument("--dsn", help="Cadena de conexión (por defecto KAIKEN_DATABASE_URL o secrets.toml)")
+    args = parser.parse_args(argv)
+
+    ruts = generar_ruts(args.bench)
+    py = bench_python(ruts)
+    print(f"Python  escalar: {py['escalar_s']:.3f} s | vectorial: {py['vectorial_s']:.3f} s "
+          f"| x{py['escalar_s'] / py['vectorial_s']:.1f} | válidos: {py['validos']}/{len(ruts)}")
+    if args.sql:
+        sql = bench_sql(ruts, args.dsn)
+        print(f"SQL     plpgsql: {sql['validar_rut_chileno_s']:.3f} s | inline: {sql['validar_rut_chileno_sql_s']:.3f} s "
+              f"| x{sql['validar_rut_chileno_s'] / sql['validar_rut_chileno_sql_s']:.1f} (un proceso)")
+    print("✅ Resultados idénticos.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,86 @@
+"""
+Búsqueda de licitaciones en el servidor.
+
+El filtro por ID de licitación o nombre de cliente se resuelve en Postgres
+(índices trigram de sql/05.Busqueda de Licitaciones.sql) y los resultados se
+paginan por keyset sobre `(creation_date, id)`, así que cada página cuesta lo
+mismo sin importar cuántas licitaciones existan. Con `[analytics] enabled` la
+búsqueda, la cabecera y las líneas se leen de DuckDB (kaiken/analytics.py), así
+que "Ver Licitaciones" funciona sin base de datos, pero sólo muestra lo que había
+en la última exportación (la página indica su fecha).
+"""
+from functools import partial
+
+from kaiken import analytics
+from kaiken.analytics import analytics_enabled
+from kaiken.fanout import gather
+from kaiken.queries import fetch_by_keys, run_query
+
+SEARCH_PAGE_SIZE = 50
+
+
+def like_pattern(text):
+    """Patrón ILIKE de "contiene", escapando los comodines que escriba el usuario."""
+    text = (text or "").strip()
+    escaped = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def keyset_page(query_name, pattern, cursor, page_size, cursor_columns, run=run_query):
+    """
+    Ejecuta la consulta paginada `query_name` (o `<query_name>_desde` si hay
+    cursor) y devuelve `(df, next_cursor)`. Las consultas piden `page_size + 1`
+    filas para saber si existe una página siguiente.
+    """
+    if cursor is None:
+        df = run(query_name, pattern, page_size + 1)
+    else:
+        df = run(f"{query_name}_desde", pattern, *cursor, page_size + 1)
+
+    next_cursor = None
+    if len(df) > page_size:
+        df = df.iloc[:page_size]
+        last = df.iloc[-1]
+        next_cursor = tuple(last[column] for column in cursor_columns)
+    return df, next_cursor
+
+
+def search_tenders(text, cursor=None, page_size=SEARCH_PAGE_SIZE):
+    """
+    Devuelve una página de licitaciones `(df, next_cursor)` que coinciden con
+    `text`. `cursor` es el `(creation_date, id)` de la última fila de la página
+    anterior; `next_cursor` es None cuando no hay más resultados.
+    """
+    run = analytics.run_query if analytics_enabled() else run_query
+    return keyset_page("licitaciones_buscar", like_pattern(text), cursor, page_size, ("creation_date", "id"), run)
+
+
+def load_tender(tender_id):
+    """Cabecera y líneas (con margen) de una licitación, sólo cuando se selecciona."""
+    # El snapshot trae Arrow: no se importa en las páginas de listados que usan keyset_page
+    from kaiken import snapshot
+    from kaiken.snapshot import snapshot_enabled
+
+    if analytics_enabled():
+        return (analytics.run_query("licitacion_cabecera", [tender_id]),
+                analytics.run_query("licitacion_lineas", [tender_id]))
+    if snapshot_enabled():
+        return fetch_by_keys("licitacion_cabecera", [tender_id]), snapshot.tender_lines(tender_id)
+    data = gather({
+        "cabecera": partial(fetch_by_keys, "licitacion_cabecera", [tender_id]),
+        "lineas": partial(fetch_by_keys, "licitacion_lineas", [tender_id]),
+    })
+    return data["cabecera"], data["lineas"]
+
+
+def stale_warning():
+    """
+    Avisa en la página si los datos pueden no estar al día: con DuckDB la fecha
+    de la exportación; con el snapshot, si no se pudo refrescar.
+    """
+    from kaiken import snapshot
+
+    if analytics_enabled():
+        analytics.source_notice()
+    elif snapshot.snapshot_enabled():
+        snapshot.stale_warning()
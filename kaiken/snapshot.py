@@ -0,0 +1,349 @@
+"""
+Snapshot columnar de la tabla de hechos `order_details_with_margin`.
+
+La tabla de hechos (órdenes con margen, fecha de la licitación y cliente) se
+guarda en un archivo Arrow IPC que cada proceso abre con memory-map, sin
+copiarlo: todas las sesiones leen la misma tabla Arrow (compartida con
+`st.cache_resource`) y sólo materializan en pandas los resultados ya filtrados
+o agregados, que son pequeños.
+
+El refresco es incremental: se piden a Postgres sólo las órdenes cuyo registro
+(o el de su producto, licitación o cliente) cambió desde la última marca de agua,
+más las órdenes borradas (sql/09.Seguimiento de Cambios.sql). La marca de agua
+es el xmin de la instantánea (ids de transacción, no horas), así que una
+transacción larga que confirma tarde entra en el refresco siguiente. La nueva
+versión del archivo se arma filtrando la anterior por lotes y agregando el delta.
+
+Uso:
+    python -m kaiken.snapshot refresh     # incremental (o completo si no existe)
+    python -m kaiken.snapshot rebuild     # completo
+"""
+import argparse
+import datetime as dt
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pandas as pd
+import psycopg2
+import pyarrow as pa
+import pyarrow.compute as pc
+import streamlit as st
+
+from kaiken.bulk import arrow_schema, copy_batches, read_table
+from kaiken.db import connect, connection, secrets_section
+
+SNAPSHOT_DIR = Path(".cache") / "snapshots"
+SNAPSHOT_REFRESH_SECONDS = 60
+# Lápidas de borrados que se conservan ya aplicadas, por si otro snapshot (otra
+# carpeta u otro servidor) todavía no las leyó; uno más viejo que esto se reconstruye
+TOMBSTONE_RETENTION = dt.timedelta(days=7)
+FETCH_BATCH_ROWS = 50_000
+
+FACT_COLUMNS = {
+    "order_id": "string",
+    "tender_id": "string",
+    "product_id": "string",
+    "product_name": "string",
+    "quantity": "int64",
+    "cost_price": "float64",
+    "sale_price": "float64",
+    "margin_per_unit": "float64",
+    "total_margin": "float64",
+    "creation_date": "date",
+    "nom_cli": "string",
+}
+SCHEMA = arrow_schema(FACT_COLUMNS)
+
+_FACT_SELECT = """
+    SELECT
+        ovm.order_id, ovm.tender_id, ovm.product_id, ovm.product_name, ovm.quantity,
+        ovm.cost_price::float8, ovm.sale_price::float8,
+        ovm.margin_per_unit::float8, ovm.total_margin::float8,
+        t.creation_date, c.nom_cli
+    FROM public.order_details_with_margin ovm
+    JOIN public.orders o ON o.id = ovm.order_id
+    JOIN public.products p ON p.sku_pro = ovm.product_id
+    LEFT JOIN public.tenders t ON t.id = ovm.tender_id
+    LEFT JOIN public.clientes c ON c.id_cli = t.id_cli
+"""
+
+_DELTA_WHERE = """
+    WHERE o.changed_xid >= %(since)s::xid8 OR p.changed_xid >= %(since)s::xid8
+       OR t.changed_xid >= %(since)s::xid8 OR c.changed_xid >= %(since)s::xid8
+"""
+
+
+class SnapshotStore:
+    """Versiones del snapshot en disco más un manifiesto con la marca de agua."""
+
+    def __init__(self, directory=SNAPSHOT_DIR):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.manifest_path = self.directory / "manifest.json"
+        self._lock = threading.Lock()           # versión abierta
+        self._refreshing = threading.Lock()     # un solo refresco a la vez
+        self._table = None
+        self._version = None
+        self._checked_at = 0.0
+        self.stale = False                      # el último refresco falló
+
+    # --- manifiesto ---
+
+    def manifest(self):
+        if not self.manifest_path.exists():
+            return None
+        return json.loads(self.manifest_path.read_text())
+
+    def _publish(self, filename, position, rows):
+        xmin, watermark = position
+        tmp = self.manifest_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"file": filename, "xmin": xmin, "watermark": watermark.isoformat(), "rows": rows}))
+        os.replace(tmp, self.manifest_path)
+
+    def _new_path(self):
+        return self.directory / f"facts-{time.time_ns()}.arrow"
+
+    def _cleanup(self, keep):
+        # Las versiones viejas pueden seguir mapeadas por otros procesos; en POSIX
+        # borrar el archivo no invalida esos mapeos.
+        for path in self.directory.glob("facts-*.arrow"):
+            if path.name != keep:
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+
+    # --- escritura ---
+
+    def rebuild(self, conn):
+        """Snapshot completo."""
+        path = self._new_path()
+        rows = 0
+        position = self._db_position(conn)
+        with pa.OSFile(str(path), "wb") as sink, pa.ipc.new_file(sink, SCHEMA) as writer:
+            for batch in copy_batches(conn, _FACT_SELECT, FACT_COLUMNS):
+                writer.write_batch(batch)
+                rows += batch.num_rows
+        conn.rollback()
+        self._publish(path.name, position, rows)
+        self._cleanup(keep=path.name)
+        self._prune(conn, position[0])
+        return rows
+
+    def refresh(self, conn):
+        """Refresco incremental; si no hay snapshot previo hace uno completo."""
+        manifest = self.manifest()
+        if manifest is None or "xmin" not in manifest or not (self.directory / manifest["file"]).exists():
+            return self.rebuild(conn)
+
+        since = manifest["xmin"]
+        position = self._db_position(conn)
+        if position[1] - dt.datetime.fromisoformat(manifest["watermark"]) > TOMBSTONE_RETENTION:
+            # Las lápidas de esa época ya pueden estar podadas: el delta no sería completo
+            return self.rebuild(conn)
+        delta = read_table(conn, _FACT_SELECT + _DELTA_WHERE, FACT_COLUMNS, {"since": since})
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT DISTINCT id FROM public.orders_deleted WHERE deleted_xid >= %(since)s::xid8;",
+                           {"since": since})
+            deleted = [row[0] for row in cursor.fetchall()]
+        conn.rollback()
+
+        if delta.num_rows == 0 and not deleted:
+            self._publish(manifest["file"], position, manifest["rows"])
+            self._prune(conn, since)
+            return 0
+
+        replaced = pa.array(delta.column("order_id").to_pylist() + deleted, type=pa.string())
+        old = self._open(manifest["file"])
+        path = self._new_path()
+        rows = 0
+        with pa.OSFile(str(path), "wb") as sink, pa.ipc.new_file(sink, SCHEMA) as writer:
+            for batch in old.to_batches(max_chunksize=FETCH_BATCH_ROWS):
+                kept = batch.filter(pc.invert(pc.is_in(batch.column("order_id"), value_set=replaced)))
+                if kept.num_rows:
+                    writer.write_batch(kept)
+                    rows += kept.num_rows
+            if delta.num_rows:
+                writer.write_table(delta)
+                rows += delta.num_rows
+        self._publish(path.name, position, rows)
+        self._cleanup(keep=path.name)
+        self._prune(conn, since)
+        return delta.num_rows + len(deleted)
+
+    @staticmethod
+    def _db_position(conn):
+        """
+        `(xmin, hora)`: todo lo anterior a `xmin` ya confirmó y lo ve cualquier
+        consulta posterior; lo demás se vuelve a pedir en el refresco siguiente.
+        """
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT pg_snapshot_xmin(pg_current_snapshot())::text, now();")
+            return tuple(cursor.fetchone())
+
+    @staticmethod
+    def _prune(conn, xmin):
+        """Borra las lápidas ya aplicadas (anteriores a `xmin`) que superan la retención."""
+        with conn.cursor() as cursor:
+            cursor.execute(
+                "DELETE FROM public.orders_deleted WHERE deleted_xid < %(xmin)s::xid8 AND deleted_at < now() - %(retention)s;",
+                {"xmin": xmin, "retention": TOMBSTONE_RETENTION},
+            )
+        conn.commit()
+
+    # --- lectura ---
+
+    def _open(self, filename):
+        """Abre una versión con memory-map: los buffers apuntan al archivo, sin copia."""
+        source = pa.memory_map(str(self.directory / filename), "r")
+        return pa.ipc.open_file(source).read_all()
+
+    def table(self, refresh_seconds=SNAPSHOT_REFRESH_SECONDS):
+        """
+        Tabla Arrow vigente. Cada `refresh_seconds` un hilo refresca el snapshot
+        en forma incremental mientras los demás siguen leyendo la versión abierta
+        (sólo se espera el refresco si todavía no hay ninguna).
+        """
+        if time.monotonic() - self._checked_at >= refresh_seconds:
+            if self._refreshing.acquire(blocking=self._table is None):
+                try:
+                    if time.monotonic() - self._checked_at >= refresh_seconds:
+                        self._refresh_from_db()
+                finally:
+                    self._refreshing.release()
+        with self._lock:
+            manifest = self.manifest()
+            if manifest["file"] != self._version:
+                self._table = self._open(manifest["file"])
+                self._version = manifest["file"]
+            return self._table
+
+    def _refresh_from_db(self):
+        # Si Postgres no responde se sigue sirviendo la última versión publicada
+        # y se reintenta en el próximo intervalo
+        try:
+            with connection() as conn:
+                self.refresh(conn)
+        except psycopg2.OperationalError as exc:
+            if self.manifest() is None:
+                raise
+            logging.getLogger(__name__).warning("No se pudo refrescar el snapshot, se sirve el anterior: %s", exc)
+            self.stale = True
+        else:
+            self.stale = False
+        self._checked_at = time.monotonic()
+
+
+@st.cache_resource
+def init_snapshot_store():
+    """Almacén de snapshots del proceso, compartido por todas las sesiones."""
+    cfg = secrets_section("snapshot")
+    return SnapshotStore(cfg.get("path", SNAPSHOT_DIR))
+
+
+def snapshot_enabled():
+    return bool(secrets_section("snapshot").get("enabled", False))
+
+
+def stale_warning():
+    """Avisa en la página cuando el snapshot no se pudo refrescar desde Postgres."""
+    store = init_snapshot_store()
+    manifest = store.manifest()
+    if store.stale and manifest:
+        watermark = dt.datetime.fromisoformat(manifest["watermark"])
+        st.warning(f"No se pudo conectar a la base de datos: los datos mostrados son del "
+                   f"{watermark:%d-%m-%Y %H:%M} y pueden estar desactualizados.")
+
+
+def fact_table():
+    cfg = secrets_section("snapshot")
+    return init_snapshot_store().table(int(cfg.get("refresh_seconds", SNAPSHOT_REFRESH_SECONDS)))
+
+
+# --- CONSULTAS SOBRE EL SNAPSHOT (equivalentes a las del registro de kaiken/queries.py) ---
+
+def _in_range(table, start_date, end_date):
+    mask = pc.and_(
+        pc.and_(pc.greater_equal(table["creation_date"], pa.scalar(start_date, pa.date32())),
+                pc.less_equal(table["creation_date"], pa.scalar(end_date, pa.date32()))),
+        pc.is_valid(table["nom_cli"]),
+    )
+    return table.filter(mask)
+
+
+def dashboard_bounds():
+    table = fact_table()
+    dates = table.filter(pc.is_valid(table["nom_cli"]))["creation_date"]
+    bounds = pc.min_max(dates)
+    return pd.DataFrame({"min_date": [bounds["min"].as_py()], "max_date": [bounds["max"].as_py()]})
+
+
+def dashboard_clients(start_date, end_date):
+    table = _in_range(fact_table(), start_date, end_date)
+    table = table.append_column("revenue", pc.multiply(table["sale_price"], pc.cast(table["quantity"], pa.float64())))
+    result = table.group_by("nom_cli").aggregate([
+        ("total_margin", "sum"), ("revenue", "sum"), ("tender_id", "count_distinct"),
+    ])
+    return result.to_pandas().rename(columns={
+        "total_margin_sum": "total_margin", "revenue_sum": "revenue", "tender_id_count_distinct": "num_tenders",
+    })[["nom_cli", "total_margin", "revenue", "num_tenders"]]
+
+
+def dashboard_top_products(start_date, end_date, limit=5):
+    table = _in_range(fact_table(), start_date, end_date)
+    result = table.group_by("product_name").aggregate([("total_margin", "sum")])
+    result = result.sort_by([("total_margin_sum", "descending")]).slice(0, limit)
+    return result.to_pandas().rename(columns={"total_margin_sum": "total_margin"})[["product_name", "total_margin"]]
+
+
+def dashboard_monthly(start_date, end_date):
+    table = _in_range(fact_table(), start_date, end_date)
+    month = pc.floor_temporal(pc.cast(table["creation_date"], pa.timestamp("s")), unit="month")
+    table = table.append_column("month", month).append_column(
+        "revenue", pc.multiply(table["sale_price"], pc.cast(table["quantity"], pa.float64())))
+    result = table.group_by("month").aggregate([("revenue", "sum"), ("total_margin", "sum")]).to_pandas()
+    meses = pd.date_range(pd.Timestamp(start_date).to_period("M").to_timestamp(),
+                          pd.Timestamp(end_date).to_period("M").to_timestamp(), freq="MS")
+    result = result.set_index(pd.to_datetime(result["month"]).dt.as_unit("ns")).reindex(meses.as_unit("ns"), fill_value=0)
+    return pd.DataFrame({
+        "creation_date": result.index.date,
+        "monthly_revenue": result["revenue_sum"].to_numpy(),
+        "monthly_margin": result["total_margin_sum"].to_numpy(),
+    })
+
+
+def tender_lines(tender_id):
+    table = fact_table()
+    lines = table.filter(pc.equal(table["tender_id"], tender_id)).sort_by("product_name")
+    return lines.select(["tender_id", "product_name", "quantity", "sale_price", "cost_price", "total_margin"]).to_pandas().rename(columns={
+        "tender_id": "ID Licitación", "product_name": "Producto", "quantity": "Cantidad",
+        "sale_price": "Precio Venta", "cost_price": "Costo", "total_margin": "Margen Producto",
+    })
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Snapshot Arrow de order_details_with_margin.")
+    parser.add_argument("accion", choices=["refresh", "rebuild"])
+    parser.add_argument("--dir", default=str(SNAPSHOT_DIR), help="Carpeta del snapshot")
+    parser.add_argument("--dsn", help="Cadena de conexión (por defecto KAIKEN_DATABASE_URL o secrets.toml)")
+    args = parser.parse_args(argv)
+
+    store = SnapshotStore(args.dir)
+    conn = connect(args.dsn)
+    try:
+        t0 = time.perf_counter()
+        n = store.rebuild(conn) if args.accion == "rebuild" else store.refresh(conn)
+        print(f"✅ Snapshot {args.accion}: {n} filas escritas en {time.perf_counter() - t0:.2f} s "
+              f"({store.manifest()['rows']} filas en total)")
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,115 @@
+"""
+Perfil del arranque en frío: costo de importación de cada página y de la
+inicialización de los recursos compartidos.
+
+Cada página se importa en un intérprete nuevo con `python -X importtime`, así
+que el tiempo incluye todas sus dependencias que no estén ya en el núcleo
+(Streamlit se mide aparte, como base común). La inicialización mide en este
+proceso el pool, la primera conexión, los caches y el pool de hilos.
+
+Uso:
+    python -m kaiken.startup                 # importaciones por página
+    python -m kaiken.startup --init          # más la inicialización (requiere la base)
+    python -m kaiken.startup --top 15        # paquetes más caros por página
+"""
+import argparse
+import logging
+import os
+import re
+import subprocess
+import sys
+import time
+
+BASELINE_MODULE = "streamlit"
+TOP_PACKAGES = 8
+
+_IMPORTTIME_RE = re.compile(r"^import time:\s+(\d+) \|\s+\d+ \| *(\S+)$")
+
+
+def import_profile(module):
+    """
+    Importa `module` en un intérprete nuevo y devuelve `(total_s, paquetes)`,
+    donde `paquetes` es `{paquete de primer nivel: segundos propios}`.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    packages = {}
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME_RE.match(line)
+        if match:
+            # Tiempo propio de cada módulo, sumado por paquete de primer nivel
+            top = match.group(2).split(".")[0]
+            packages[top] = packages.get(top, 0) + int(match.group(1)) / 1e6
+    return sum(packages.values()), packages
+
+
+def _timed(fn):
+    t0 = time.perf_counter()
+    try:
+        fn()
+        error = None
+    except Exception as e:
+        error = f"{type(e).__name__}: {str(e).strip().splitlines()[0]}"
+    return time.perf_counter() - t0, error
+
+
+def init_profile():
+    """Tiempo de cada paso de inicialización, como lista de `(paso, segundos, error)`."""
+    from kaiken.db import connection, init_pool, init_query_cache
+    from kaiken.fanout import init_executor
+
+    def first_query():
+        with connection() as conn, conn.cursor() as cursor:
+            cursor.execute("SELECT 1")
+
+    steps = [
+        ("init_pool", init_pool),
+        ("primera conexión", first_query),
+        ("init_query_cache", init_query_cache),
+        ("init_executor", init_executor),
+    ]
+    return [(name, *_timed(fn)) for name, fn in steps]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Perfil de importación e inicialización de la aplicación.")
+    parser.add_argument("--init", action="store_true", help="Mide también la inicialización del pool y los caches")
+    parser.add_argument("--top", type=int, default=TOP_PACKAGES, help="Paquetes más caros a mostrar por página")
+    parser.add_argument("--dsn", help="Cadena de conexión (por defecto KAIKEN_DATABASE_URL o secrets.toml)")
+    args = parser.parse_args(argv)
+
+    from kaiken.pages import PAGES
+
+    base, _ = import_profile(BASELINE_MODULE)
+    print(f"{'(base) ' + BASELINE_MODULE:<32} {base * 1000:>8.0f} ms")
+    for page, module in PAGES.items():
+        try:
+            total, packages = import_profile(module)
+        except RuntimeError as e:
+            print(f"{page:<32} error: {e}")
+            continue
+        print(f"{page:<32} {total * 1000:>8.0f} ms  (+{(total - base) * 1000:.0f} ms sobre la base)")
+        ranked = sorted(packages.items(), key=lambda item: item[1], reverse=True)
+        for name, seconds in ranked[:args.top]:
+            print(f"    {name:<28} {seconds * 1000:>8.0f} ms")
+
+    if args.init:
+        if args.dsn:
+            os.environ["KAIKEN_DATABASE_URL"] = args.dsn
+        # Fuera de `streamlit run` cada llamada a st.cache_resource avisa que no hay sesión
+        logging.getLogger("streamlit.runtime.scriptrunner_utils.script_run_context").setLevel(logging.ERROR)
+        print()
+        failed = False
+        for name, seconds, error in init_profile():
+            print(f"{name:<32} {seconds * 1000:>8.1f} ms" + (f"  {error}" if error else ""))
+            failed = failed or error is not None
+        return 1 if failed else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,506 @@
+"""
+Sincronización incremental desde los webhooks de origen (órdenes, productos y licitaciones).
+
+Reemplaza la descarga secuencial de `scripts/01.Datos de Muestra.ipynb`:
+
+  * Las tres fuentes se descargan en paralelo sobre una misma `requests.Session`
+    (conexiones reutilizadas), con reintentos y backoff exponencial ante errores
+    de red, 429 y 5xx, incluidos los cortes a mitad de la respuesta.
+  * El arreglo JSON se parsea en streaming, registro a registro, y se escribe a
+    un archivo JSON Lines temporal: la memoria no depende del tamaño del payload.
+  * Se envían `If-None-Match` / `If-Modified-Since` con el ETag y la fecha de la
+    última respuesta (304 = sin cambios) y, en las fuentes con un campo de
+    cursor, `?since=<último valor visto>`. Además se guarda un hash de cada
+    registro, así que sólo los registros nuevos o modificados llegan a la base.
+  * La carga reutiliza la limpieza y el upsert por COPY de kaiken/ingest.py, en
+    orden referencial (productos, licitaciones, órdenes) a medida que terminan
+    las descargas.
+
+El estado (ETag, cursor y hashes) queda en `.cache/sync/` y sólo se actualiza
+después de cargar cada fuente. Los registros que la ingesta rechaza (p. ej.
+una licitación de un cliente que no existe en la base, o una orden de una
+licitación desconocida) se informan en el resumen y no se reintentan hasta una
+corrida con `--completo`.
+
+`serve` levanta un servidor HTTP local que imita los webhooks a partir de los
+CSV de `scripts/data`, con ETag, `?since=` y fallas inyectadas para probar los
+reintentos.
+
+Uso:
+    python -m kaiken.sync run [--base-url URL] [--completo] [--crear-clientes]
+    python -m kaiken.sync serve [--dir scripts/data] [--port 8765] [--fallas 0.2] [--cortes 0.1]
+    python -m kaiken.sync run --base-url http://127.0.0.1:8765/webhook
+"""
+import argparse
+import codecs
+import csv
+import hashlib
+import json
+import os
+import random
+import re
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import NamedTuple
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+BASE_URL = "https://kaiken.up.railway.app/webhook"
+# Fuente -> ruta del webhook, en orden referencial de carga
+ENDPOINTS = {
+    "products": "product-sample",
+    "tenders": "tender-sample",
+    "orders": "order-sample",
+}
+# Campos que permiten pedir sólo lo modificado desde la última corrida (?since=)
+CURSOR_FIELDS = {"products": "updated_at"}
+
+SYNC_DIR = Path(".cache") / "sync"
+HTTP_TIMEOUT = (5, 60)          # segundos de conexión y de lectura
+HTTP_RETRIES = 5
+HTTP_BACKOFF = 0.5              # 0.5, 1, 2, 4... segundos entre reintentos
+STREAM_CHUNK = 1 << 16          # bytes por lectura del cuerpo
+
+_WHITESPACE = re.compile(r"\s*")
+_DECODER = json.JSONDecoder()
+
+
+# --- PARSEO EN STREAMING ---
+
+class _TextStream:
+    """Buffer de texto que se rellena desde un iterador de trozos a medida que se consume."""
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def more(self):
+        chunk = next(self._chunks, None)
+        if chunk is None:
+            self.eof = True
+            return False
+        # Se descarta lo ya consumido para que el buffer no crezca con el payload
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """Siguiente carácter que no es espacio ("" al final del texto)."""
+        while True:
+            self.pos = _WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.more():
+                return ""
+
+    def value(self):
+        """Decodifica el siguiente valor JSON completo, leyendo más texto si hace falta."""
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if not self.more():
+                    raise
+                continue
+            # Un número al final del buffer puede seguir en el próximo trozo
+            if end == len(self.buf) and isinstance(value, (int, float)) and self.more():
+                continue
+            self.pos = end
+            return value
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"JSON inválido: se esperaba {char!r} en la posición {self.pos}")
+        self.pos += 1
+
+
+def _array_items(stream):
+    stream.expect("[")
+    while True:
+        char = stream.peek()
+        if char == "]":
+            stream.pos += 1
+            return
+        if char == ",":
+            stream.pos += 1
+            continue
+        if char == "":
+            raise ValueError("JSON inválido: el arreglo no se cerró")
+        yield stream.value()
+
+
+def iter_records(chunks):
+    """
+    Registros de un payload JSON recibido por trozos de texto, con las mismas
+    reglas que `to_dataframe` del notebook: un arreglo son los registros; en un
+    objeto, la primera lista que contenga; un objeto sin listas es un registro.
+    """
+    stream = _TextStream(chunks)
+    first = stream.peek()
+    if first == "[":
+        yield from _array_items(stream)
+    elif first == "{":
+        stream.pos += 1
+        flat = {}
+        while True:
+            char = stream.peek()
+            if char == "}":
+                yield flat
+                return
+            if char == ",":
+                stream.pos += 1
+                continue
+            key = stream.value()
+            stream.expect(":")
+            if stream.peek() == "[":
+                yield from _array_items(stream)
+                return
+            flat[key] = stream.value()
+    elif first:
+        raise ValueError(f"JSON inválido: se esperaba un arreglo u objeto y llegó {first!r}")
+
+
+def flatten(record, prefix=""):
+    """Aplana objetos anidados con claves `a.b`, como `pd.json_normalize`."""
+    flat = {}
+    for key, value in record.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{name}."))
+        else:
+            flat[name] = value
+    return flat
+
+
+def record_hash(record):
+    canonical = json.dumps(record, sort_keys=True, ensure_ascii=False, default=str)
+    return int.from_bytes(hashlib.blake2b(canonical.encode(), digest_size=8).digest(), "little")
+
+
+# --- ESTADO ENTRE CORRIDAS ---
+
+class SyncState:
+    """ETag, fecha, cursor y hashes de registros de cada fuente, en `directory`."""
+
+    def __init__(self, directory=SYNC_DIR):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / "state.json"
+        self.sources = json.loads(path.read_text()) if path.exists() else {}
+
+    def hashes(self, name):
+        path = self.directory / f"{name}.hashes.npy"
+        return set(np.load(path).tolist()) if path.exists() else set()
+
+    def save(self, name, source_state, hashes):
+        """Persiste el estado de `name` de forma atómica (llamar después de cargar)."""
+        tmp = self.directory / f"{name}.hashes.tmp.npy"
+        np.save(tmp, np.fromiter(hashes, dtype=np.uint64, count=len(hashes)))
+        os.replace(tmp, self.directory / f"{name}.hashes.npy")
+        self.sources[name] = source_state
+        tmp = self.directory / "state.json.tmp"
+        tmp.write_text(json.dumps(self.sources, indent=2, ensure_ascii=False))
+        os.replace(tmp, self.directory / "state.json")
+
+
+# --- DESCARGA ---
+
+class FetchResult(NamedTuple):
+    name: str
+    status: str                 # "ok" o "sin cambios" (304)
+    total: int                  # registros recibidos
+    changed: int                # registros nuevos o modificados (los del spool)
+    spool: Path
+    state: dict
+    hashes: set
+    seconds: float
+
+
+def http_session(retries=HTTP_RETRIES, backoff=HTTP_BACKOFF, pool_size=len(ENDPOINTS)):
+    """Sesión con conexiones persistentes y reintentos con backoff para GET."""
+    retry = Retry(
+        total=retries, connect=retries, read=retries, status=retries, backoff_factor=backoff,
+        status_forcelist=(429, 500, 502, 503, 504), allowed_methods=frozenset({"GET"}),
+        respect_retry_after_header=True, raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def _text_chunks(response):
+    decoder = codecs.getincrementaldecoder(response.encoding or "utf-8")(errors="replace")
+    for chunk in response.iter_content(STREAM_CHUNK):
+        yield decoder.decode(chunk)
+    yield decoder.decode(b"", final=True)
+
+
+def _fetch_once(session, name, url, source_state, previous, spool, full):
+    headers, params = {}, {}
+    cursor_field = CURSOR_FIELDS.get(name)
+    if not full:
+        if source_state.get("etag"):
+            headers["If-None-Match"] = source_state["etag"]
+        if source_state.get("last_modified"):
+            headers["If-Modified-Since"] = source_state["last_modified"]
+        if cursor_field and source_state.get("cursor"):
+            params["since"] = source_state["cursor"]
+
+    t0 = time.perf_counter()
+    with session.get(url, headers=headers, params=params, stream=True, timeout=HTTP_TIMEOUT) as response:
+        if response.status_code == 304:
+            return FetchResult(name, "sin cambios", 0, 0, spool, source_state, previous, time.perf_counter() - t0)
+        response.raise_for_status()
+
+        seen, total, changed = set(), 0, 0
+        cursor = source_state.get("cursor") if not full else None
+        with spool.open("w", encoding="utf-8") as out:
+            for record in iter_records(_text_chunks(response)):
+                if not isinstance(record, dict):
+                    continue
+                record = flatten(record)
+                digest = record_hash(record)
+                seen.add(digest)
+                total += 1
+                if cursor_field and record.get(cursor_field) is not None:
+                    cursor = max(cursor or "", str(record[cursor_field]))
+                if digest in previous:
+                    continue
+                out.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+                changed += 1
+        state = {
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "cursor": cursor,
+        }
+    # Con ?since= la respuesta es parcial: los hashes anteriores siguen vigentes
+    hashes = previous | seen if params else seen
+    return FetchResult(name, "ok", total, changed, spool, state, hashes, time.perf_counter() - t0)
+
+
+def fetch(session, name, url, state, full=False, retries=HTTP_RETRIES, backoff=HTTP_BACKOFF):
+    """
+    Descarga la fuente `name` a un JSON Lines con sólo los registros cambiados.
+    Los errores antes de la respuesta los reintenta la sesión; los cortes a
+    mitad del cuerpo se reintentan aquí, descargando de nuevo.
+    """
+    source_state = state.sources.get(name, {})
+    previous = set() if full else state.hashes(name)
+    spool = state.directory / f"{name}.jsonl"
+    for attempt in range(retries + 1):
+        try:
+            return _fetch_once(session, name, url, source_state, previous, spool, full)
+        except (requests.exceptions.ChunkedEncodingError, requests.exceptions.ConnectionError,
+                requests.exceptions.Timeout, ValueError):
+            if attempt == retries:
+                raise
+            time.sleep(backoff * 2 ** attempt)
+
+
+# --- CARGA ---
+
+def run(base_url=BASE_URL, dsn=None, full=False, state_dir=SYNC_DIR, crear_clientes=False, log=print):
+    """
+    Descarga las fuentes en paralelo y carga en la base los registros cambiados,
+    en orden referencial a medida que terminan. Devuelve un resumen por fuente.
+    Las licitaciones de clientes que no existen se rechazan, salvo con
+    `crear_clientes` (ver `ForeignKeyIndex.new_clients`).
+    """
+    from kaiken.db import connect
+    from kaiken.ingest import ForeignKeyIndex, ingest_orders, ingest_products, ingest_tenders
+
+    loaders = {
+        "products": lambda conn, path, index: ingest_products(conn, path, index),
+        "tenders": lambda conn, path, index: ingest_tenders(conn, path, index, crear_clientes=crear_clientes),
+        "orders": lambda conn, path, index: ingest_orders(conn, path, index),
+    }
+    state = SyncState(state_dir)
+    resumen = []
+    with http_session() as session, ThreadPoolExecutor(max_workers=len(ENDPOINTS)) as executor:
+        futures = {
+            name: executor.submit(fetch, session, name, f"{base_url.rstrip('/')}/{path}", state, full)
+            for name, path in ENDPOINTS.items()
+        }
+        conn = connect(dsn)
+        try:
+            index = ForeignKeyIndex(conn)
+            conn.commit()
+            for name in ENDPOINTS:
+                result = futures[name].result()
+                cargadas = rechazadas = 0
+                if result.changed:
+                    r = loaders[name](conn, result.spool, index)
+                    cargadas, rechazadas = r["cargadas"], r["rechazadas"]
+                if result.status == "ok":
+                    state.save(name, result.state, result.hashes)
+                result.spool.unlink(missing_ok=True)
+                resumen.append({
+                    "fuente": name, "estado": result.status, "recibidos": result.total,
+                    "cambiados": result.changed, "cargadas": cargadas, "rechazadas": rechazadas,
+                    "descarga_s": round(result.seconds, 2),
+                })
+                log(f"✅ {name}: {result.status}, {result.total} recibidos, {result.changed} cambiados, "
+                    f"{cargadas} cargados, {rechazadas} rechazados ({result.seconds:.2f} s de descarga)")
+        finally:
+            conn.close()
+    return resumen
+
+
+# --- SERVIDOR LOCAL DE PRUEBA ---
+
+# Ruta del webhook -> CSV de scripts/data con el mismo contenido
+SAMPLE_FILES = {
+    "product-sample": "product_sample.csv",
+    "tender-sample": "tender_sample.csv",
+    "order-sample": "order_sample.csv",
+}
+SAMPLE_CURSORS = {"product-sample": "updated_at"}
+
+
+class SampleHandler(BaseHTTPRequestHandler):
+    """
+    Imita los webhooks: arreglo JSON en chunks, ETag / Last-Modified, `?since=`
+    y fallas inyectadas. `server.hits` cuenta los pedidos por ruta.
+    """
+
+    protocol_version = "HTTP/1.1"      # conexiones persistentes y transferencia en chunks
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send_chunk(self, data):
+        self.wfile.write(f"{len(data):X}\r\n".encode() + data + b"\r\n")
+
+    def _not_modified(self, etag, mtime):
+        """If-None-Match tiene precedencia sobre If-Modified-Since (RFC 9110)."""
+        if_none_match = self.headers.get("If-None-Match")
+        if if_none_match is not None:
+            return if_none_match == etag
+        if_modified_since = self.headers.get("If-Modified-Since")
+        if not if_modified_since:
+            return False
+        try:
+            return int(mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        slug = url.path.rstrip("/").rsplit("/", 1)[-1]
+        if slug not in SAMPLE_FILES:
+            self.send_error(404)
+            return
+        server = self.server
+        server.hits[slug] += 1
+        if server.delay:
+            time.sleep(server.delay)
+        if random.random() < server.fail_rate:
+            self.send_response(503)
+            self.send_header("Retry-After", "0")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        path = server.directory / SAMPLE_FILES[slug]
+        stat = path.stat()
+        etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+        last_modified = formatdate(stat.st_mtime, usegmt=True)
+        since = parse_qs(url.query).get("since", [None])[0]
+        if since is None and self._not_modified(etag, stat.st_mtime):
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Last-Modified", last_modified)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", last_modified)
+        self.end_headers()
+
+        cut = random.random() < server.cut_rate
+        cursor_field = SAMPLE_CURSORS.get(slug)
+        with path.open(newline="", encoding="utf-8") as f:
+            rows = csv.DictReader(f, delimiter=";")
+            self._send_chunk(b"[")
+            sent = 0
+            for row in rows:
+                if since and cursor_field and (row.get(cursor_field) or "") <= since:
+                    continue
+                record = {key: (value if value != "" else None) for key, value in row.items()}
+                self._send_chunk((b"," if sent else b"") + json.dumps(record, ensure_ascii=False).encode())
+                sent += 1
+                if cut and sent >= 2:
+                    # Corte a mitad del cuerpo: el cliente debe reintentar
+                    self.close_connection = True
+                    return
+            self._send_chunk(b"]")
+        self.wfile.write(b"0\r\n\r\n")
+
+
+def make_server(directory="scripts/data", host="127.0.0.1", port=8765, fail_rate=0.0, cut_rate=0.0, delay=0.0,
+                verbose=False):
+    """Servidor de prueba (sin iniciar); `port=0` elige un puerto libre."""
+    server = ThreadingHTTPServer((host, port), SampleHandler)
+    server.daemon_threads = True
+    server.directory = Path(directory)
+    server.hits = Counter()
+    server.fail_rate, server.cut_rate, server.delay, server.verbose = fail_rate, cut_rate, delay, verbose
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sincronización incremental desde los webhooks de origen.")
+    parser.add_argument("accion", choices=["run", "serve"])
+    parser.add_argument("--base-url", help=f"URL base de los webhooks (por defecto [sync] base_url o {BASE_URL})")
+    parser.add_argument("--completo", action="store_true", help="Ignora ETags, cursores y hashes: recarga todo")
+    parser.add_argument("--crear-clientes", action="store_true",
+                        help="Crea los clientes de las licitaciones que no existan (sólo con RUT válido)")
+    parser.add_argument("--estado", default=str(SYNC_DIR), help="Carpeta del estado entre corridas")
+    parser.add_argument("--dsn", help="Cadena de conexión (por defecto KAIKEN_DATABASE_URL o secrets.toml)")
+    parser.add_argument("--dir", default="scripts/data", help="serve: carpeta con los CSV de muestra")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--fallas", type=float, default=0.0, help="serve: fracción de respuestas 503")
+    parser.add_argument("--cortes", type=float, default=0.0, help="serve: fracción de respuestas cortadas a la mitad")
+    parser.add_argument("--retraso", type=float, default=0.0, help="serve: segundos de latencia por respuesta")
+    args = parser.parse_args(argv)
+
+    if args.accion == "serve":
+        server = make_server(args.dir, args.host, args.port, args.fallas, args.cortes, args.retraso, verbose=True)
+        print(f"Sirviendo {args.dir} en http://{args.host}:{server.server_port}/webhook/ (Ctrl+C para terminar)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+        return 0
+
+    base_url = args.base_url
+    if base_url is None:
+        from kaiken.db import secrets_section
+        base_url = secrets_section("sync").get("base_url", BASE_URL)
+    run(base_url, dsn=args.dsn, full=args.completo, state_dir=args.estado, crear_clientes=args.crear_clientes)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
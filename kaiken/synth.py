@@ -0,0 +1,244 @@
+"""
+Generador de datos sintéticos a escala, a partir de las muestras de scripts/data.
+
+Escala las muestras limpias con distribuciones realistas:
+- tamaño de clientes con ley de Pareto (pocos clientes concentran la mayoría de
+  las licitaciones) y popularidad de productos tipo Zipf;
+- `creation_date` estacional (baja en verano, alzas en marzo-mayo y octubre-noviembre);
+- RUT siempre válidos y precio de venta siempre mayor al costo.
+
+Los datos se generan por bloques y se cargan con COPY en el Postgres indicado.
+
+Uso:
+    python -m kaiken.synth --escala m --reset [--rapido] [--dsn postgresql://localhost/kaiken]
+    python -m kaiken.synth --clientes 10000 --productos 100000 --ordenes 10000000 --reset
+"""
+import argparse
+import calendar
+import io
+import sys
+import time
+from pathlib import Path
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from kaiken.db import connect
+from kaiken.ingest import COLUMNS, copy_upsert
+from kaiken.rut import digitos_verificadores
+
+SAMPLES_DIR = Path(__file__).resolve().parent.parent / "scripts" / "data"
+
+
+class Scale(NamedTuple):
+    clientes: int
+    productos: int
+    ordenes: int
+
+
+SCALES = {
+    "xs": Scale(100, 1_000, 10_000),
+    "s": Scale(1_000, 10_000, 100_000),
+    "m": Scale(10_000, 100_000, 1_000_000),
+    "l": Scale(10_000, 100_000, 10_000_000),
+}
+
+LINES_PER_TENDER = 8            # promedio de órdenes por licitación
+PARETO_ALPHA = 1.16             # ~80/20
+ZIPF_EXPONENT = 0.8             # popularidad de productos
+# Peso relativo de cada mes (enero..diciembre) en la fecha de creación
+SEASONALITY = np.array([0.5, 0.6, 1.2, 1.3, 1.2, 1.0, 0.9, 0.9, 1.0, 1.2, 1.3, 0.9])
+START_YEAR = 2023
+YEARS = 3
+TENDERS_PER_CHUNK = 20_000
+
+
+def load_samples(directory=SAMPLES_DIR):
+    """Nombres, direcciones y costos de las muestras, para que los datos se parezcan a los reales."""
+    directory = Path(directory)
+    clientes = pd.read_csv(directory / "clientes_sample.csv", sep=";", dtype=str, keep_default_na=False)
+    products = pd.read_csv(directory / "product_sample_clean.csv", sep=";", dtype=str, keep_default_na=False)
+    tenders = pd.read_csv(directory / "tender_sample_clean.csv", sep=";", dtype=str, keep_default_na=False)
+    return {
+        "nom_cli": clientes["nom_cli"].to_numpy(),
+        "dir_cli": clientes["dir_cli"].to_numpy(),
+        "nom_pro": products["nom_pro"].to_numpy(),
+        "cost_prp": pd.to_numeric(products["cost_prp"], errors="coerce").dropna().to_numpy(),
+        "margin": pd.to_numeric(tenders["margin"], errors="coerce").dropna().to_numpy(),
+    }
+
+
+# --- GENERADORES ---
+
+def generar_clientes(n, rng, samples):
+    cuerpos = rng.integers(1_000_000, 99_999_999, size=n)
+    nombres = rng.choice(samples["nom_cli"], size=n)
+    return pd.DataFrame({
+        "id_cli": np.arange(1, n + 1),
+        "rut_cli": pd.Series(cuerpos).astype(str) + "-" + digitos_verificadores(cuerpos),
+        "nom_cli": pd.Series(nombres) + " " + pd.Series(np.arange(1, n + 1)).astype(str).str.zfill(6),
+        "dir_cli": rng.choice(samples["dir_cli"], size=n),
+        "tel_cli": pd.Series(rng.integers(56_900_000_000, 56_999_999_999, size=n)).astype(str),
+        "cor_cli": [f"cliente{i}@example.cl" for i in range(1, n + 1)],
+        "con_cli": "",
+    })
+
+
+def generar_productos(n, rng, samples):
+    # Costos log-normales centrados en la mediana de la muestra
+    mediana = float(np.median(samples["cost_prp"])) if len(samples["cost_prp"]) else 10_000.0
+    cost = np.maximum(np.round(rng.lognormal(np.log(mediana), 1.0, size=n), 2), 1.0)
+    hoy = pd.Timestamp.today().normalize().date()
+    return pd.DataFrame({
+        "sku_pro": (2_000_000_000_000 + np.arange(n)).astype(str),
+        "row_number": np.arange(2, n + 2),
+        "nom_pro": pd.Series(rng.choice(samples["nom_pro"], size=n)) + " " + pd.Series(np.arange(n)).astype(str),
+        "desc_pro": "",
+        "cost_prp": cost,
+        "stock": rng.integers(0, 500, size=n),
+        "cre_pro": hoy,
+        "upd_pro": hoy,
+    })
+
+
+def fechas_estacionales(n, rng, start_year=START_YEAR, years=YEARS):
+    """Fechas con año uniforme, mes según `SEASONALITY` y día uniforme dentro del mes."""
+    year = start_year + rng.integers(0, years, size=n)
+    month = 1 + rng.choice(12, size=n, p=SEASONALITY / SEASONALITY.sum())
+    dias = np.array([[calendar.monthrange(y, m)[1] for m in range(1, 13)] for y in range(start_year, start_year + years)])
+    day = 1 + (rng.random(n) * dias[year - start_year, month - 1]).astype(np.int64)
+    return pd.to_datetime(pd.DataFrame({"year": year, "month": month, "day": day}))
+
+
+def generar_licitaciones(n, n_clientes, rng, samples):
+    # Peso de cada cliente ~ Pareto: pocos clientes concentran la mayoría de las licitaciones
+    pesos = rng.pareto(PARETO_ALPHA, size=n_clientes) + 1
+    id_cli = 1 + rng.choice(n_clientes, size=n, p=pesos / pesos.sum())
+    creation = fechas_estacionales(n, rng)
+    margen = samples["margin"] if len(samples["margin"]) else np.array([0.4])
+    yy = creation.dt.year % 100
+    return pd.DataFrame({
+        "id": [f"{1000 + i // 1000}-{i % 1000}-LE{y:02d}" for i, y in enumerate(yy)],
+        "row_number": np.arange(2, n + 2),
+        "id_cli": id_cli,
+        "creation_date": creation.dt.date,
+        "delivery_date": (creation + pd.to_timedelta(rng.integers(7, 61, size=n), unit="D")).dt.date,
+        "margin": np.round(rng.choice(margen, size=n) * rng.uniform(0.5, 1.25, size=n), 3),
+    })
+
+
+def generar_ordenes(tenders, products, rng, popularidad):
+    """Líneas de un bloque de licitaciones; el precio siempre queda sobre el costo."""
+    lineas = 1 + rng.poisson(LINES_PER_TENDER - 1, size=len(tenders))
+    fila = np.repeat(np.arange(len(tenders)), lineas)
+    producto = rng.choice(len(products), size=len(fila), p=popularidad)
+    df = pd.DataFrame({"fila": fila, "producto": producto}).drop_duplicates()
+
+    tender_id = tenders["id"].to_numpy()[df["fila"].to_numpy()]
+    sku = products["sku_pro"].to_numpy()[df["producto"].to_numpy()]
+    cost = products["cost_prp"].to_numpy()[df["producto"].to_numpy()]
+    margen = tenders["margin"].to_numpy()[df["fila"].to_numpy()]
+    price = np.maximum(np.round(cost * (1 + margen * rng.uniform(0.5, 1.5, size=len(df))), 2), cost + 0.01)
+    return pd.DataFrame({
+        "id": pd.Series(tender_id) + "-" + pd.Series(sku),
+        "row_number": np.arange(2, len(df) + 2),
+        "tender_id": tender_id,
+        "product_id": sku,
+        "quantity": rng.geometric(0.3, size=len(df)),
+        "price": np.round(price, 2),
+        "observation": "",
+    })
+
+
+# --- CARGA ---
+
+def copy_insert(conn, table, df):
+    """COPY directo a `public.<table>` (sin staging ni upsert), para una base recién vaciada."""
+    buf = io.StringIO()
+    df[COLUMNS[table]].to_csv(buf, index=False, header=False, na_rep="")
+    buf.seek(0)
+    with conn.cursor() as cursor:
+        cursor.copy_expert(f"COPY public.{table} ({', '.join(COLUMNS[table])}) FROM STDIN WITH (FORMAT csv)", buf)
+    conn.commit()
+    return len(df)
+
+
+def cargar(conn, scale, seed=0, reset=False, rapido=False, samples_dir=SAMPLES_DIR, log=print):
+    """
+    Genera y carga `scale`. Con `rapido` se desactivan triggers y llaves foráneas
+    durante la carga (`session_replication_role = replica`, requiere superusuario)
+    y al final se reconstruyen los rollups; si no, todo pasa por el upsert y los
+    triggers normales de kaiken/ingest.py.
+    Devuelve `{tabla: filas}`.
+    """
+    rng = np.random.default_rng(seed)
+    samples = load_samples(samples_dir)
+    escribir = copy_insert if rapido else copy_upsert
+    conteos = {}
+
+    with conn.cursor() as cursor:
+        if reset:
+            cursor.execute("TRUNCATE public.orders, public.tenders, public.products, public.clientes CASCADE;")
+        if rapido:
+            cursor.execute("SET session_replication_role = replica;")
+    conn.commit()
+
+    t0 = time.perf_counter()
+    conteos["clientes"] = escribir(conn, "clientes", generar_clientes(scale.clientes, rng, samples))
+    products = generar_productos(scale.productos, rng, samples)
+    conteos["products"] = escribir(conn, "products", products)
+    log(f"  clientes y productos: {time.perf_counter() - t0:.1f} s")
+
+    rank = rng.permutation(scale.productos) + 1
+    popularidad = 1.0 / rank ** ZIPF_EXPONENT
+    popularidad /= popularidad.sum()
+
+    n_tenders = max(1, scale.ordenes // LINES_PER_TENDER)
+    tenders = generar_licitaciones(n_tenders, scale.clientes, rng, samples)
+    conteos["tenders"] = escribir(conn, "tenders", tenders)
+    conteos["orders"] = 0
+    for start in range(0, n_tenders, TENDERS_PER_CHUNK):
+        bloque = tenders.iloc[start:start + TENDERS_PER_CHUNK]
+        conteos["orders"] += escribir(conn, "orders", generar_ordenes(bloque, products, rng, popularidad))
+        log(f"  órdenes: {conteos['orders']:,} ({time.perf_counter() - t0:.1f} s)")
+
+    with conn.cursor() as cursor:
+        if rapido:
+            cursor.execute("SET session_replication_role = DEFAULT;")
+        # TRUNCATE y la carga sin triggers no pasan por los rollups (sql/10)
+        cursor.execute("SELECT to_regproc('public.rollups_rebuild') IS NOT NULL;")
+        if (reset or rapido) and cursor.fetchone()[0]:
+            cursor.execute("SELECT public.rollups_rebuild();")
+        cursor.execute("ANALYZE public.clientes, public.products, public.tenders, public.orders;")
+    conn.commit()
+    return conteos
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Genera y carga datos sintéticos a escala.")
+    parser.add_argument("--escala", choices=sorted(SCALES), default="s", help="Tamaño predefinido")
+    parser.add_argument("--clientes", type=int, help="Sobrescribe la cantidad de clientes de la escala")
+    parser.add_argument("--productos", type=int, help="Sobrescribe la cantidad de productos de la escala")
+    parser.add_argument("--ordenes", type=int, help="Sobrescribe la cantidad (aproximada) de órdenes")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--reset", action="store_true", help="Vacía clientes, productos, licitaciones y órdenes antes de cargar")
+    parser.add_argument("--rapido", action="store_true", help="Carga sin triggers ni llaves foráneas (requiere superusuario)")
+    parser.add_argument("--dsn", help="Cadena de conexión (por defecto KAIKEN_DATABASE_URL o secrets.toml)")
+    args = parser.parse_args(argv)
+
+    base = SCALES[args.escala]
+    scale = Scale(args.clientes or base.clientes, args.productos or base.productos, args.ordenes or base.ordenes)
+    conn = connect(args.dsn)
+    try:
+        t0 = time.perf_counter()
+        conteos = cargar(conn, scale, seed=args.seed, reset=args.reset, rapido=args.rapido)
+    finally:
+        conn.close()
+    print(f"✅ Carga sintética en {time.perf_counter() - t0:.1f} s: "
+          + ", ".join(f"{tabla} {n:,}" for tabla, n in conteos.items()))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,36 @@
+-- Notifica a la aplicación cada vez que cambia una tabla, para que invalide
+-- sólo las consultas cacheadas que dependen de ella (ver kaiken/cache.py).
+-- El payload de la notificación es el nombre de la tabla modificada.
+CREATE OR REPLACE FUNCTION public.notify_table_changed()
+RETURNS TRIGGER AS $$
+BEGIN
+  PERFORM pg_notify('kaiken_table_changed', TG_TABLE_NAME);
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Triggers a nivel de sentencia: una sola notificación por INSERT/UPDATE/DELETE,
+-- sin importar cuántas filas afecte
+DROP TRIGGER IF EXISTS trg_notify_clientes ON public.clientes;
+CREATE TRIGGER trg_notify_clientes
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON public.clientes
+FOR EACH STATEMENT
+EXECUTE FUNCTION public.notify_table_changed();
+
+DROP TRIGGER IF EXISTS trg_notify_products ON public.products;
+CREATE TRIGGER trg_notify_products
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON public.products
+FOR EACH STATEMENT
+EXECUTE FUNCTION public.notify_table_changed();
+
+DROP TRIGGER IF EXISTS trg_notify_tenders ON public.tenders;
+CREATE TRIGGER trg_notify_tenders
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON public.tenders
+FOR EACH STATEMENT
+EXECUTE FUNCTION public.notify_table_changed();
+
+DROP TRIGGER IF EXISTS trg_notify_orders ON public.orders;
+CREATE TRIGGER trg_notify_orders
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON public.orders
+FOR EACH STATEMENT
+EXECUTE FUNCTION public.notify_table_changed();
@@ -0,0 +1,10 @@
+-- Índices para la búsqueda de licitaciones (ver kaiken/search.py)
+
+-- Búsqueda por "contiene" (ILIKE '%texto%') sobre ID de licitación y nombre de cliente
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX IF NOT EXISTS idx_tenders_id_trgm     ON public.tenders  USING gin (id gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_clientes_nom_trgm   ON public.clientes USING gin (nom_cli gin_trgm_ops);
+
+-- Paginación por keyset: ORDER BY creation_date DESC, id DESC con (creation_date, id) < (...)
+CREATE INDEX IF NOT EXISTS idx_tenders_keyset      ON public.tenders (creation_date DESC, id DESC);
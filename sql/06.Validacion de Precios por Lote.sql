@@ -0,0 +1,44 @@
+-- Reemplaza la validación fila a fila de 02.Reglas del Negocio.sql por una
+-- validación a nivel de sentencia: se revisan todas las filas insertadas o
+-- actualizadas de una vez, con un solo JOIN contra 'products' por lote.
+
+CREATE OR REPLACE FUNCTION public.check_price_vs_cost_batch()
+RETURNS TRIGGER AS $$
+DECLARE
+  bad record;
+BEGIN
+  -- Primera fila del lote cuyo precio de venta no supera el costo del producto
+  SELECT n.product_id, n.price, p.cost_prp
+  INTO bad
+  FROM new_rows n
+  JOIN public.products p ON p.sku_pro = n.product_id
+  WHERE n.price <= p.cost_prp
+  LIMIT 1;
+
+  IF FOUND THEN
+    RAISE EXCEPTION 'El precio de venta (%) del producto % no puede ser menor o igual al costo del producto (%).',
+      bad.price, bad.product_id, bad.cost_prp;
+  END IF;
+
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- El trigger por fila ya no es necesario
+DROP TRIGGER IF EXISTS trg_check_price_on_orders ON public.orders;
+
+-- Postgres no permite tablas de transición en triggers con más de un evento,
+-- por eso hay uno para INSERT y otro para UPDATE
+DROP TRIGGER IF EXISTS trg_check_price_on_orders_insert ON public.orders;
+CREATE TRIGGER trg_check_price_on_orders_insert
+AFTER INSERT ON public.orders
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION public.check_price_vs_cost_batch();
+
+DROP TRIGGER IF EXISTS trg_check_price_on_orders_update ON public.orders;
+CREATE TRIGGER trg_check_price_on_orders_update
+AFTER UPDATE ON public.orders
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION public.check_price_vs_cost_batch();
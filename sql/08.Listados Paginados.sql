@@ -0,0 +1,11 @@
+-- Índices para los listados paginados de clientes y productos (ver kaiken/listing.py)
+-- Requiere la extensión pg_trgm (05.Busqueda de Licitaciones.sql)
+
+-- Paginación por keyset: ORDER BY nombre, pk con (nombre, pk) > (...)
+CREATE INDEX IF NOT EXISTS idx_clientes_keyset     ON public.clientes (nom_cli, id_cli);
+CREATE INDEX IF NOT EXISTS idx_products_keyset     ON public.products (nom_pro, sku_pro);
+
+-- Filtro por "contiene" (ILIKE '%texto%')
+CREATE INDEX IF NOT EXISTS idx_clientes_rut_trgm   ON public.clientes USING gin (rut_cli gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_products_nom_trgm   ON public.products USING gin (nom_pro gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_products_sku_trgm   ON public.products USING gin (sku_pro gin_trgm_ops);
@@ -0,0 +1,75 @@
+-- Seguimiento de cambios para refrescar en forma incremental el snapshot de
+-- order_details_with_margin (ver kaiken/snapshot.py): cada fila registra la
+-- transacción que la modificó por última vez y los borrados de órdenes quedan
+-- en una tabla de "lápidas".
+--
+-- La marca de agua del snapshot es el xmin de una instantánea (la transacción
+-- más antigua todavía en curso), no una hora: una transacción larga que confirma
+-- tarde tiene un id >= esa marca y el refresco siguiente la recoge igual. Con
+-- now() (hora de inicio de la transacción) esas filas se perdían para siempre.
+
+ALTER TABLE public.clientes ADD COLUMN IF NOT EXISTS changed_at timestamptz NOT NULL DEFAULT now();
+ALTER TABLE public.products ADD COLUMN IF NOT EXISTS changed_at timestamptz NOT NULL DEFAULT now();
+ALTER TABLE public.tenders  ADD COLUMN IF NOT EXISTS changed_at timestamptz NOT NULL DEFAULT now();
+ALTER TABLE public.orders   ADD COLUMN IF NOT EXISTS changed_at timestamptz NOT NULL DEFAULT now();
+
+ALTER TABLE public.clientes ADD COLUMN IF NOT EXISTS changed_xid xid8 NOT NULL DEFAULT pg_current_xact_id();
+ALTER TABLE public.products ADD COLUMN IF NOT EXISTS changed_xid xid8 NOT NULL DEFAULT pg_current_xact_id();
+ALTER TABLE public.tenders  ADD COLUMN IF NOT EXISTS changed_xid xid8 NOT NULL DEFAULT pg_current_xact_id();
+ALTER TABLE public.orders   ADD COLUMN IF NOT EXISTS changed_xid xid8 NOT NULL DEFAULT pg_current_xact_id();
+
+CREATE INDEX IF NOT EXISTS idx_clientes_changed_xid ON public.clientes(changed_xid);
+CREATE INDEX IF NOT EXISTS idx_products_changed_xid ON public.products(changed_xid);
+CREATE INDEX IF NOT EXISTS idx_tenders_changed_xid  ON public.tenders(changed_xid);
+CREATE INDEX IF NOT EXISTS idx_orders_changed_xid   ON public.orders(changed_xid);
+
+-- Marca la fila con la hora y la transacción de la modificación
+CREATE OR REPLACE FUNCTION public.set_changed_at()
+RETURNS TRIGGER AS $$
+BEGIN
+  NEW.changed_at := now();
+  NEW.changed_xid := pg_current_xact_id();
+  RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_changed_at_clientes ON public.clientes;
+CREATE TRIGGER trg_changed_at_clientes BEFORE UPDATE ON public.clientes
+FOR EACH ROW EXECUTE FUNCTION public.set_changed_at();
+
+DROP TRIGGER IF EXISTS trg_changed_at_products ON public.products;
+CREATE TRIGGER trg_changed_at_products BEFORE UPDATE ON public.products
+FOR EACH ROW EXECUTE FUNCTION public.set_changed_at();
+
+DROP TRIGGER IF EXISTS trg_changed_at_tenders ON public.tenders;
+CREATE TRIGGER trg_changed_at_tenders BEFORE UPDATE ON public.tenders
+FOR EACH ROW EXECUTE FUNCTION public.set_changed_at();
+
+DROP TRIGGER IF EXISTS trg_changed_at_orders ON public.orders;
+CREATE TRIGGER trg_changed_at_orders BEFORE UPDATE ON public.orders
+FOR EACH ROW EXECUTE FUNCTION public.set_changed_at();
+
+-- Órdenes borradas (incluye los borrados en cascada desde tenders). El refresco
+-- del snapshot poda las lápidas ya aplicadas que superan la retención.
+CREATE TABLE IF NOT EXISTS public.orders_deleted (
+  id          text NOT NULL,
+  deleted_at  timestamptz NOT NULL DEFAULT now()
+);
+ALTER TABLE public.orders_deleted ADD COLUMN IF NOT EXISTS deleted_xid xid8 NOT NULL DEFAULT pg_current_xact_id();
+CREATE INDEX IF NOT EXISTS idx_orders_deleted_at ON public.orders_deleted(deleted_at);
+CREATE INDEX IF NOT EXISTS idx_orders_deleted_xid ON public.orders_deleted(deleted_xid);
+
+CREATE OR REPLACE FUNCTION public.track_order_delete()
+RETURNS TRIGGER AS $$
+BEGIN
+  INSERT INTO public.orders_deleted (id) SELECT id FROM old_rows;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_track_order_delete ON public.orders;
+CREATE TRIGGER trg_track_order_delete
+AFTER DELETE ON public.orders
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION public.track_order_delete();
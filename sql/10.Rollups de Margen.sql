@@ -0,0 +1,244 @@
+-- Tablas de resumen (rollups) de ingresos y margen, mantenidas por triggers.
+-- El dashboard lee los meses completos desde aquí y sólo los días sueltos de
+-- los extremos del rango desde las tablas base (ver kaiken/queries.py).
+-- Sólo cuentan las licitaciones con cliente asignado, igual que el dashboard.
+-- Reconstrucción y verificación contra la vista: python -m kaiken.rollups rebuild|check
+
+CREATE TABLE IF NOT EXISTS public.rollup_client_month (
+  month        date    NOT NULL,             -- primer día del mes de creation_date
+  id_cli       integer NOT NULL,
+  revenue      numeric NOT NULL,             -- SUM(price * quantity)
+  margin       numeric NOT NULL,             -- SUM((price - cost_prp) * quantity)
+  num_tenders  integer NOT NULL,             -- licitaciones distintas con órdenes
+  PRIMARY KEY (month, id_cli)
+);
+
+CREATE TABLE IF NOT EXISTS public.rollup_product_month (
+  month        date NOT NULL,
+  product_id   text NOT NULL,
+  revenue      numeric NOT NULL,
+  margin       numeric NOT NULL,
+  PRIMARY KEY (month, product_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_tenders_creation_date ON public.tenders(creation_date);
+
+-- Recalcula desde las tablas base los pares (mes, cliente) y (mes, producto) indicados.
+-- Recalcular el grupo completo (en vez de sumar/restar deltas) mantiene exacto el
+-- conteo de licitaciones distintas y cubre cambios de costo, fecha o cliente.
+-- Dos transacciones que escriben en el mismo grupo no ven las filas sin confirmar
+-- de la otra: sin serializarlas, la última en confirmar guardaría un total viejo.
+-- Por eso cada grupo se bloquea (hasta el fin de la transacción) antes de recalcularlo;
+-- la consulta siguiente toma una instantánea nueva y ya ve lo confirmado por la otra.
+-- Las claves se bloquean ordenadas para que dos llamadas no se esperen en cruz.
+CREATE OR REPLACE FUNCTION public.rollups_refresh(
+  cm_months date[], cm_clients integer[], pm_months date[], pm_products text[]
+)
+RETURNS void AS $$
+DECLARE
+  clave text;
+BEGIN
+  FOR clave IN
+    SELECT 'c:' || month || ':' || id_cli FROM unnest(cm_months, cm_clients) AS u(month, id_cli)
+    WHERE month IS NOT NULL AND id_cli IS NOT NULL
+    UNION
+    SELECT 'p:' || month || ':' || product_id FROM unnest(pm_months, pm_products) AS u(month, product_id)
+    WHERE month IS NOT NULL AND product_id IS NOT NULL
+    ORDER BY 1
+  LOOP
+    PERFORM pg_advisory_xact_lock(hashtext(clave));
+  END LOOP;
+
+  -- Cliente x mes
+  WITH k AS (
+    SELECT DISTINCT month, id_cli FROM unnest(cm_months, cm_clients) AS u(month, id_cli)
+    WHERE month IS NOT NULL AND id_cli IS NOT NULL
+  ),
+  calc AS (
+    SELECT k.month, k.id_cli,
+           SUM(o.price * o.quantity) AS revenue,
+           SUM((o.price - p.cost_prp) * o.quantity) AS margin,
+           COUNT(DISTINCT o.tender_id) AS num_tenders
+    FROM k
+    JOIN public.tenders t  ON t.id_cli = k.id_cli
+                          AND t.creation_date >= k.month AND t.creation_date < k.month + interval '1 month'
+    JOIN public.orders o   ON o.tender_id = t.id
+    JOIN public.products p ON p.sku_pro = o.product_id
+    GROUP BY k.month, k.id_cli
+  ),
+  borrados AS (
+    DELETE FROM public.rollup_client_month r
+    USING k
+    WHERE r.month = k.month AND r.id_cli = k.id_cli
+      AND NOT EXISTS (SELECT 1 FROM calc WHERE calc.month = k.month AND calc.id_cli = k.id_cli)
+  )
+  INSERT INTO public.rollup_client_month (month, id_cli, revenue, margin, num_tenders)
+  SELECT month, id_cli, revenue, margin, num_tenders FROM calc
+  ON CONFLICT (month, id_cli) DO UPDATE
+  SET revenue = EXCLUDED.revenue, margin = EXCLUDED.margin, num_tenders = EXCLUDED.num_tenders;
+
+  -- Producto x mes
+  WITH k AS (
+    SELECT DISTINCT month, product_id FROM unnest(pm_months, pm_products) AS u(month, product_id)
+    WHERE month IS NOT NULL AND product_id IS NOT NULL
+  ),
+  calc AS (
+    SELECT k.month, k.product_id,
+           SUM(o.price * o.quantity) AS revenue,
+           SUM((o.price - p.cost_prp) * o.quantity) AS margin
+    FROM k
+    JOIN public.orders o   ON o.product_id = k.product_id
+    JOIN public.tenders t  ON t.id = o.tender_id AND t.id_cli IS NOT NULL
+                          AND t.creation_date >= k.month AND t.creation_date < k.month + interval '1 month'
+    JOIN public.products p ON p.sku_pro = o.product_id
+    GROUP BY k.month, k.product_id
+  ),
+  borrados AS (
+    DELETE FROM public.rollup_product_month r
+    USING k
+    WHERE r.month = k.month AND r.product_id = k.product_id
+      AND NOT EXISTS (SELECT 1 FROM calc WHERE calc.month = k.month AND calc.product_id = k.product_id)
+  )
+  INSERT INTO public.rollup_product_month (month, product_id, revenue, margin)
+  SELECT month, product_id, revenue, margin FROM calc
+  ON CONFLICT (month, product_id) DO UPDATE
+  SET revenue = EXCLUDED.revenue, margin = EXCLUDED.margin;
+END;
+$$ LANGUAGE plpgsql;
+
+-- ORDERS: los pares afectados salen de las filas de transición unidas a su licitación
+CREATE OR REPLACE FUNCTION public.rollups_on_orders()
+RETURNS TRIGGER AS $$
+DECLARE
+  months   date[];
+  clients  integer[];
+  products text[];
+BEGIN
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    SELECT array_agg(date_trunc('month', t.creation_date)::date), array_agg(t.id_cli), array_agg(n.product_id)
+    INTO months, clients, products
+    FROM new_rows n JOIN public.tenders t ON t.id = n.tender_id;
+    PERFORM public.rollups_refresh(months, clients, months, products);
+  END IF;
+  IF TG_OP IN ('UPDATE', 'DELETE') THEN
+    SELECT array_agg(date_trunc('month', t.creation_date)::date), array_agg(t.id_cli), array_agg(o.product_id)
+    INTO months, clients, products
+    FROM old_rows o JOIN public.tenders t ON t.id = o.tender_id;
+    PERFORM public.rollups_refresh(months, clients, months, products);
+  END IF;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_rollups_orders_insert ON public.orders;
+CREATE TRIGGER trg_rollups_orders_insert
+AFTER INSERT ON public.orders
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION public.rollups_on_orders();
+
+DROP TRIGGER IF EXISTS trg_rollups_orders_update ON public.orders;
+CREATE TRIGGER trg_rollups_orders_update
+AFTER UPDATE ON public.orders
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION public.rollups_on_orders();
+
+DROP TRIGGER IF EXISTS trg_rollups_orders_delete ON public.orders;
+CREATE TRIGGER trg_rollups_orders_delete
+AFTER DELETE ON public.orders
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT EXECUTE FUNCTION public.rollups_on_orders();
+
+-- TENDERS: cambio de fecha o de cliente mueve la licitación entre grupos
+CREATE OR REPLACE FUNCTION public.rollups_on_tenders_update()
+RETURNS TRIGGER AS $$
+DECLARE
+  months   date[];
+  clients  integer[];
+  products text[];
+BEGIN
+  SELECT array_agg(x.month), array_agg(x.id_cli), array_agg(x.product_id)
+  INTO months, clients, products
+  FROM (
+    SELECT date_trunc('month', r.creation_date)::date AS month, r.id_cli, o.product_id
+    FROM old_rows r LEFT JOIN public.orders o ON o.tender_id = r.id
+    UNION
+    SELECT date_trunc('month', r.creation_date)::date, r.id_cli, o.product_id
+    FROM new_rows r LEFT JOIN public.orders o ON o.tender_id = r.id
+  ) x;
+  PERFORM public.rollups_refresh(months, clients, months, products);
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_rollups_tenders_update ON public.tenders;
+CREATE TRIGGER trg_rollups_tenders_update
+AFTER UPDATE ON public.tenders
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION public.rollups_on_tenders_update();
+
+-- Al borrar una licitación se borran antes sus órdenes, para que el trigger de
+-- orders todavía encuentre la licitación (el borrado en cascada llega tarde)
+CREATE OR REPLACE FUNCTION public.rollups_before_tender_delete()
+RETURNS TRIGGER AS $$
+BEGIN
+  DELETE FROM public.orders WHERE tender_id = OLD.id;
+  RETURN OLD;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_rollups_tenders_delete ON public.tenders;
+CREATE TRIGGER trg_rollups_tenders_delete
+BEFORE DELETE ON public.tenders
+FOR EACH ROW EXECUTE FUNCTION public.rollups_before_tender_delete();
+
+-- PRODUCTS: un cambio de costo altera el margen de todas sus órdenes
+CREATE OR REPLACE FUNCTION public.rollups_on_products_update()
+RETURNS TRIGGER AS $$
+DECLARE
+  months   date[];
+  clients  integer[];
+  products text[];
+BEGIN
+  SELECT array_agg(date_trunc('month', t.creation_date)::date), array_agg(t.id_cli), array_agg(o.product_id)
+  INTO months, clients, products
+  FROM new_rows n
+  JOIN old_rows b        ON b.sku_pro = n.sku_pro
+  JOIN public.orders o   ON o.product_id = n.sku_pro
+  JOIN public.tenders t  ON t.id = o.tender_id
+  WHERE n.cost_prp IS DISTINCT FROM b.cost_prp;
+  PERFORM public.rollups_refresh(months, clients, months, products);
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_rollups_products_update ON public.products;
+CREATE TRIGGER trg_rollups_products_update
+AFTER UPDATE ON public.products
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION public.rollups_on_products_update();
+
+-- Reconstrucción completa desde la vista order_details_with_margin
+CREATE OR REPLACE FUNCTION public.rollups_rebuild()
+RETURNS void AS $$
+BEGIN
+  TRUNCATE public.rollup_client_month, public.rollup_product_month;
+
+  INSERT INTO public.rollup_client_month (month, id_cli, revenue, margin, num_tenders)
+  SELECT date_trunc('month', t.creation_date)::date, t.id_cli,
+         SUM(ovm.sale_price * ovm.quantity), SUM(ovm.total_margin), COUNT(DISTINCT ovm.tender_id)
+  FROM public.order_details_with_margin ovm
+  JOIN public.tenders t ON t.id = ovm.tender_id
+  WHERE t.id_cli IS NOT NULL AND t.creation_date IS NOT NULL
+  GROUP BY 1, 2;
+
+  INSERT INTO public.rollup_product_month (month, product_id, revenue, margin)
+  SELECT date_trunc('month', t.creation_date)::date, ovm.product_id,
+         SUM(ovm.sale_price * ovm.quantity), SUM(ovm.total_margin)
+  FROM public.order_details_with_margin ovm
+  JOIN public.tenders t ON t.id = ovm.tender_id
+  WHERE t.id_cli IS NOT NULL AND t.creation_date IS NOT NULL
+  GROUP BY 1, 2;
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT public.rollups_rebuild();
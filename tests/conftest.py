@@ -0,0 +1,40 @@
+"""
+Base de datos para las pruebas que necesitan Postgres.
+
+Se usan sólo si KAIKEN_TEST_DATABASE_URL apunta a una base desechable: cada
+prueba aplica los scripts de sql/ que necesita y borra el esquema public al
+terminar. Sin la variable esas pruebas se omiten.
+"""
+import os
+from pathlib import Path
+
+import psycopg2
+import pytest
+
+SQL_DIR = Path(__file__).resolve().parent.parent / "sql"
+
+
+@pytest.fixture
+def database():
+    """Devuelve `(dsn, apply)`; `apply("01", "02", ...)` ejecuta esos scripts de sql/."""
+    dsn = os.environ.get("KAIKEN_TEST_DATABASE_URL")
+    if not dsn:
+        pytest.skip("KAIKEN_TEST_DATABASE_URL no está definida")
+
+    conn = psycopg2.connect(dsn)
+    conn.autocommit = True
+
+    def apply(*prefixes):
+        with conn.cursor() as cursor:
+            for prefix in prefixes:
+                (path,) = SQL_DIR.glob(f"{prefix}.*.sql")
+                cursor.execute(path.read_text(encoding="utf-8"))
+
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("DROP SCHEMA IF EXISTS public CASCADE; CREATE SCHEMA public;")
+        yield dsn, apply
+    finally:
+        with conn.cursor() as cursor:
+            cursor.execute("DROP SCHEMA IF EXISTS public CASCADE; CREATE SCHEMA public;")
+        conn.close()
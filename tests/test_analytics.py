@@ -0,0 +1,60 @@
+"""Recarga del backend DuckDB sobre los CSV de muestra (sin base de datos)."""
+import os
+import shutil
+import threading
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("duckdb")
+
+from kaiken import analytics
+
+DATA = Path(__file__).resolve().parent.parent / "scripts" / "data"
+
+
+@pytest.fixture
+def source(tmp_path):
+    directory = tmp_path / "data"
+    directory.mkdir()
+    for filename, _ in analytics.CSV_SOURCES.values():
+        shutil.copy(DATA / filename, directory / filename)
+    return directory
+
+
+def test_fecha_de_la_fuente_cargada(source):
+    store = analytics.AnalyticsStore(source)
+    assert store.loaded_at() is None
+    path = source / analytics.CSV_SOURCES["orders"][0]
+    os.utime(path, (1_700_000_000, 1_700_000_000))
+    store.refresh()
+    assert store.loaded_at().timestamp() == 1_700_000_000
+
+
+def test_recarga_sin_mezclar_versiones(source):
+    store = analytics.AnalyticsStore(source)
+    store.refresh()
+    expected = store.query("dashboard_bounds")[0]
+    errors = []
+
+    def reader():
+        for _ in range(30):
+            try:
+                df, _ = store.query("dashboard_bounds")
+                assert df.equals(expected)
+            except Exception as exc:
+                errors.append(exc)
+
+    readers = [threading.Thread(target=reader) for _ in range(3)]
+    for thread in readers:
+        thread.start()
+    for i in range(5):
+        for path in source.iterdir():
+            os.utime(path, ns=(path.stat().st_atime_ns, path.stat().st_mtime_ns + 1_000_000_000))
+        store.refresh()
+    for thread in readers:
+        thread.join()
+
+    assert errors == []
+    tables = {row[0] for row in store._conn.execute("SHOW TABLES").fetchall()}
+    assert tables == set(analytics.EXPORTS) | {"order_details_with_margin"}
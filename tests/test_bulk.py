@@ -0,0 +1,52 @@
+"""Lectura por COPY + Arrow y cortes a mitad del COPY (requiere Postgres)."""
+import psycopg2
+import pyarrow as pa
+import pytest
+
+from kaiken import bulk
+
+SERIE = "SELECT i AS n, 'producto ' || i AS nombre FROM generate_series(1, %(filas)s) AS i"
+SCHEMA = {"n": "int64", "nombre": "string"}
+
+
+@pytest.fixture
+def conn(database):
+    dsn, _ = database
+    conn = psycopg2.connect(dsn)
+    yield conn
+    conn.close()
+
+
+def test_lee_con_los_tipos_declarados(conn):
+    df = bulk.read_frame(conn, SERIE, SCHEMA, {"filas": 3})
+    assert df["n"].tolist() == [1, 2, 3]
+    assert str(df["n"].dtype) == "int64"
+    assert df["nombre"].tolist() == ["producto 1", "producto 2", "producto 3"]
+    assert bulk.read_table(conn, SERIE, SCHEMA, {"filas": 0}).num_rows == 0
+    assert not conn.closed
+
+
+def test_cortar_la_iteracion_no_lanza_y_descarta_la_conexion(conn):
+    batches = bulk.copy_batches(conn, SERIE, SCHEMA, {"filas": 3_000_000})
+    assert next(batches).num_rows > 0
+    batches.close()
+    assert conn.closed
+
+
+def test_el_error_del_consumidor_no_se_tapa(conn):
+    batches = bulk.copy_batches(conn, SERIE, SCHEMA, {"filas": 3_000_000})
+    with pytest.raises(ValueError, match="consumidor"):
+        for _ in batches:
+            raise ValueError("consumidor")
+    # Al cerrarse el generador el BrokenPipeError del productor no reemplaza al error
+    batches.close()
+    assert conn.closed
+
+
+def test_el_error_del_copy_se_relanza(conn):
+    query = "SELECT 1 / (i - 200000) AS n, 'x' AS nombre FROM generate_series(1, 300000) AS i"
+    with pytest.raises((psycopg2.Error, pa.ArrowInvalid)) as info:
+        list(bulk.copy_batches(conn, query, SCHEMA))
+    error = info.value if isinstance(info.value, psycopg2.Error) else info.value.__cause__
+    assert isinstance(error, psycopg2.errors.DivisionByZero)
+    assert conn.closed
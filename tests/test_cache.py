@@ -0,0 +1,39 @@
+"""Invalidación y límite en bytes de `TableVersionedCache` (sin base de datos)."""
+import pandas as pd
+
+from kaiken.cache import TABLES, TableVersionedCache, frame_size
+from kaiken.catalog import ProductIndex
+
+
+def products(n):
+    return pd.DataFrame({
+        "sku_pro": [f"SKU{i}" for i in range(n)],
+        "nom_pro": [f"GUANTE NITRILO TALLA {i}" for i in range(n)],
+        "cost_prp": [1000.0 + i for i in range(n)],
+    })
+
+
+def test_bump_descarta_resultados_en_curso():
+    cache = TableVersionedCache()
+    versions = cache.versions_for({"orders"})
+    # Como hace el listener al fallar: mientras corría la consulta se sube todo
+    cache.bump(*TABLES)
+    cache.put("ordenes", products(3), frozenset({"orders"}), versions)
+    assert cache.get("ordenes") == (False, None)
+
+
+def test_indice_de_productos_cuenta_para_el_limite():
+    index = ProductIndex(products(1000))
+    assert frame_size(index) > frame_size(products(1000)) > 0
+
+    cache = TableVersionedCache(max_bytes=frame_size(index) - 1)
+    cache.put("indice", index, frozenset({"products"}), cache.versions_for({"products"}))
+    assert cache.usage()["entries"] == 0
+
+
+def test_tamano_explicito():
+    cache = TableVersionedCache(max_bytes=100)
+    cache.put("figura", object(), frozenset(), (), size=60)
+    cache.put("otra", object(), frozenset(), (), size=60)
+    assert cache.usage() == {"entries": 1, "bytes": 60}
+    assert cache.get("figura") == (False, None)
@@ -0,0 +1,52 @@
+"""Búsqueda por prefijo del índice de productos (sin base de datos)."""
+import pandas as pd
+
+from kaiken.catalog import ProductIndex, normalize
+
+
+def index():
+    return ProductIndex(pd.DataFrame({
+        "sku_pro": ["GN-100", "GN-200", "MSK-3", "CAM-01", "ALC-70"],
+        "nom_pro": ["GUANTE NITRILO TALLA M", "Guante nitrilo talla L", "MASCARILLA KN95",
+                    "Camión de juguete", "ALCOHOL GEL 70% ESPAÑA"],
+        "cost_prp": [1200, 1250, 300.5, 9990, 1500],
+    }))
+
+
+def test_prefijo_sin_tildes_ni_mayusculas():
+    products = index()
+    assert products.search("guan") == ["GN-100", "GN-200"]
+    assert products.search("CAMION") == ["CAM-01"]
+    assert products.search("camión") == ["CAM-01"]
+    assert products.search("espana") == ["ALC-70"]
+    assert products.search("Españ") == ["ALC-70"]
+
+
+def test_todas_las_palabras_deben_coincidir():
+    products = index()
+    assert products.search("talla l guante") == ["GN-200"]
+    assert products.search("nitrilo kn95") == []
+    # Las palabras son prefijos de palabra, no subcadenas
+    assert products.search("itrilo") == []
+
+
+def test_busqueda_por_sku():
+    products = index()
+    assert products.search("gn-2") == ["GN-200"]
+    assert products.search("gn") == ["GN-100", "GN-200"]
+    assert products.search("msk3") == []
+
+
+def test_limite_y_texto_vacio():
+    products = index()
+    assert products.search("g", limit=1) == ["GN-100"]
+    assert products.search("") == [] and products.search("  -  ") == []
+
+
+def test_acceso_por_sku():
+    products = index()
+    assert len(products) == 5 and "MSK-3" in products and "X" not in products
+    assert products.name("CAM-01") == "Camión de juguete"
+    assert products.cost("MSK-3") == 300.5
+    assert products.label("BORRADO") == "(eliminado) · BORRADO"
+    assert normalize("Ñandú") == "nandu"
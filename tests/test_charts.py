@@ -0,0 +1,77 @@
+"""Reducción de datos de los gráficos del dashboard (sin base de datos)."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from kaiken.charts import OTHERS_LABEL, downsample, lttb_indices, monthly_lines, top_n_with_others
+
+
+@pytest.mark.parametrize("n, threshold", [(10, 3), (1000, 400), (1001, 7), (5000, 4999)])
+def test_lttb_conserva_extremos_y_largo(n, threshold):
+    rng = np.random.default_rng(n)
+    x = np.arange(n)
+    indices = lttb_indices(x, rng.normal(size=n), threshold)
+    assert len(indices) == threshold
+    assert indices[0] == 0 and indices[-1] == n - 1
+    assert (np.diff(indices) > 0).all()
+
+
+def test_lttb_conserva_picos():
+    y = np.zeros(1000)
+    y[337], y[700] = 50, -80
+    indices = lttb_indices(np.arange(1000), y, 20)
+    assert {337, 700} <= set(indices.tolist())
+
+
+def test_lttb_sin_reducir():
+    assert lttb_indices([1, 2, 3], [1, 2, 3], 10).tolist() == [0, 1, 2]
+    assert lttb_indices(range(10), range(10), 2).tolist() == list(range(10))
+
+
+def test_downsample_con_fechas():
+    df = pd.DataFrame({"mes": pd.date_range("2020-01-01", periods=500, freq="D"), "margen": np.arange(500.0)})
+    reducido = downsample(df, "mes", "margen", 50)
+    assert len(reducido) == 50
+    assert reducido["mes"].iloc[0] == df["mes"].iloc[0] and reducido["mes"].iloc[-1] == df["mes"].iloc[-1]
+    assert downsample(df, "mes", "margen", 500) is df
+
+
+def clientes(n):
+    return pd.DataFrame({
+        "nom_cli": [f"CLIENTE {i}" for i in range(n)],
+        "total_margin": [float(i) for i in range(n)],
+        "revenue": [10.0 * i for i in range(n)],
+        "num_tenders": [1] * n,
+    })
+
+
+def test_otros_suma_la_cola():
+    df = clientes(10).sample(frac=1, random_state=0)
+    result = top_n_with_others(df, "nom_cli", "total_margin", 3, ("total_margin", "revenue"), counts="num_tenders")
+    assert result["nom_cli"].tolist() == ["CLIENTE 9", "CLIENTE 8", "CLIENTE 7", f"{OTHERS_LABEL} (7)"]
+    otros = result.iloc[-1]
+    assert otros["total_margin"] == sum(range(7))
+    assert otros["revenue"] == 10.0 * sum(range(7))
+    assert otros["num_tenders"] == 7
+    assert result["revenue"].sum() == clientes(10)["revenue"].sum()
+
+
+def test_sin_otros_si_la_cola_es_de_una_fila():
+    df = clientes(4)
+    result = top_n_with_others(df, "nom_cli", "total_margin", 3, ("total_margin",))
+    assert result.equals(df) and result is not df
+
+
+def test_meses_etiquetados_por_su_ultimo_dia():
+    df = pd.DataFrame({
+        "creation_date": pd.to_datetime(["2024-01-01", "2024-02-01", "2024-03-01"]).date,
+        "monthly_revenue": [100.0, 0.0, 250.0],
+        "monthly_margin": [20.0, 0.0, 40.0],
+    })
+    fig = monthly_lines(df, max_points=400)
+    x = pd.to_datetime(fig.data[0].x)
+    assert [d.strftime("%Y-%m-%d") for d in x] == ["2024-01-31", "2024-02-29", "2024-03-31"]
+    # Igual que el resample mensual que hacía la página sobre el detalle de órdenes
+    detalle = pd.DataFrame({"creation_date": pd.to_datetime(["2024-01-15", "2024-03-02", "2024-03-30"]),
+                            "revenue": [100.0, 200.0, 50.0]})
+    assert x.tolist() == detalle.set_index("creation_date").resample("ME").sum().index.tolist()
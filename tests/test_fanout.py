@@ -0,0 +1,56 @@
+"""Carga concurrente con `gather` (sin base de datos)."""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from kaiken import fanout
+
+
+@pytest.fixture
+def executor(monkeypatch):
+    executor = ThreadPoolExecutor(max_workers=1)
+    monkeypatch.setattr(fanout, "init_executor", lambda: executor)
+    yield executor
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+def test_gather_anidado_no_bloquea_el_pool(executor):
+    threads = {}
+
+    def inner(name):
+        threads[name] = threading.current_thread()
+        return name
+
+    def outer():
+        # Con un solo hilo, esperar al pool desde una tarea no terminaría nunca
+        return fanout.gather({"a": lambda: inner("a"), "b": lambda: inner("b")})
+
+    result = {}
+    caller = threading.Thread(target=lambda: result.update(fanout.gather({"x": outer, "y": lambda: "y"})), daemon=True)
+    caller.start()
+    caller.join(5)
+    assert not caller.is_alive()
+    assert result == {"x": {"a": "a", "b": "b"}, "y": "y"}
+    assert threads["a"] is threads["b"] is not caller
+
+
+def test_errores_se_relanzan_y_el_hilo_queda_limpio(executor):
+    def falla():
+        raise ValueError("consulta")
+
+    with pytest.raises(ValueError):
+        fanout.gather({"a": falla, "b": lambda: 1})
+    # Fuera de una tarea se vuelve a usar el pool
+    assert fanout.gather({"a": threading.current_thread, "b": lambda: 2})["a"] is not threading.current_thread()
+
+
+@pytest.mark.parametrize("max_conn, workers", [(10, 9), (2, 1), (1, 1)])
+def test_hilos_segun_el_pool_de_conexiones(monkeypatch, max_conn, workers):
+    monkeypatch.setattr(fanout, "secrets_section", lambda section: {"max_conn": max_conn})
+    fanout.init_executor.clear()
+    try:
+        assert fanout.init_executor()._max_workers == workers
+    finally:
+        fanout.init_executor().shutdown(wait=False)
+        fanout.init_executor.clear()
@@ -0,0 +1,68 @@
+"""Ingesta de licitaciones con clientes desconocidos (sin base de datos)."""
+import pandas as pd
+import pytest
+
+from kaiken import ingest
+
+
+def empty_index():
+    index = ingest.ForeignKeyIndex.__new__(ingest.ForeignKeyIndex)
+    index.clients = {"I MUNICIPALIDAD DE LAJA": 1}
+    index.next_client_id = 2
+    index.tenders = {}
+    index.products = {}
+    return index
+
+
+@pytest.fixture
+def loaded(monkeypatch):
+    """Captura lo que se cargaría con COPY, por tabla."""
+    tables = {}
+
+    def copy_upsert(conn, table, df):
+        tables.setdefault(table, []).append(df.copy())
+        return len(df)
+
+    monkeypatch.setattr(ingest, "copy_upsert", copy_upsert)
+    return tables
+
+
+def write_tenders(path, rows, columns):
+    pd.DataFrame(rows, columns=columns).to_csv(path, sep=";", index=False)
+    return path
+
+
+COLUMNS = ["row_number", "id", "client", "creation_date", "delivery_date", "margin"]
+
+
+def test_cliente_desconocido_sin_rut_se_rechaza(tmp_path, loaded):
+    path = write_tenders(tmp_path / "tenders.csv", [
+        [2, "2698-56-LE24", "I MUNICIPALIDAD DE CARTAGENA", "2024-11-29", "2024-12-29", 0.4],
+        [3, "3736-76-LE24", "I MUNICIPALIDAD DE LAJA", "2024-08-08", "2024-09-07", 0.4],
+    ], COLUMNS)
+    index = empty_index()
+
+    result = ingest.ingest_tenders(None, path, index, crear_clientes=True)
+
+    assert result == {"tabla": "tenders", "cargadas": 1, "rechazadas": 1}
+    assert sum(len(df) for df in loaded.get("clientes", [])) == 0
+    assert loaded["tenders"][0]["id"].tolist() == ["3736-76-LE24"]
+    assert "I MUNICIPALIDAD DE CARTAGENA" not in index.clients
+    assert index.next_client_id == 2
+
+
+def test_cliente_desconocido_con_rut_valido_se_crea(tmp_path, loaded):
+    path = write_tenders(tmp_path / "tenders.csv", [
+        [2, "2698-56-LE24", "I MUNICIPALIDAD DE CARTAGENA", "2024-11-29", "2024-12-29", 0.4, "12.345.678-5"],
+        [3, "1111-11-LE24", "CLIENTE CON RUT MALO", "2024-11-29", "2024-12-29", 0.4, "12.345.678-9"],
+    ], COLUMNS + ["rut_cli"])
+    index = empty_index()
+
+    result = ingest.ingest_tenders(None, path, index, crear_clientes=True)
+
+    assert result == {"tabla": "tenders", "cargadas": 1, "rechazadas": 1}
+    clientes = pd.concat(loaded["clientes"])
+    assert clientes[["id_cli", "rut_cli", "nom_cli"]].values.tolist() == [
+        [2, "12.345.678-5", "I MUNICIPALIDAD DE CARTAGENA"],
+    ]
+    assert loaded["tenders"][0]["id_cli"].tolist() == [2]
@@ -0,0 +1,67 @@
+"""Registro de métricas y exportación en formato de texto de Prometheus."""
+import math
+import re
+
+from kaiken.metrics import Metrics, prometheus_text
+
+# Línea de muestra: nombre{etiquetas} valor
+SAMPLE_RE = re.compile(r'^[a-zA-Z_:][a-zA-Z0-9_:]*(\{([a-zA-Z_][a-zA-Z0-9_]*="(\\.|[^"\\])*",?)*\})? (\S+)$')
+
+
+def parse(text):
+    """Muestras `{(nombre, etiquetas): valor}` y tipos `{nombre: tipo}`, validando cada línea."""
+    samples, types = {}, {}
+    for line in text.splitlines():
+        if line.startswith("# TYPE "):
+            _, _, name, kind = line.split(" ")
+            assert name not in types
+            types[name] = kind
+            continue
+        assert SAMPLE_RE.match(line), line
+        head, value = line.rsplit(" ", 1)
+        name, _, labels = head.partition("{")
+        samples[(name, labels.rstrip("}"))] = float(value)
+    return samples, types
+
+
+def test_summary_y_counter():
+    metrics = Metrics(window=10)
+    for value in (0.1, 0.2, 0.3, 0.4):
+        metrics.observe("kaiken_query_seconds", value, query="clientes")
+    metrics.inc("kaiken_cache_requests_total", query="clientes", result="hit")
+    metrics.inc("kaiken_cache_requests_total", query="clientes", result="hit")
+    metrics.inc("kaiken_cache_requests_total", query="clientes", result="miss")
+
+    text = prometheus_text(metrics.snapshot(), [("kaiken_cache_bytes", {}, 123_456_789)])
+    assert text.endswith("\n")
+    samples, types = parse(text)
+    assert types == {"kaiken_cache_requests_total": "counter", "kaiken_query_seconds": "summary",
+                     "kaiken_cache_bytes": "gauge"}
+    assert samples[("kaiken_cache_requests_total", 'query="clientes",result="hit"')] == 2
+    assert samples[("kaiken_cache_requests_total", 'query="clientes",result="miss"')] == 1
+    assert samples[("kaiken_query_seconds", 'quantile="0.5",query="clientes"')] == 0.3
+    assert samples[("kaiken_query_seconds", 'quantile="0.99",query="clientes"')] == 0.4
+    assert math.isclose(samples[("kaiken_query_seconds_sum", 'query="clientes"')], 1.0)
+    assert samples[("kaiken_query_seconds_count", 'query="clientes"')] == 4
+    # Sin redondear a 6 cifras
+    assert samples[("kaiken_cache_bytes", "")] == 123_456_789
+
+
+def test_etiquetas_escapadas_y_serie_vacia():
+    series = [{"name": "kaiken_page_seconds", "labels": {"page": 'Ver "Licitaciones"\\\n'},
+               "count": 0, "sum": 0.0, "p50": math.nan, "p95": math.nan, "p99": math.nan}]
+    text = prometheus_text(series, [("kaiken_pool_connections", {"state": "idle"}, math.inf)])
+    samples, _ = parse(text)
+    assert 'kaiken_page_seconds{page="Ver \\"Licitaciones\\"\\\\\\n",quantile="0.5"} NaN' in text.splitlines()
+    assert samples[("kaiken_pool_connections", 'state="idle"')] == math.inf
+    assert "kaiken_pool_connections{state=\"idle\"} +Inf" in text
+
+
+def test_ventana_de_percentiles():
+    metrics = Metrics(window=3)
+    for value in range(10):
+        metrics.observe("kaiken_query_rows", value, query="x")
+    (serie,) = metrics.snapshot()
+    assert (serie["count"], serie["sum"], serie["p50"], serie["p99"]) == (10, 45, 8, 9)
+    metrics.reset()
+    assert metrics.snapshot() == []
@@ -0,0 +1,37 @@
+"""Diferencias entre las líneas guardadas y las editadas de una licitación (sin base de datos)."""
+from kaiken.orders import diff_order_lines, order_id
+
+
+def test_altas_cambios_y_bajas():
+    existing = {"SKU1": (2, 1500), "SKU2": (1, 990.5), "SKU3": (4, 100)}
+    edited = [
+        {"sku": "SKU1", "quantity": 2, "price": 1500.0},       # sin cambios
+        {"sku": "SKU2", "quantity": 3, "price": 990.5},        # cambia la cantidad
+        {"sku": "SKU4", "quantity": 1, "price": 20},           # nueva
+    ]
+    assert diff_order_lines(existing, edited) == ([("SKU2", 3, 990.5), ("SKU4", 1, 20.0)], ["SKU3"])
+
+
+def test_precio_se_compara_redondeado_a_centavos():
+    existing = {"SKU1": (1, 10.1)}
+    assert diff_order_lines(existing, [{"sku": "SKU1", "quantity": "1", "price": 10.1000001}]) == ([], [])
+    assert diff_order_lines(existing, [{"sku": "SKU1", "quantity": 1, "price": 10.11}]) == ([("SKU1", 1, 10.11)], [])
+
+
+def test_sku_repetido_vale_la_ultima_linea():
+    existing = {"SKU1": (1, 10), "SKU2": (1, 10)}
+    edited = [
+        {"sku": "SKU1", "quantity": 5, "price": 10},
+        {"sku": "SKU3", "quantity": 1, "price": 7},
+        {"sku": "SKU1", "quantity": 1, "price": 10},           # deja SKU1 como estaba
+        {"sku": "SKU3", "quantity": 2, "price": 7},
+    ]
+    upserts, deletes = diff_order_lines(existing, edited)
+    assert upserts == [("SKU3", 2, 7.0)]
+    assert deletes == ["SKU2"]
+
+
+def test_sin_lineas_borra_todo():
+    assert diff_order_lines({"SKU1": (1, 10)}, []) == ([], ["SKU1"])
+    assert diff_order_lines({}, []) == ([], [])
+    assert order_id("2698-56-LE24", "SKU1") == "2698-56-LE24-SKU1"
@@ -0,0 +1,54 @@
+"""Rollups mantenidos por triggers con escrituras concurrentes (requiere Postgres)."""
+import threading
+
+import psycopg2
+
+from kaiken import rollups
+
+
+def test_ordenes_concurrentes_en_el_mismo_mes(database):
+    dsn, apply = database
+    apply("01", "02", "10")
+    setup = psycopg2.connect(dsn)
+    with setup, setup.cursor() as cursor:
+        cursor.execute("""
+            INSERT INTO public.clientes (id_cli, nom_cli) VALUES (1, 'I MUNICIPALIDAD DE LAJA');
+            INSERT INTO public.products (sku_pro, nom_pro, cost_prp) VALUES ('SKU1', 'GUANTE NITRILO', 10);
+            INSERT INTO public.tenders (id, id_cli, creation_date) VALUES
+                ('2698-56-LE24', 1, '2024-11-05'), ('3736-76-LE24', 1, '2024-11-20');
+        """)
+
+    first, second = psycopg2.connect(dsn), psycopg2.connect(dsn)
+    try:
+        with first.cursor() as cursor:
+            cursor.execute("INSERT INTO public.orders (id, tender_id, product_id, quantity, price) "
+                           "VALUES ('2698-56-LE24-SKU1', '2698-56-LE24', 'SKU1', 1, 20);")
+
+        def insert_second():
+            with second.cursor() as cursor:
+                cursor.execute("INSERT INTO public.orders (id, tender_id, product_id, quantity, price) "
+                               "VALUES ('3736-76-LE24-SKU1', '3736-76-LE24', 'SKU1', 2, 30);")
+            second.commit()
+
+        # La segunda inserción espera el bloqueo del grupo hasta que confirma la primera
+        writer = threading.Thread(target=insert_second)
+        writer.start()
+        writer.join(0.5)
+        assert writer.is_alive()
+        first.commit()
+        writer.join(5)
+        assert not writer.is_alive()
+    finally:
+        first.close()
+        second.close()
+
+    conn = psycopg2.connect(dsn)
+    try:
+        assert rollups.check(conn) == {"rollup_client_month": [], "rollup_product_month": []}
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT revenue, margin, num_tenders FROM public.rollup_client_month;")
+            assert cursor.fetchall() == [(80, 50, 2)]
+            cursor.execute("SELECT revenue, margin FROM public.rollup_product_month;")
+            assert cursor.fetchall() == [(80, 50)]
+    finally:
+        conn.close()
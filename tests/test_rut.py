@@ -0,0 +1,48 @@
+"""Validación de RUT: la versión por lotes y la de SQL dan lo mismo que la escalar."""
+import numpy as np
+import psycopg2
+
+from kaiken.rut import generar_ruts, validar_rut, validar_ruts
+
+BORDES = [
+    "", "-", "K", "1234567-", "12345678-", "1.234.567-k", "1.234.567-K", "12.345.678-5",
+    "123456789-0", "0000000-0", "7.654.321-6", "76543216", "12 345 678-5", "12.3A5.678-9",
+    "١٢٣٤٥٦٧٨-٩", "ß1234567", "1234567ß",
+]
+
+
+def aleatorios(n, seed=0):
+    """Textos cortos con dígitos, separadores, 'K' y algo de ruido."""
+    rng = np.random.default_rng(seed)
+    alfabeto = np.array(list("0123456789.-Kk x١"))
+    return ["".join(rng.choice(alfabeto, size=rng.integers(0, 14))) for _ in range(n)]
+
+
+def test_validar_ruts_igual_a_validar_rut():
+    ruts = generar_ruts(5000) + aleatorios(5000) + BORDES + [None, 12345678, 7.5]
+    esperado = np.array([validar_rut(r) for r in ruts])
+    assert esperado.any() and not esperado.all()
+    assert np.array_equal(validar_ruts(ruts), esperado)
+    assert np.array_equal(validar_ruts(np.array(ruts, dtype=object)), esperado)
+    assert validar_ruts([]).tolist() == []
+
+
+# --- SQL (requiere Postgres) ---
+
+def test_version_sql_igual_a_plpgsql(database):
+    dsn, apply = database
+    apply("01", "03", "07")
+    ruts = generar_ruts(5000) + aleatorios(5000) + BORDES
+    conn = psycopg2.connect(dsn)
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("""
+                SELECT rut FROM unnest(%s::text[]) AS rut
+                WHERE public.validar_rut_chileno(rut) IS DISTINCT FROM public.validar_rut_chileno_sql(rut);
+            """, (ruts,))
+            assert cursor.fetchall() == []
+            cursor.execute("SELECT count(*) FILTER (WHERE public.validar_rut_chileno_sql(rut)) "
+                           "FROM unnest(%s::text[]) AS rut;", (ruts,))
+            assert 0 < cursor.fetchone()[0] < len(ruts)
+    finally:
+        conn.close()
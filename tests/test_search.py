@@ -0,0 +1,59 @@
+"""Paginación por keyset y patrones de búsqueda (sin base de datos)."""
+import pandas as pd
+import pytest
+
+from kaiken.search import keyset_page, like_pattern
+
+CLIENTES = pd.DataFrame({
+    "id_cli": [5, 2, 9, 1, 7, 3, 8],
+    "nom_cli": ["ANCUD", "ANCUD", "BUIN", "CALERA", "CALERA", "CALERA", "LAJA"],
+})
+
+
+def fake_run(calls):
+    """Imita `clientes_pagina` / `clientes_pagina_desde`: ORDER BY nom_cli, id_cli LIMIT n."""
+    def run(query, pattern, *args):
+        calls.append((query, args))
+        df = CLIENTES.sort_values(["nom_cli", "id_cli"])
+        if query.endswith("_desde"):
+            nom, id_cli, limit = args
+            df = df[(df["nom_cli"] > nom) | ((df["nom_cli"] == nom) & (df["id_cli"] > id_cli))]
+        else:
+            (limit,) = args
+        return df.head(limit).reset_index(drop=True)
+    return run
+
+
+def pages(page_size):
+    calls, result, cursor = [], [], None
+    while True:
+        df, cursor = keyset_page("clientes_pagina", "%", cursor, page_size, ("nom_cli", "id_cli"), fake_run(calls))
+        assert len(df) <= page_size
+        result.append(df["id_cli"].tolist())
+        if cursor is None:
+            return result, calls
+
+
+@pytest.mark.parametrize("page_size", [1, 2, 3, 6, 7, 8])
+def test_recorre_todas_las_filas_una_vez(page_size):
+    result, calls = pages(page_size)
+    assert sum(result, []) == [2, 5, 9, 1, 3, 7, 8]
+    assert calls[0] == ("clientes_pagina", (page_size + 1,))
+    assert all(query == "clientes_pagina_desde" for query, _ in calls[1:])
+
+
+def test_cursor_en_el_borde_de_pagina():
+    # 7 filas en páginas de 7: no hay página siguiente ni una última página vacía
+    result, _ = pages(7)
+    assert result == [[2, 5, 9, 1, 3, 7, 8]]
+    # Empates en nom_cli que cruzan el borde: el cursor lleva también id_cli
+    df, cursor = keyset_page("clientes_pagina", "%", None, 4, ("nom_cli", "id_cli"), fake_run([]))
+    assert cursor == ("CALERA", 1)
+    df, cursor = keyset_page("clientes_pagina", "%", cursor, 4, ("nom_cli", "id_cli"), fake_run([]))
+    assert df["id_cli"].tolist() == [3, 7, 8] and cursor is None
+
+
+def test_like_pattern_escapa_comodines():
+    assert like_pattern(None) == "%%"
+    assert like_pattern("  laja ") == "%laja%"
+    assert like_pattern("10%_a\\b") == "%10\\%\\_a\\\\b%"
@@ -0,0 +1,136 @@
+"""Refresco del snapshot Arrow: sin conexión a Postgres y en forma incremental."""
+import contextlib
+import datetime as dt
+import threading
+import time
+
+import psycopg2
+import pyarrow as pa
+import pytest
+
+from kaiken import snapshot
+
+
+def facts(n):
+    return pa.table({
+        "order_id": [f"O{i}" for i in range(n)],
+        "tender_id": ["2698-56-LE24"] * n,
+        "product_id": [f"SKU{i}" for i in range(n)],
+        "product_name": [f"GUANTE {i}" for i in range(n)],
+        "quantity": [1] * n,
+        "cost_price": [10.0] * n,
+        "sale_price": [12.0] * n,
+        "margin_per_unit": [2.0] * n,
+        "total_margin": [2.0] * n,
+        "creation_date": [dt.date(2024, 11, 29)] * n,
+        "nom_cli": ["I MUNICIPALIDAD DE CARTAGENA"] * n,
+    }, schema=snapshot.SCHEMA)
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = snapshot.SnapshotStore(tmp_path / "snapshots")
+    path = store._new_path()
+    with pa.OSFile(str(path), "wb") as sink, pa.ipc.new_file(sink, snapshot.SCHEMA) as writer:
+        writer.write_table(facts(3))
+    store._publish(path.name, ("1000", dt.datetime(2024, 12, 1, 8, 30)), 3)
+    return store
+
+
+def test_sin_conexion_sirve_el_snapshot_anterior(store, monkeypatch):
+    @contextlib.contextmanager
+    def down():
+        raise psycopg2.OperationalError("could not connect to server")
+        yield
+
+    monkeypatch.setattr(snapshot, "connection", down)
+    assert store.table(refresh_seconds=0).num_rows == 3
+    assert store.stale
+
+    monkeypatch.setattr(snapshot, "connection", contextlib.nullcontext)
+    monkeypatch.setattr(store, "refresh", lambda conn: 0)
+    store.table(refresh_seconds=0)
+    assert not store.stale
+
+
+def test_sin_snapshot_previo_propaga_el_error(tmp_path, monkeypatch):
+    @contextlib.contextmanager
+    def down():
+        raise psycopg2.OperationalError("could not connect to server")
+        yield
+
+    monkeypatch.setattr(snapshot, "connection", down)
+    with pytest.raises(psycopg2.OperationalError):
+        snapshot.SnapshotStore(tmp_path / "vacio").table()
+
+
+def test_los_lectores_no_esperan_el_refresco(store, monkeypatch):
+    monkeypatch.setattr(snapshot, "connection", contextlib.nullcontext)
+    monkeypatch.setattr(store, "refresh", lambda conn: 0)
+    store.table(refresh_seconds=3600)
+    started, release = threading.Event(), threading.Event()
+
+    def slow_refresh(conn):
+        started.set()
+        release.wait(5)
+
+    monkeypatch.setattr(store, "refresh", slow_refresh)
+    refresher = threading.Thread(target=store.table, kwargs={"refresh_seconds": 0})
+    refresher.start()
+    try:
+        assert started.wait(5)
+        t0 = time.perf_counter()
+        assert store.table(refresh_seconds=0).num_rows == 3
+        assert time.perf_counter() - t0 < 1
+    finally:
+        release.set()
+        refresher.join()
+
+
+# --- REFRESCO INCREMENTAL (requiere Postgres) ---
+
+def quantities(store):
+    table = store._open(store.manifest()["file"])
+    return dict(zip(table["order_id"].to_pylist(), table["quantity"].to_pylist()))
+
+
+def test_transaccion_larga_entra_en_el_refresco_siguiente(database, tmp_path, monkeypatch):
+    dsn, apply = database
+    apply("01", "02", "09")
+    conn, long_tx = psycopg2.connect(dsn), psycopg2.connect(dsn)
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("""
+                INSERT INTO public.clientes (id_cli, nom_cli) VALUES (1, 'I MUNICIPALIDAD DE LAJA');
+                INSERT INTO public.products (sku_pro, nom_pro, cost_prp) VALUES ('SKU1', 'GUANTE', 10), ('SKU2', 'MASCARILLA', 5);
+                INSERT INTO public.tenders (id, id_cli, creation_date) VALUES ('3736-76-LE24', 1, '2024-08-08');
+                INSERT INTO public.orders (id, tender_id, product_id, quantity, price) VALUES
+                    ('3736-76-LE24-SKU1', '3736-76-LE24', 'SKU1', 1, 20),
+                    ('3736-76-LE24-SKU2', '3736-76-LE24', 'SKU2', 1, 8);
+            """)
+        conn.commit()
+        store = snapshot.SnapshotStore(tmp_path / "snapshots")
+        assert store.rebuild(conn) == 2
+
+        # Empieza antes del refresco y confirma después
+        with long_tx.cursor() as cursor:
+            cursor.execute("UPDATE public.orders SET quantity = 7 WHERE id = '3736-76-LE24-SKU1';")
+        assert store.refresh(conn) == 0
+        long_tx.commit()
+
+        with conn.cursor() as cursor:
+            cursor.execute("DELETE FROM public.orders WHERE id = '3736-76-LE24-SKU2';")
+        conn.commit()
+        assert store.refresh(conn) == 2
+        assert quantities(store) == {"3736-76-LE24-SKU1": 7}
+
+        # Lápidas ya aplicadas y fuera de la retención: se podan en el refresco siguiente
+        monkeypatch.setattr(snapshot, "TOMBSTONE_RETENTION", dt.timedelta(0))
+        store.refresh(conn)
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT count(*) FROM public.orders_deleted;")
+            assert cursor.fetchone()[0] == 0
+        conn.rollback()
+    finally:
+        conn.close()
+        long_tx.close()
@@ -0,0 +1,223 @@
+"""Sincronización contra el servidor local de `kaiken.sync` (sin base de datos)."""
+import json
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from kaiken import db, ingest, sync
+
+DATA = Path(__file__).resolve().parent.parent / "scripts" / "data"
+
+
+class Injected:
+    """Reemplazo de `random` para el servidor: devuelve `values` en orden y luego 0.99."""
+
+    def __init__(self, *values):
+        self.values = list(values)
+
+    def random(self):
+        return self.values.pop(0) if self.values else 0.99
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    directory = tmp_path / "data"
+    directory.mkdir()
+    for name in sync.SAMPLE_FILES.values():
+        shutil.copy(DATA / name, directory / name)
+    return directory
+
+
+@pytest.fixture
+def server(data_dir):
+    server = sync.make_server(data_dir, port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    server.base_url = f"http://127.0.0.1:{server.server_port}/webhook"
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def state(tmp_path):
+    return sync.SyncState(tmp_path / "state")
+
+
+def url(server, name):
+    return f"{server.base_url}/{sync.ENDPOINTS[name]}"
+
+
+def csv_rows(path):
+    return len(path.read_text(encoding="utf-8").splitlines()) - 1
+
+
+def edit_line(path, prefix, old, new):
+    """Reemplaza `old` por `new` en la línea que empieza con `prefix`."""
+    lines = path.read_text(encoding="utf-8").splitlines(keepends=True)
+    (i,) = [i for i, line in enumerate(lines) if line.startswith(prefix)]
+    lines[i] = lines[i].replace(old, new)
+    path.write_text("".join(lines), encoding="utf-8")
+    # Otra marca de tiempo aunque la edición caiga en el mismo segundo
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 2_000_000_000))
+
+
+# --- PARSEO ---
+
+def test_iter_records_por_trozos():
+    records = [
+        {"id": 1, "nombre": "ñandú [con] {llaves}", "costo": 1234567.25, "extra": {"a": None}},
+        {"id": 2, "nombre": "comillas \" y \\ barra", "costo": -0.5, "lista": [1, 2]},
+        {"id": 123456789, "nombre": "", "costo": 1e21, "flag": True},
+    ]
+    payload = json.dumps({"count": 3, "data": records}, ensure_ascii=False)
+    for size in (1, 2, 5, 64, len(payload)):
+        chunks = (payload[i:i + size] for i in range(0, len(payload), size))
+        assert list(sync.iter_records(chunks)) == records
+    assert list(sync.iter_records(iter(["[1", "2, 3", "4]"]))) == [12, 34]
+    assert list(sync.iter_records(iter(['{"a": 1}']))) == [{"a": 1}]
+
+
+def test_iter_records_arreglo_sin_cerrar():
+    with pytest.raises(ValueError):
+        list(sync.iter_records(iter(['[{"a": 1},', '{"a": 2}'])))
+
+
+def test_fetch_por_chunks_escribe_todos_los_registros(server, state, data_dir):
+    with sync.http_session() as session:
+        result = sync.fetch(session, "orders", url(server, "orders"), state)
+    assert result.status == "ok"
+    assert result.total == result.changed == csv_rows(data_dir / "order_sample.csv")
+    spooled = [json.loads(line) for line in result.spool.read_text(encoding="utf-8").splitlines()]
+    assert spooled[0]["id"] == "2306-267-LE24-2000000013651"
+    assert spooled[0]["observation"] is None
+
+
+# --- REINTENTOS ---
+
+def test_reintenta_cuerpo_cortado(server, state, data_dir, monkeypatch):
+    server.cut_rate = 0.5
+    monkeypatch.setattr(sync, "random", Injected(0.99, 0.0))     # sin 503, primera respuesta cortada
+    with sync.http_session(backoff=0.01) as session:
+        result = sync.fetch(session, "tenders", url(server, "tenders"), state, backoff=0.01)
+    assert server.hits["tender-sample"] == 2
+    assert result.total == csv_rows(data_dir / "tender_sample.csv")
+
+
+def test_reintenta_503(server, state, data_dir, monkeypatch):
+    server.fail_rate = 0.5
+    monkeypatch.setattr(sync, "random", Injected(0.0))            # primera respuesta 503
+    with sync.http_session(backoff=0.01) as session:
+        result = sync.fetch(session, "tenders", url(server, "tenders"), state)
+    assert server.hits["tender-sample"] == 2
+    assert result.total == csv_rows(data_dir / "tender_sample.csv")
+
+
+# --- DETECCIÓN DE CAMBIOS ---
+
+def test_304_por_etag(server, state, data_dir):
+    with sync.http_session() as session:
+        first = sync.fetch(session, "orders", url(server, "orders"), state)
+        state.save("orders", first.state, first.hashes)
+        second = sync.fetch(session, "orders", url(server, "orders"), state)
+        assert second.status == "sin cambios"
+
+        edit_line(data_dir / "order_sample.csv", "2;", ";1;35000.0;", ";2;35000.0;")
+        third = sync.fetch(session, "orders", url(server, "orders"), state)
+    assert third.status == "ok"
+    assert (third.total, third.changed) == (first.total, 1)
+
+
+def test_304_por_if_modified_since(server, state, data_dir):
+    with sync.http_session() as session:
+        first = sync.fetch(session, "orders", url(server, "orders"), state)
+        # Sin ETag guardado: sólo se envía If-Modified-Since
+        state.save("orders", {"last_modified": first.state["last_modified"]}, first.hashes)
+        assert sync.fetch(session, "orders", url(server, "orders"), state).status == "sin cambios"
+
+        edit_line(data_dir / "order_sample.csv", "2;", ";1;35000.0;", ";2;35000.0;")
+        assert sync.fetch(session, "orders", url(server, "orders"), state).status == "ok"
+
+
+def test_cursor_since(server, state, data_dir):
+    with sync.http_session() as session:
+        first = sync.fetch(session, "products", url(server, "products"), state)
+        assert first.state["cursor"] == "2025-07-21"
+        state.save("products", first.state, first.hashes)
+
+        second = sync.fetch(session, "products", url(server, "products"), state)
+        assert (second.status, second.total, second.changed) == ("ok", 0, 0)
+        assert second.hashes == first.hashes
+
+        edit_line(data_dir / "product_sample.csv", "2;", ";25000;2025-07-09;2025-07-09", ";26000;2025-07-09;2025-08-01")
+        third = sync.fetch(session, "products", url(server, "products"), state)
+    assert (third.total, third.changed, third.state["cursor"]) == (1, 1, "2025-08-01")
+    # Con ?since= la respuesta es parcial: se conservan los hashes anteriores
+    assert first.hashes < third.hashes
+
+
+# --- CORRIDA COMPLETA ---
+
+class FakeConnection:
+    def commit(self):
+        pass
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def loaded(monkeypatch):
+    """Registros que `sync.run` entregaría a cada función de ingesta."""
+    loaded = {}
+
+    def loader(name):
+        def load(conn, path, index, **kwargs):
+            records = [json.loads(line) for line in Path(path).read_text(encoding="utf-8").splitlines()]
+            loaded.setdefault(name, []).append(records)
+            return {"tabla": name, "cargadas": len(records), "rechazadas": 0}
+        return load
+
+    monkeypatch.setattr(db, "connect", lambda dsn=None: FakeConnection())
+    monkeypatch.setattr(ingest, "ForeignKeyIndex", lambda conn: None)
+    monkeypatch.setattr(ingest, "ingest_products", loader("products"))
+    monkeypatch.setattr(ingest, "ingest_tenders", loader("tenders"))
+    monkeypatch.setattr(ingest, "ingest_orders", loader("orders"))
+    return loaded
+
+
+def test_descarga_concurrente(server, tmp_path, loaded):
+    server.delay = 0.5
+    t0 = time.perf_counter()
+    resumen = sync.run(server.base_url, state_dir=tmp_path / "state", log=lambda *args: None)
+    elapsed = time.perf_counter() - t0
+    # En serie serían al menos 3 × 0,5 s
+    assert elapsed < 1.2
+    assert [r["fuente"] for r in resumen] == list(sync.ENDPOINTS)
+    assert all(server.hits[path] == 1 for path in sync.ENDPOINTS.values())
+
+
+def test_segunda_corrida_carga_solo_lo_cambiado(server, data_dir, tmp_path, loaded):
+    state_dir = tmp_path / "state"
+    first = sync.run(server.base_url, state_dir=state_dir, log=lambda *args: None)
+    assert [r["cargadas"] for r in first] == [
+        csv_rows(data_dir / "product_sample.csv"),
+        csv_rows(data_dir / "tender_sample.csv"),
+        csv_rows(data_dir / "order_sample.csv"),
+    ]
+
+    edit_line(data_dir / "tender_sample.csv", "3;", ";0.4", ";0.5")
+    second = sync.run(server.base_url, state_dir=state_dir, log=lambda *args: None)
+    by_source = {r["fuente"]: r for r in second}
+
+    assert by_source["tenders"]["recibidos"] == csv_rows(data_dir / "tender_sample.csv")
+    assert by_source["tenders"]["cargadas"] == 1
+    assert [record["id"] for record in loaded["tenders"][-1]] == ["3736-76-LE24"]
+    assert by_source["orders"]["estado"] == "sin cambios"
+    assert by_source["products"]["cambiados"] == 0
+    assert len(loaded["orders"]) == 1 and len(loaded["products"]) == 1